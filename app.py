@@ -1,8 +1,30 @@
-from flask import Flask, request, jsonify  # json : 데이터를 주고 받을때 사용하는 텍스트
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from models import db, Todo, User
+import hashlib
+import json
+import os
+import time
+import click
+from urllib.parse import urlencode
+from datetime import date, datetime, timedelta
+from flask import Flask, Response, g, request, jsonify, stream_with_context  # json : 데이터를 주고 받을때 사용하는 텍스트
+from sqlalchemy.exc import IntegrityError
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, decode_token, get_jwt, jwt_required, get_jwt_identity
+from models import db, Todo, User, RefreshToken, TodoListVersion, TodoChange, TodoStats, TodoDailyStats, ensure_indexes
+from cache import ReadCache
+from metrics import Metrics
+from query_log import QueryLog
+from profiler import Profiler, aggregate_dumps, top_frames
+from broker import EventBroker, StreamLimitReached
+from revocation import RevocationList
+from group_commit import GroupCommitWriter
+from hashing import HashPool, HashPoolBusy
 from config import Config
+import sqlite_profile
+import json_provider
+import search
+from sharding import ShardRouter, SHARD_TABLES
+from bulk_import import iter_records
+from seeding import seed_database, DISTRIBUTIONS
+from pagination import encode_cursor, decode_cursor, parse_limit, parse_bool, parse_datetime, parse_fields, InvalidCursor
 # Bcrpyt : 비밀번호 암호화, 해싱 알고리즘 사용 + 같은 비밀번호도 매번 다른 해시값!
 # 암호화 방법에는 argon2, PBKDF2 등이 있지만 가장 대중적인 암호화 방법 사용
 # flask_jwt_extended : 토큰 기반 인증
@@ -12,17 +34,208 @@ app = Flask(__name__)
 app.config.from_object(Config)  # from_object : Config 클래스의 속성을 읽어 config 딕셔너리에 삽입(원래 존재)
 
 # SQLAlchemy 초기화
+sqlite_profile.configure(app)  # 읽기 전용 bind 주소 = 기본 DB 주소. 엔진을 만들기(db.init_app) 전에
 db.init_app(app)  # db는 앞으로 app(app.py에서 생성한 객체)와 연동되라는 의미
-bcrypt = Bcrypt(app) # 비밀번호 암호화
+sqlite_profile.init_app(app, db)  # 연결마다 WAL 등 PRAGMA 적용. 첫 연결 전에 등록해야 함
+json_provider.init_app(app)  # jsonify를 orjson으로 (설치되어 있을 때만, json_provider.py)
+metrics = Metrics(app)  # 요청 지표 (metrics.py, GET /metrics). json_provider 다음에 등록 (jsonify 시간 측정)
+query_log = QueryLog(app, db)  # 느린 쿼리 / N+1 쿼리 로그 (query_log.py, QUERY_LOG_ENABLED일 때만)
+profiler = Profiler(app)  # 관리자 헤더가 붙은 요청만 프로파일링 (profiler.py, PROFILER_ENABLED일 때만)
+bcrypt = HashPool(app) # 비밀번호 암호화. 별도 프로세스 풀에서 실행 (hashing.py)
 jwt = JWTManager(app) # JWT 토큰 관리
+revocation = RevocationList(app) # 폐기(로그아웃)된 토큰 목록
+cache = ReadCache(app) # 조회 캐시 (cache.py)
+broker = EventBroker(app) # 할 일 변경 알림 (broker.py, GET /todos/stream)
+group_writer = GroupCommitWriter(app) # 그룹 커밋 쓰기 큐 (group_commit.py, GROUP_COMMIT_ENABLED일 때만 사용)
+shards = ShardRouter(app, db) # 사용자별 샤딩 (sharding.py, DATABASE_SHARDS > 0일 때만 사용)
 
 # DB 테이블 생성
 # app의 설정을 사용해 DB 생성
 # create_all은 DB에 테이블을 자동으로 생성하게 하는 메서드
 # with은 사용 후에 자동으로 소멸시켜주는 역할
 # .app_context는 Flask의 컨텍스트(문맥) 안에서 코드를 실행하겠다는 의미
+# 샤딩 모드에서는 디렉터리 DB와 샤드 DB에 각각 필요한 테이블만 생성
 with app.app_context():
-    db.create_all()
+    shards.create_all()
+    # 검색 색인이 생기기 전에 만든 DB는 여기서 색인을 만들고 기존 할 일을 채움
+    for engine in shards.todo_engines() :
+        search.ensure_index(engine)
+        # create_all은 이미 있는 테이블의 인덱스를 만들지 않음 -> 목록 조회용 복합 인덱스가 없으면 생성
+        ensure_indexes(engine)
+
+# 실제로 적용된 SQLite 설정 확인 (적용되지 않은 PRAGMA는 경고 로그)
+sqlite_profile.report(app, db)
+
+def current_user_id() :
+    """JWT 토큰의 사용자 ID를 int로 반환"""
+    # 토큰에는 str로 저장되어 있어서 DB의 user_id(int)와 비교하려면 변환 필요
+    metrics.mark('auth')   # 요청 시작부터 여기까지 = JWT 확인 (@jwt_required) 시간
+    g.user_id = int(get_jwt_identity())
+    # g.user_id : 샤딩 모드에서 이 요청의 할 일 쿼리를 보낼 샤드를 정하는 기준
+    return g.user_id
+
+class TodoInputError(ValueError) :
+    """할 일 입력값 오류. error / message는 응답 JSON에 그대로 사용"""
+    def __init__(self, error, message) :
+        super().__init__(error)
+        self.error = error
+        self.message = message
+
+def clean_new_todo(data) :
+    """새 할 일 입력 검증 후 (title, description) 반환. 문제가 있으면 TodoInputError"""
+    title = data.get('title', '').strip()
+    description = data.get('description', '').strip()
+    # data['title'] / data['description']의 값을 가져옮. 없으면 default값은 ''이며, 혹시 모르니 양쪽 빈 칸 제거
+
+    if not title :
+        raise TodoInputError('Title is required', '할 일 제목을 입력해주세요.')
+    # 제목이 비어있으면 에러
+
+    if len(title) > 100 :
+        raise TodoInputError('Title too long', '제목은 100자 이내로 입력해주세요.')
+    # 제목 길이 100 초과하면 에러
+
+    return title, description
+
+def clean_todo_changes(data) :
+    """할 일 수정 입력 검증 후 바꿀 값 딕셔너리 반환. 문제가 있으면 TodoInputError"""
+    changes = {}
+
+    # 제목 수정
+    if 'title' in data :
+        title = data['title'].strip()
+        if not title :
+            raise TodoInputError('Title is required', '제목은 비울 수 없습니다.')
+
+        if len(title) > 100 :
+            raise TodoInputError('Title too long', '제목은 100글자 이내로 입력해주세요.')
+        changes['title'] = title
+
+    if 'description' in data :
+        changes['description'] = data['description'].strip()
+
+    if 'completed' in data :
+        if not isinstance(data['completed'], bool) :
+        # isinstance : input되는 값이 뒤의 형식이 아니면
+            raise TodoInputError('Invalid data type', 'completed는 true 혹은 false만 가능합니다.')
+        changes['completed'] = data['completed']
+
+    return changes
+
+def todo_missing_response(todo_id, not_found_error) :
+    """user_id 조건 때문에 대상 행이 없을 때 404(없음) / 403(다른 사용자) 응답 구분"""
+    # 실패했을 때만 한 번 더 조회하므로 정상 요청은 쿼리 한 번으로 끝남
+    # 샤딩 모드에서는 현재 사용자의 샤드만 조회하므로 다른 사용자의 할 일도 404
+    owner_id = db.session.scalar(db.select(Todo.user_id).where(Todo.id == todo_id))
+
+    if owner_id is None :
+        return jsonify({
+            'error' : not_found_error,
+            'message' : f'ID {todo_id}인 할 일을 찾을 수 없습니다.'
+        }), 404
+
+    return jsonify({
+        'error' : 'Forbidden',
+        'message' : '다른 사용자의 할 일입니다.'
+    }), 403
+
+def hash_pool_busy_response() :
+    """해싱 풀이 꽉 찼을 때 응답. Retry-After 초 뒤에 다시 시도하라는 의미"""
+    return jsonify({
+        'error' : 'Service busy',
+        'message' : '요청이 많습니다. 잠시 후 다시 시도해주세요.'
+    }), 503, {'Retry-After' : str(bcrypt.retry_after)}
+
+def issue_refresh_token(user_id) :
+    """리프레시 토큰 생성 + 발급 기록 추가 (커밋은 호출한 쪽에서)"""
+    token = create_refresh_token(identity=str(user_id))
+    claims = decode_token(token)   # jti, 만료 시각 확인용
+
+    # 발급할 때마다 행이 늘어나므로 이 사용자의 만료된 기록은 여기서 삭제 (user_id 인덱스로 그 사용자 행만 읽음)
+    # 폐기된 토큰도 만료 전까지는 재사용 감지에 필요해서 남겨 둠. 만료된 토큰은 JWT 확인에서 이미 거부됨
+    db.session.execute(
+        db.delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.expires_at < datetime.now())
+    )
+
+    db.session.add(RefreshToken(
+        jti = claims['jti'],
+        user_id = user_id,
+        expires_at = datetime.fromtimestamp(claims['exp'])
+    ))
+    return token
+
+# @jwt_required()가 붙은 요청마다 호출. True를 반환하면 401 (Token has been revoked)
+@jwt.token_in_blocklist_loader
+def check_token_revoked(jwt_header, jwt_payload) :
+    return revocation.is_revoked(jwt_payload['jti'])
+
+# ETag : 응답 내용의 버전 표시. 클라이언트가 If-None-Match로 다시 보내면 바뀌지 않았을 때 304(본문 없음)
+def todo_list_version(user_id) :
+    """사용자의 목록 버전 (todo_list_versions). 할 일이 추가 / 수정 / 삭제될 때마다 트리거로 +1"""
+    # 할 일이 바뀌면 버전이 올라가므로, 버전 조회(기본키 조회 한 번)만으로 변경 여부를 알 수 있음
+    return db.session.scalar(
+        db.select(TodoListVersion.version).where(TodoListVersion.user_id == user_id)
+    ) or 0
+
+def todo_list_etag(user_id) :
+    """목록 ETag = 사용자 + 목록 버전(todo_list_versions) + 쿼리 파라미터"""
+    return f'{user_id}-{todo_list_version(user_id)}-{query_digest()}'
+
+def query_digest() :
+    """쿼리 파라미터의 sha1 (ETag / 캐시 키에 사용)"""
+    # crc32 같은 짧은 체크섬은 다른 파라미터끼리 값이 겹칠 수 있어서 다른 페이지를 캐시에서 주거나 잘못된 304가 생김
+    # 파라미터 이름순으로 정렬해서 순서만 다른 같은 요청은 같은 값 (같은 이름의 값끼리는 원래 순서 유지 -> 첫 번째 값이 같음)
+    normalized = urlencode(sorted(request.args.items(multi=True), key=lambda item : item[0]))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def todo_etag(todo_id, updated_at) :
+    """할 일 하나의 ETag = id + 마지막 수정 시각"""
+    return f'{todo_id}-{int(updated_at.timestamp() * 1000000)}'
+
+def with_etag(response, etag) :
+    """응답에 ETag 추가. no-cache : 캐시해도 되지만 쓰기 전에 항상 ETag로 확인하라는 의미"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag) :
+    """304 Not Modified 응답 (본문 없음)"""
+    return with_etag(Response(status=304), etag)
+
+# 조회 캐시 키 (모두 user:<id> 태그로 묶음)
+# todo:<사용자>-<목록 버전>:<id> : 할 일 하나 / todos:<목록 ETag> : 목록 한 페이지
+# 키에 목록 버전이 들어 있어서, 수정 전에 읽은 값을 무효화가 끝난 뒤에 저장해도(조회와 수정이 겹칠 때)
+# 버전이 올라간 뒤의 조회는 그 키를 찾지 않음 -> 오래된 값 / 잘못된 304를 주지 않음 (다른 프로세스의 수정도 바로 반영)
+def todo_cache_key(user_id, version, todo_id) :
+    return f'todo:{user_id}-{version}:{todo_id}'
+
+def invalidate_todos(user_id) :
+    """사용자의 할 일 / 목록 캐시 삭제 (커밋 후 호출). 예전 버전 키가 TTL까지 메모리를 차지하지 않도록"""
+    cache.delete_tag(f'user:{user_id}')
+
+# 그룹 커밋용 쓰기 작업. 쓰기 스레드에서 connection을 받아 실행
+# RETURNING으로 받은 행은 Todo와 같은 속성을 가지므로 Todo.to_dict로 바로 변환
+def insert_todo_operation(title, description, user_id) :
+    def operation(connection) :
+        row = connection.execute(
+            db.insert(Todo.__table__)
+            .values(title = title, description = description, user_id = user_id)
+            .returning(*Todo.__table__.c)
+        ).one()
+        return Todo.to_dict(row)
+    return operation
+
+def update_todo_operation(todo_id, user_id, changes) :
+    def operation(connection) :
+        row = connection.execute(
+            db.update(Todo.__table__)
+            .where(Todo.id == todo_id, Todo.user_id == user_id)
+            .values(**changes)
+            .returning(*Todo.__table__.c)
+        ).first()
+        return Todo.to_dict(row) if row else None
+    return operation
 
 # 루트 경로(기본 페이지)
 @app.route('/')
@@ -32,11 +245,26 @@ def home() :
         'version' : '1.0',
         'endpoints' : {
             'GET /' : 'API 정보 조회',
+            'POST /register' : '회원가입',
+            'POST /login' : '로그인 (access_token, refresh_token 발급)',
+            'POST /token/refresh' : '액세스 토큰 재발급 (refresh_token 필요)',
+            'POST /token/revoke' : '리프레시 토큰 폐기',
+            'POST /logout' : '로그아웃 (액세스 토큰 폐기)',
+            'DELETE /users/me' : '회원 탈퇴 (모든 할 일 포함)',
             'POST /todos' : '할 일 추가',
-            'GET /todos' : '할 일 목록 조회',
+            'GET /todos' : '할 일 목록 조회 (limit, cursor, completed, created_after, updated_after, sort, order, fields)',
+            'GET /todos/changes' : '변경된 할 일 / 삭제된 id 조회 (since, limit)',
+            'GET /todos/search' : '할 일 검색 (q, limit, cursor)',
+            'GET /todos/stream' : '할 일 변경 알림 (Server-Sent Events)',
+            'GET /todos/stats' : '할 일 개수 / 완료 개수 + 날짜별 생성 / 완료 수 (days)',
+            'GET /todos/export' : '할 일 전체 내보내기 (NDJSON 스트리밍)',
+            'POST /todos/import' : '할 일 대량 가져오기 (NDJSON, JSON 배열)',
+            'POST /todos/batch' : '할 일 일괄 추가 / 수정 / 삭제',
             'GET /todos/<id>' : '특정 할 일 조회',
             'PUT /todos/<id>' : '할 일 수정',
-            'DELETE /todos/<id>' : '할 일 삭제'
+            'DELETE /todos/<id>' : '할 일 삭제',
+            'GET /cache/stats' : '조회 캐시 통계',
+            'GET /metrics' : '요청 지표 (Prometheus 형식)'
         }
     })
 # Python은 딕셔너리 형식을 return 불가
@@ -63,18 +291,10 @@ def register():
         if not username or not email or not password :
             return jsonify({'error' : 'username, email, password are required'}), 400
 
-        # 중복 확인
-        if User.query.filter_by(username=username).first():
-            return jsonify({'error' : 'Username already exists'}), 400
-        # User 쿼리의 username 속성명에서 지역변수 'username'과 일치하는 부분이 있는지 확인
-        # first는 중복된 것이 하나라도 있으면 안되기 때문
-
-        if User.query.filter_by(email=email).first() :
-            return jsonify({'error' : 'Email already exists'}), 400
-
         # 비밀번호 해쉬화
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
-        # bcrypt 알고리즘으로 해싱. bytes를 문자열로 전환
+        with metrics.phase('bcrypt') :
+            hashed_password = bcrypt.generate_password_hash(password)
+        # bcrypt 알고리즘으로 해싱. 해싱 풀에서 문자열로 반환
         # 순서 : 클라이언트에서 비번 입력 -> HTTPS로 전송시 암호화 -> 서버 수신 받으면서 복호화(다시 평문) -> 서버에서 해싱
 
         # 새 User 생성
@@ -84,14 +304,32 @@ def register():
             password = hashed_password
         )
 
-        db.session.add(new_user)
+        # 중복 확인
+        # 미리 SELECT로 확인하지 않고 INSERT 후 UNIQUE 제약 위반(IntegrityError)으로 판단
+        # -> 쿼리 한 번 + 동시에 같은 이름으로 가입해도 둘 다 통과하는 문제 없음
+        try :
+            db.session.add(new_user)
+            db.session.flush()   # INSERT 실행
+        except IntegrityError as e :
+            db.session.rollback()
+            if 'username' in str(e.orig) :
+                return jsonify({'error' : 'Username already exists'}), 400
+            if 'email' in str(e.orig) :
+                return jsonify({'error' : 'Email already exists'}), 400
+            raise
+
+        new_user_data = new_user.to_dict()   # 커밋 후에 읽으면 다시 SELECT 하므로 미리 변환
         db.session.commit()
 
         return jsonify({
             'message' : '회원가입 완료',
-            'data' : new_user.to_dict()
+            'data' : new_user_data
         }), 201
 
+    except HashPoolBusy :
+        db.session.rollback()
+        return hash_pool_busy_response()
+
     except Exception as e :
         db.session.rollback()
         return jsonify({'error' : 'Internal server error'}), 500
@@ -114,23 +352,338 @@ def login():
         user = User.query.filter_by(username=username).first()
 
         # 사용자 없거나 비밀번호 틀림
-        if not user or not bcrypt.check_password_hash(user.password, password) :
+        with metrics.phase('bcrypt') :
+            password_ok = user is not None and bcrypt.check_password_hash(user.password, password)
+        if not password_ok :
             return jsonify({'error' : 'Invalide username or password'}), 401
         # check_password_hash() : 비밀번호 검증
 
+        # BCRYPT_LOG_ROUNDS가 바뀌었으면 지금 받은 비밀번호로 다시 해싱해서 저장
+        # 평문 비밀번호는 로그인할 때만 알 수 있으므로 이때 교체
+        if bcrypt.needs_rehash(user.password) :
+            with metrics.phase('bcrypt') :
+                user.password = bcrypt.generate_password_hash(password)
+
         # JWT 토큰 생성, user_id포함
         # user_id를 str 형식으로 변경해서 받음. 안하면 로그인 과정에서 422에러
         access_token = create_access_token(identity=str(user.id))
+        # 리프레시 토큰 : 액세스 토큰이 만료되면 /token/refresh로 비밀번호 없이 재발급
+        refresh_token = issue_refresh_token(user.id)
+
+        user_data = user.to_dict()
+        db.session.commit()
 
         return jsonify({
             'message' : '로그인 성공',
             'access_token' : access_token,
-            'user' : user.to_dict()
+            'refresh_token' : refresh_token,
+            'user' : user_data
+        }), 200
+
+    except HashPoolBusy :
+        db.session.rollback()
+        return hash_pool_busy_response()
+
+    except Exception as e :
+        db.session.rollback()
+        return jsonify({'error' : 'Internal server error'}), 500
+
+# 토큰 재발급
+# 헤더 : Authorization: Bearer <refresh_token>
+# 비밀번호(bcrypt) 검증 없이 새 액세스 토큰 발급 -> 로그인마다 드는 bcrypt 비용 제거
+# 리프레시 토큰도 매번 새로 발급(회전)하고 이전 것은 폐기
+# 이미 폐기된 토큰이 다시 들어오면 탈취된 것으로 보고 그 사용자의 리프레시 토큰을 모두 폐기
+@app.route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_access_token() :
+    try :
+        user_id = current_user_id()
+        jti = get_jwt()['jti']
+
+        # 폐기되지 않은 경우에만 폐기 처리. UPDATE 한 번이라 같은 토큰으로 동시에 요청해도 하나만 성공
+        rotated = db.session.execute(
+            db.update(RefreshToken)
+            .where(RefreshToken.jti == jti, RefreshToken.revoked == False)
+            .values(revoked = True)
+        ).rowcount
+
+        if not rotated :
+            db.session.execute(
+                db.update(RefreshToken)
+                .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+                .values(revoked = True)
+            )
+            db.session.commit()
+            return jsonify({
+                'error' : 'Token revoked',
+                'message' : '사용할 수 없는 토큰입니다. 다시 로그인해주세요.'
+            }), 401
+
+        access_token = create_access_token(identity=str(user_id))
+        refresh_token = issue_refresh_token(user_id)
+        db.session.commit()
+
+        return jsonify({
+            'message' : '토큰 재발급 성공',
+            'access_token' : access_token,
+            'refresh_token' : refresh_token
         }), 200
 
     except Exception as e :
+        db.session.rollback()
+        return jsonify({'error' : 'Internal server error'}), 500
+
+# 리프레시 토큰 폐기
+# 헤더 : Authorization: Bearer <refresh_token>
+@app.route('/token/revoke', methods=['POST'])
+@jwt_required(refresh=True)
+def revoke_refresh_token() :
+    try :
+        db.session.execute(
+            db.update(RefreshToken)
+            .where(RefreshToken.jti == get_jwt()['jti'])
+            .values(revoked = True)
+        )
+        db.session.commit()
+
+        return jsonify({'message' : '토큰이 폐기되었습니다.'}), 200
+
+    except Exception as e :
+        db.session.rollback()
         return jsonify({'error' : 'Internal server error'}), 500
 
+# 로그아웃
+# 헤더 : Authorization: Bearer <access_token>
+# 현재 액세스 토큰을 폐기 목록에 추가. 본문에 refresh_token을 같이 보내면 그 토큰도 폐기
+@app.route('/logout', methods=['POST'])
+@jwt_required()
+def logout() :
+    try :
+        claims = get_jwt()
+        revocation.revoke(claims['jti'], datetime.fromtimestamp(claims['exp']))
+
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token') :
+            try :
+                refresh_claims = decode_token(data['refresh_token'])
+            except Exception :
+                refresh_claims = None
+            # 자기 리프레시 토큰일 때만 폐기
+            if refresh_claims and refresh_claims['sub'] == claims['sub'] :
+                db.session.execute(
+                    db.update(RefreshToken)
+                    .where(RefreshToken.jti == refresh_claims['jti'])
+                    .values(revoked = True)
+                )
+
+        db.session.commit()
+
+        return jsonify({'message' : '로그아웃 되었습니다.'}), 200
+
+    except Exception as e :
+        db.session.rollback()
+        return jsonify({'error' : 'Internal server error'}), 500
+
+# 회원 탈퇴 : 사용자와 사용자의 모든 데이터(할 일, 토큰, 변경 내역, 통계) 삭제
+# DELETE FROM users 한 번으로 나머지는 DB가 ON DELETE CASCADE로 삭제 (models.py)
+# -> 할 일이 아무리 많아도 ORM으로 불러오지 않아서 메모리 사용량 일정
+# 샤딩 모드에서는 할 일이 다른 DB(샤드)에 있어서 샤드에서 먼저 삭제
+@app.route('/users/me', methods=['DELETE'])
+@jwt_required()
+def delete_account() :
+    try :
+        user_id = current_user_id()
+        claims = get_jwt()
+
+        if shards.enabled :
+            shards.delete_user(user_id)
+
+        try :
+            deleted = db.session.execute(db.delete(User).where(User.id == user_id)).rowcount
+        except IntegrityError :
+            # 이 기능 전에 만든 DB는 외래키에 ON DELETE CASCADE가 없음 -> 참조하는 테이블에서 직접 삭제
+            db.session.rollback()
+            delete_user_rows(user_id)
+            deleted = db.session.execute(db.delete(User).where(User.id == user_id)).rowcount
+
+        if not deleted :
+            db.session.rollback()
+            return jsonify({
+                'error' : 'User not found',
+                'message' : '이미 탈퇴한 사용자입니다.'
+            }), 404
+
+        # 지금 사용한 액세스 토큰도 폐기 (리프레시 토큰은 CASCADE로 삭제되어 재발급 불가)
+        revocation.revoke(claims['jti'], datetime.fromtimestamp(claims['exp']))
+        db.session.commit()
+        shards.forget(user_id)
+        invalidate_todos(user_id)
+
+        return jsonify({'message' : '회원 탈퇴가 완료되었습니다.'}), 200
+
+    except Exception as e :
+        db.session.rollback()
+        return jsonify({'error' : 'Internal server error'}), 500
+
+def delete_user_rows(user_id) :
+    """users를 참조하는 테이블에서 사용자의 행 삭제 (테이블마다 DELETE 한 번, 할 일 먼저)"""
+    todos = Todo.__table__
+    tables = [todos] + [
+        table for table in reversed(db.metadata.sorted_tables)   # 참조하는 테이블부터
+        if table is not todos and table.name != 'users' and 'user_id' in table.c
+    ]
+    for table in tables :
+        if shards.enabled and table.name in SHARD_TABLES :
+            continue   # 샤드 테이블은 shards.delete_user에서 삭제
+        db.session.execute(db.delete(table).where(table.c.user_id == user_id))
+
+# SQLite 엔진 설정 확인 명령어
+# 사용법 : flask --app app db-profile
+@app.cli.command('db-profile')
+def db_profile_command() :
+    """엔진별로 실제 적용된 PRAGMA와 연결 풀 상태 출력"""
+    for name, profile in sqlite_profile.report(app, db).items() :
+        click.echo(f'[{name}]')
+        for key, value in profile.items() :
+            click.echo(f'  {key} : {value}')
+
+# 토큰 강제 폐기 (관리자용 명령어)
+# 사용법 : flask --app app revoke-token <jti>
+@app.cli.command('revoke-token')
+@click.argument('jti')
+def revoke_token_command(jti) :
+    """jti로 토큰을 강제로 폐기"""
+    # 토큰 자체가 없어서 만료 시각을 모르므로 가장 긴 유효기간만큼 보관
+    longest = max(app.config['JWT_ACCESS_TOKEN_EXPIRES'], app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+    revocation.revoke(jti, datetime.now() + longest)
+    db.session.execute(
+        db.update(RefreshToken)
+        .where(RefreshToken.jti == jti)
+        .values(revoked = True)
+    )
+    db.session.commit()
+    click.echo(f'{jti} 폐기 완료')
+
+# 만료된 토큰 기록 삭제 (cron 등으로 주기적으로 실행)
+# 사용법 : flask --app app prune-tokens
+# 요청 처리 중에는 로그아웃 / 재발급 같은 쓰기 요청에서만 조금씩 지우므로, 쓰기가 드문 서버는 이 명령어로 정리
+@app.cli.command('prune-tokens')
+def prune_tokens_command() :
+    """만료된 폐기 기록(revoked_tokens)과 리프레시 토큰 기록(refresh_tokens) 삭제"""
+    revoked = revocation.prune()
+    refresh = db.session.execute(
+        db.delete(RefreshToken).where(RefreshToken.expires_at < datetime.now())
+    ).rowcount
+    db.session.commit()
+    click.echo(f'폐기 기록 {revoked}개, 리프레시 토큰 기록 {refresh}개 삭제')
+
+# 프로파일 파일(collapsed stack)을 합쳐서 출력
+# 사용법 : flask --app app profile-report [--route /todos] [--output todos.collapsed] [--top 20]
+# 출력 파일은 flamegraph.pl / speedscope 등으로 열기 (flamegraph.pl todos.collapsed > todos.svg)
+@app.cli.command('profile-report')
+@click.option('--route', default=None, help='이 라우트만 합침 (/todos 또는 "GET /todos")')
+@click.option('--dir', 'directory', default=None, help='프로파일 디렉터리 (기본 PROFILER_DIR)')
+@click.option('--output', type=click.File('w'), default='-', help='합친 collapsed stack을 쓸 파일 (기본 표준 출력)')
+@click.option('--top', type=int, default=0, help='collapsed stack 대신 자기 시간이 큰 함수 N개 출력')
+def profile_report_command(route, directory, output, top) :
+    """여러 요청의 프로파일을 라우트별로 합침"""
+    directory = directory or profiler.directory
+    if not os.path.isdir(directory) :
+        raise click.ClickException(f'프로파일 디렉터리가 없습니다 : {directory}')
+    stacks, dumps = aggregate_dumps(directory, route)
+    if not dumps :
+        raise click.ClickException('합칠 프로파일이 없습니다.')
+    click.echo(f'프로파일 {dumps}개, 총 {sum(stacks.values()) / 1000:.1f}ms', err = True)
+    if top :
+        for name, microseconds in top_frames(stacks, top) :
+            click.echo(f'{microseconds / 1000:10.2f}ms  {name}', file = output)
+        return
+    for path, microseconds in sorted(stacks.items()) :
+        click.echo(f'{path} {microseconds}', file = output)
+
+# 벤치마크용 대량 데이터 추가 (seeding.py)
+# 사용법 : flask --app app seed --users 1000 --todos 1000000 [--distribution zipf] [--seed 1]
+# 사용자 비밀번호는 모두 --password (해싱은 한 번만). 1 CPU에서 할 일 100만 개에 35초 정도
+# (인덱스 / 파생 테이블까지 포함한 전체 초당 약 3만 행. 가장 오래 걸리는 것은 검색 색인(접두어 색인 포함)과 INSERT)
+@app.cli.command('seed')
+@click.option('--users', type=click.IntRange(min=0), default=1000, help='추가할 사용자 수')
+@click.option('--todos', type=click.IntRange(min=0), default=100000, help='추가할 할 일 개수')
+@click.option('--distribution', type=click.Choice(DISTRIBUTIONS), default='uniform',
+              help='사용자별 할 일 개수 분포 (fixed : 모두 같게, uniform : 평균의 0 ~ 2배, zipf : 소수에게 몰림)')
+@click.option('--completed-ratio', type=click.FloatRange(0, 1), default=0.3, help='완료한 할 일 비율')
+@click.option('--description-length', default='0-200', help='설명 길이 범위 (최소-최대 또는 고정 길이)')
+@click.option('--days', type=click.IntRange(min=0), default=90, help='할 일을 만든 날짜 범위 (최근 며칠)')
+@click.option('--seed', 'seed_value', type=int, default=0, help='난수 시드 (같으면 같은 데이터)')
+@click.option('--prefix', default='seed', help='사용자 이름 앞부분 (seed0, seed1, ...)')
+@click.option('--password', default='password123', help='모든 사용자의 비밀번호')
+@click.option('--batch-size', type=click.IntRange(min=1), default=50000, help='executemany 한 번에 넣는 행 수')
+def seed_command(users, todos, distribution, completed_ratio, description_length, days, seed_value, prefix,
+                 password, batch_size) :
+    """사용자 / 할 일을 한 트랜잭션으로 대량 추가"""
+    if shards.enabled :
+        raise click.ClickException('샤딩 모드에서는 사용할 수 없습니다 (DATABASE_SHARDS=0으로 실행)')
+    try :
+        low, _, high = description_length.partition('-')
+        lengths = (int(low), int(high or low))
+        if not 0 <= lengths[0] <= lengths[1] :
+            raise ValueError(description_length)
+    except ValueError :
+        raise click.BadParameter('최소-최대 형식의 0 이상 숫자 (예 : 0-200)', param_hint = '--description-length')
+    if todos and not users :
+        raise click.BadParameter('할 일을 넣으려면 사용자가 1명 이상 필요합니다.', param_hint = '--users')
+
+    result = seed_database(db.engine, bcrypt.generate_password_hash(password), users, todos,
+                           distribution = distribution, completed_ratio = completed_ratio,
+                           description_length = lengths, days = days, seed = seed_value,
+                           prefix = prefix, batch_size = batch_size)
+    click.echo(f"사용자 {result['users']}명, 할 일 {result['todos']}개 추가 : {result['seconds']}초 "
+               f"(인덱스 / 파생 테이블 포함 초당 {result['rows_per_second']}행)")
+    click.echo('단계별 시간(초) : ' + ', '.join(f'{name} {seconds}' for name, seconds in result['phases'].items()))
+
+# 샤드별 사용자 / 할 일 개수 확인 (DATABASE_SHARDS > 0)
+# 사용법 : flask --app app shard-status
+@app.cli.command('shard-status')
+def shard_status_command() :
+    """샤드마다 사용자 수와 할 일 개수 출력"""
+    if not shards.enabled :
+        raise click.ClickException('샤딩 모드가 아닙니다 (DATABASE_SHARDS=0)')
+    for shard, users in shards.user_loads().items() :
+        click.echo(f'shard{shard} : 사용자 {len(users)}명, 할 일 {sum(users.values())}개')
+
+# 사용자 한 명을 다른 샤드로 이동
+# 사용법 : flask --app app shard-move <user_id> <shard>
+# 서버를 멈춘 상태에서 실행하거나, 실행 후 워커를 재시작 (샤드 배정을 프로세스 메모리에 보관하므로)
+@app.cli.command('shard-move')
+@click.argument('user_id', type=int)
+@click.argument('shard', type=int)
+def shard_move_command(user_id, shard) :
+    """사용자의 할 일을 지정한 샤드로 옮김"""
+    if not shards.enabled :
+        raise click.ClickException('샤딩 모드가 아닙니다 (DATABASE_SHARDS=0)')
+    if db.session.get(User, user_id) is None :
+        raise click.ClickException(f'ID {user_id}인 사용자가 없습니다.')
+    try :
+        moved = shards.move_user(user_id, shard)
+    except ValueError as e :
+        raise click.ClickException(str(e))
+    click.echo(f'사용자 {user_id} -> shard{shard} : 할 일 {moved}개 이동')
+
+# 할 일 개수가 비슷해지도록 사용자 재분배
+# 사용법 : flask --app app shard-rebalance [--dry-run]
+@app.cli.command('shard-rebalance')
+@click.option('--dry-run', is_flag=True, help='옮길 계획만 출력')
+def shard_rebalance_command(dry_run) :
+    """가장 많은 샤드에서 가장 적은 샤드로 사용자를 옮겨 할 일 개수를 맞춤"""
+    if not shards.enabled :
+        raise click.ClickException('샤딩 모드가 아닙니다 (DATABASE_SHARDS=0)')
+    moves = shards.plan_rebalance()
+    if not moves :
+        click.echo('이미 균형이 맞습니다.')
+    for user_id, source, target, count in moves :
+        click.echo(f'사용자 {user_id} : shard{source} -> shard{target} (할 일 {count}개)')
+        if not dry_run :
+            shards.move_user(user_id, target)
+
 # Create
 @app.route('/todos', methods=['POST'])  # todos라는 url로 메서드가 post면 해당 함수 실행
 # 인증 필요. 토큰 없으면 에러
@@ -138,7 +691,7 @@ def login():
 def create_todo() :
     try :
         # 로그인한 사용자 ID 가져오기, JWT 토큰에 포함된 ID를 가져온다는 의미
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
 
         # 클라이언트가 보낸 JSON 데이터 파싱
         # JSON 형식 데이터 -> Python의 딕셔너리 형식으로 변환
@@ -152,37 +705,37 @@ def create_todo() :
             }), 400
         # data가 없으면, 400 에러 발생
         # 또한 return 뒤에 그냥 숫자가 붙는 이유는, Flask 특성 상 return 전체를 튜플로 해석해서 괄호가 있는 것처럼 해석
-        title = data.get('title', '').strip()
-        description = data.get('description', '').strip()
-        # data['title'] / data['description']의 값을 가져옮. 없으면 default값은 ''이며, 혹시 모르니 양쪽 빈 칸 제거
-
-        if not title :
-            return jsonify({
-                'error' : 'Title is required',
-                'message' : '할 일 제목을 입력해주세요.'
-            }), 400
-        # 제목이 비어있으면 에러
-
-        if len(title) > 100 :
+        try :
+            title, description = clean_new_todo(data)
+        except TodoInputError as e :
             return jsonify({
-                'error' : 'Title too long',
-                'message' : '제목은 100자 이내로 입력해주세요.'
+                'error' : e.error,
+                'message' : e.message
             }), 400
-        # 제목 길이 100 초과하면 에러
+        # 제목이 비어있거나 100자를 넘으면 에러
 
-        # 새 Todo 객체 생성
-        new_todo = Todo(
-            title = title,
-            description = description,
-            user_id = user_id
-        )
+        if group_writer.enabled :
+            # 그룹 커밋 : 다른 요청의 쓰기와 같이 커밋될 때까지 대기
+            new_todo_data = group_writer.submit(insert_todo_operation(title, description, user_id),
+                                                 db.session.get_bind(Todo.__mapper__))
+        else :
+            # 새 Todo 객체 생성
+            new_todo = Todo(
+                title = title,
+                description = description,
+                user_id = user_id
+            )
 
-        db.session.add(new_todo)  # db.session은 일종의 자료구조 + 관리시스템
-        db.session.commit()
+            db.session.add(new_todo)  # db.session은 일종의 자료구조 + 관리시스템
+            db.session.flush()   # INSERT 실행
+            new_todo_data = new_todo.to_dict()   # 커밋 후에 읽으면 다시 SELECT 하므로 미리 변환
+            db.session.commit()
+        invalidate_todos(user_id)
+        broker.publish(user_id, 'created', new_todo_data)
 
         return jsonify({
             'message' : '할 일이 추가되었습니다.',
-            'data' : new_todo.to_dict()
+            'data' : new_todo_data
         }), 201
         # 완료되면 201 상태 코드. 리소스 생성 성공했다는 의미
 
@@ -194,27 +747,698 @@ def create_todo() :
         }), 500
     # 예상치 못한 에러 발생 시 500 에러 반환
 
+# 목록 조회에서 fields로 고를 수 있는 필드 (Todo.to_dict와 같은 키)
+TODO_FIELDS = ('id', 'title', 'description', 'completed', 'user_id', 'created_at', 'updated_at')
+
+# 목록 조회 정렬 기준. key : sort 파라미터 값 / value : 정렬할 컬럼
+TODO_SORT_COLUMNS = {
+    'id' : Todo.id,
+    'created_at' : Todo.created_at,
+    'updated_at' : Todo.updated_at
+}
+
+def todo_list_filters(args) :
+    """목록 조회 필터 파라미터(completed, created_after, updated_after) -> SQL 조건 리스트"""
+    # 잘못된 값이 있으면 ValueError(파라미터 이름) 발생
+    conditions = []
+
+    if args.get('completed') :
+        try :
+            conditions.append(Todo.completed == parse_bool(args['completed']))
+        except ValueError :
+            raise ValueError('completed')
+
+    if args.get('created_after') :
+        try :
+            conditions.append(Todo.created_at > parse_datetime(args['created_after']))
+        except ValueError :
+            raise ValueError('created_after')
+
+    if args.get('updated_after') :
+        try :
+            conditions.append(Todo.updated_at > parse_datetime(args['updated_after']))
+        except ValueError :
+            raise ValueError('updated_after')
+
+    return conditions
+
 # Read / 전체 할 일 목록
+# 커서 기반 페이지네이션 : ?limit=20&cursor=<이전 응답의 next_cursor>
+# 필터 : ?completed=true&created_after=2025-11-20T00:00:00&updated_after=...
+# 정렬 : ?sort=created_at&order=desc (id, created_at, updated_at / asc, desc)
+# 필드 선택 : ?fields=id,title,completed (지정한 필드만 응답. 긴 description을 받지 않을 때)
+# (정렬 컬럼, id) 순서로 이어서 읽기 때문에 OFFSET 없이 항상 필요한 만큼만 조회
+# 필터와 정렬은 models.py의 복합 인덱스 (user_id, ...)를 타도록 구성
 @app.route('/todos', methods=['GET'])
 @jwt_required()
 def get_todos() :
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
 
-    todos = Todo.query.filter_by(user_id = user_id).all()  # Todo의 전체 불러오기
+    # 목록 버전이 그대로면 행을 읽지 않고 304
+    etag = todo_list_etag(user_id)
+    if request.if_none_match.contains(etag) :
+        return not_modified(etag)
 
-    return jsonify({
+    # 같은 버전 + 같은 파라미터의 목록은 캐시에서 바로 반환
+    # 키에 목록 버전이 들어 있어서 할 일이 바뀌면 자연스럽게 새 키를 사용
+    cache_key = f'todos:{etag}'
+    page = cache.get(cache_key)
+    if page is not None :
+        return with_etag(jsonify({'message' : '할 일 목록 조회 성공', **page}), etag), 200
+
+    try :
+        limit = parse_limit(request.args.get('limit'),
+                            app.config['TODOS_PAGE_DEFAULT_LIMIT'],
+                            app.config['TODOS_PAGE_MAX_LIMIT'])
+    except ValueError :
+        return jsonify({
+            'error' : 'Invalid limit',
+            'message' : f"limit은 1 ~ {app.config['TODOS_PAGE_MAX_LIMIT']} 사이의 숫자만 가능합니다."
+        }), 400
+
+    try :
+        conditions = todo_list_filters(request.args)
+    except ValueError as e :
+        return jsonify({
+            'error' : 'Invalid parameter',
+            'message' : f'{e} 값이 올바르지 않습니다.'
+        }), 400
+
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc')
+    if sort not in TODO_SORT_COLUMNS or order not in ('asc', 'desc') :
+        return jsonify({
+            'error' : 'Invalid sort',
+            'message' : 'sort는 id, created_at, updated_at / order는 asc, desc만 가능합니다.'
+        }), 400
+    sort_column = TODO_SORT_COLUMNS[sort]
+    sort_key = f'{sort}:{order}'   # 커서가 어떤 정렬에서 만들어졌는지 기록
+
+    try :
+        fields = parse_fields(request.args.get('fields'), TODO_FIELDS)
+    except ValueError as e :
+        return jsonify({
+            'error' : 'Invalid fields',
+            'message' : f"fields는 {', '.join(TODO_FIELDS)} 중에서만 고를 수 있습니다. ({e})"
+        }), 400
+
+    # ORM 객체(Todo) 대신 필요한 컬럼 값만 튜플로 조회 (Core select)
+    # -> 객체 생성, identity map 등록, to_dict / isoformat 호출 없이 행을 그대로 JSON으로 변환 (json_provider.py)
+    # 요청한 필드 뒤에 커서에 필요한 id / 정렬 컬럼을 붙이고, 응답에는 요청한 필드만 사용
+    todo_columns = Todo.__table__.c
+    selected = dict.fromkeys(fields + ('id', sort))
+    query = db.select(*[todo_columns[name] for name in selected]).where(Todo.user_id == user_id, *conditions)
+
+    cursor = request.args.get('cursor')
+    if cursor :
+        try :
+            values = decode_cursor(cursor)
+            if values.get('sort', 'id:asc') != sort_key :
+                raise InvalidCursor(cursor)   # 다른 정렬에서 만든 커서는 사용 불가 (sort가 없는 예전 커서는 id:asc)
+            if sort == 'id' :
+                last_key = (values['id'],)
+            elif isinstance(values.get('key'), str) :
+                last_key = (parse_datetime(values['key']), values['id'])
+            else :
+                raise InvalidCursor(cursor)   # 정렬 값은 ISO 8601 문자열만 (숫자 등으로 위조한 커서)
+        except (InvalidCursor, KeyError, TypeError, ValueError) :
+            return jsonify({
+                'error' : 'Invalid cursor',
+                'message' : '잘못된 커서입니다.'
+            }), 400
+
+        # (정렬 컬럼, id)가 마지막으로 본 행보다 뒤에 있는 것만 조회
+        key_columns = (Todo.id,) if sort == 'id' else (sort_column, Todo.id)
+        if order == 'asc' :
+            query = query.where(db.tuple_(*key_columns) > last_key)
+        else :
+            query = query.where(db.tuple_(*key_columns) < last_key)
+
+    if order == 'asc' :
+        query = query.order_by(sort_column.asc(), Todo.id.asc())
+    else :
+        query = query.order_by(sort_column.desc(), Todo.id.desc())
+
+    # 다음 페이지 존재 여부를 알기 위해 limit + 1개 조회
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more :
+        last = rows[-1]._mapping
+        # 정렬 기준(sort_key)은 항상 기록 (id 정렬도 asc / desc를 구분해야 함)
+        if sort == 'id' :
+            next_cursor = encode_cursor({'id' : last['id'], 'sort' : sort_key})
+        else :
+            next_cursor = encode_cursor({
+                'id' : last['id'],
+                'sort' : sort_key,
+                'key' : last[sort].isoformat()
+            })
+
+    page = {
+        'count' : len(rows),
+        'data' : [dict(zip(fields, row)) for row in rows],   # zip은 짧은 쪽(fields)까지만 -> 커서용 컬럼 제외
+        'next_cursor' : next_cursor
+    }
+    cache.set(cache_key, page, tags=(f'user:{user_id}',))
+
+    return with_etag(jsonify({
         'message' : '할 일 목록 조회 성공',
-        'count' : len(todos),
-        'data' : [todo.to_dict() for todo in todos]
+        **page
+    }), etag), 200
+
+# Changes / 변경 내역 동기화
+# ?since=<이전 응답의 next_since> : 그 뒤에 추가 / 수정된 할 일과 삭제된 할 일 id만 반환 (처음에는 since 없이 = 0)
+# todo_changes의 seq(사용자별 변경 번호, 트리거로 기록) 순서로 읽으므로 시계와 상관없이 빠지는 변경이 없음
+# has_more가 true면 next_since로 바로 다시 요청
+@app.route('/todos/changes', methods=['GET'])
+@jwt_required()
+def get_todo_changes() :
+    user_id = current_user_id()
+
+    try :
+        since = int(request.args.get('since') or 0)
+        if since < 0 :
+            raise ValueError(since)
+    except ValueError :
+        return jsonify({
+            'error' : 'Invalid since',
+            'message' : 'since는 0 이상의 숫자만 가능합니다.'
+        }), 400
+
+    try :
+        limit = parse_limit(request.args.get('limit'),
+                            app.config['TODOS_PAGE_DEFAULT_LIMIT'],
+                            app.config['TODOS_PAGE_MAX_LIMIT'])
+    except ValueError :
+        return jsonify({
+            'error' : 'Invalid limit',
+            'message' : f"limit은 1 ~ {app.config['TODOS_PAGE_MAX_LIMIT']} 사이의 숫자만 가능합니다."
+        }), 400
+
+    # (user_id, seq) 인덱스로 since 다음부터 limit + 1개만 읽음. 삭제된 할 일은 Todo가 None
+    rows = db.session.execute(
+        db.select(TodoChange.seq, TodoChange.todo_id, TodoChange.deleted, Todo)
+        .outerjoin(Todo, Todo.id == TodoChange.todo_id)
+        .where(TodoChange.user_id == user_id, TodoChange.seq > since)
+        .order_by(TodoChange.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = []
+    deleted = []
+    for seq, todo_id, is_deleted, todo in rows :
+        if is_deleted or todo is None :
+            deleted.append(todo_id)
+        else :
+            changed.append(todo.to_dict())
+
+    return jsonify({
+        'message' : '변경 내역 조회 성공',
+        'changed' : changed,
+        'deleted' : deleted,
+        'next_since' : rows[-1].seq if rows else since,
+        'has_more' : has_more
+    }), 200
+
+# Stats / 할 일 통계
+# ?days=30 : 전체 / 완료 / 남은 개수 + 최근 days일의 날짜별 생성 / 완료 개수 (오늘 포함, 기록이 없는 날은 0)
+# 개수는 todos 트리거가 유지하는 todo_stats, 날짜별 개수는 todo_daily_stats에서 읽음 (models.py)
+# -> 할 일을 전부 세지 않고 기본키 조회 한 번 + days개 이하의 행만 읽음
+@app.route('/todos/stats', methods=['GET'])
+@jwt_required()
+def get_todo_stats() :
+    user_id = current_user_id()
+
+    max_days = app.config['TODOS_STATS_MAX_DAYS']
+    try :
+        days = parse_limit(request.args.get('days'), app.config['TODOS_STATS_DEFAULT_DAYS'], max_days)
+    except ValueError :
+        return jsonify({
+            'error' : 'Invalid days',
+            'message' : f'days는 1 ~ {max_days} 사이의 숫자만 가능합니다.'
+        }), 400
+
+    # 목록 버전 + 오늘 날짜가 같으면 결과도 같음 (날짜가 바뀌면 기간이 달라짐)
+    today = date.today()
+    etag = f'{todo_list_etag(user_id)}-{today:%Y%m%d}'
+    if request.if_none_match.contains(etag) :
+        return not_modified(etag)
+
+    first_day = today - timedelta(days = days - 1)
+    stats = db.session.get(TodoStats, user_id)
+    rows = db.session.execute(
+        db.select(TodoDailyStats.day, TodoDailyStats.created, TodoDailyStats.completed)
+        .where(TodoDailyStats.user_id == user_id, TodoDailyStats.day >= first_day)
+    ).all()
+    counts = {day : (created, completed) for day, created, completed in rows}
+
+    history = []
+    for offset in range(days) :
+        day = first_day + timedelta(days = offset)
+        created, completed = counts.get(day, (0, 0))
+        history.append({'date' : day.isoformat(), 'created' : created, 'completed' : completed})
+
+    total = stats.total if stats else 0
+    completed = stats.completed if stats else 0
+    return with_etag(jsonify({
+        'message' : '할 일 통계 조회 성공',
+        'total' : total,
+        'completed' : completed,
+        'pending' : total - completed,
+        'days' : history
+    }), etag), 200
+
+# Stream / 할 일 변경 알림 (Server-Sent Events)
+# GET /todos를 주기적으로 다시 불러오는 대신 연결을 열어두면, 할 일이 추가 / 수정 / 삭제될 때마다 이벤트를 받음
+#   event: created / updated (data : 할 일), deleted (data : {"id"}), imported (data : {"count"})
+# 변경이 없는 동안은 DB 쿼리 없이 SSE_HEARTBEAT_SECONDS마다 주석(: keep-alive)만 보내서 연결 유지
+# 큐가 넘칠 만큼 느린 클라이언트(dropped), 토큰이 만료된(expired) / 폐기된(revoked) 연결은 서버가 이벤트를 보낸 뒤 끊음
+# 폐기 여부는 이벤트 / keep-alive를 보낼 때마다 다시 확인 (블룸 필터에 없으면 DB 조회 없음, revocation.py)
+# 다시 연결할 때는 GET /todos/changes로 그 사이의 변경을 먼저 받아야 함 (끊긴 동안의 이벤트는 다시 보내지 않음)
+# 열린 스트림은 요청 스레드 하나를 차지하므로 동시 스트림 수는 SSE_MAX_STREAMS로 제한 (넘으면 503, broker.py)
+@app.route('/todos/stream', methods=['GET'])
+@jwt_required()
+def stream_todos() :
+    user_id = current_user_id()
+    claims = get_jwt()
+    expires_at = claims['exp']
+    heartbeat = app.config['SSE_HEARTBEAT_SECONDS']
+    retry = app.config['SSE_RETRY_MS']
+
+    # 응답을 시작하기 전에 구독해야 그 사이의 변경도 받음
+    try :
+        subscription = broker.subscribe(user_id)
+    except StreamLimitReached :
+        return jsonify({
+            'error' : 'Too many streams',
+            'message' : '열린 알림 연결이 너무 많습니다. 잠시 후 다시 시도해주세요.'
+        }), 503, {'Retry-After' : str(max(1, retry // 1000))}
+
+    def token_revoked() :
+        # 응답 생성기는 요청 컨텍스트 밖에서 실행되므로 확인할 때만 앱 컨텍스트(DB 세션)를 잠깐 염
+        with app.app_context() :
+            return revocation.is_revoked(claims['jti'])
+
+    def generate() :
+        try :
+            yield f'retry: {retry}\n\n'   # 끊기면 retry(ms) 후 다시 연결하라는 의미
+            while True :
+                if subscription.dropped :
+                    # 이미 빠진 이벤트가 있으므로 남은 이벤트도 버리고 /todos/changes로 다시 맞추게 함
+                    yield 'event: dropped\ndata: {}\n\n'
+                    return
+                remaining = expires_at - time.time()
+                if remaining <= 0 :
+                    yield 'event: expired\ndata: {}\n\n'
+                    return
+                if token_revoked() :
+                    yield 'event: revoked\ndata: {}\n\n'
+                    return
+                message = subscription.get(min(heartbeat, remaining))
+                yield message if message is not None else ': keep-alive\n\n'
+        finally :
+            # 클라이언트가 연결을 끊으면 다음 yield에서 GeneratorExit -> 여기서 구독 해제
+            broker.unsubscribe(subscription)
+
+    # 요청 컨텍스트(DB 세션)는 유지하지 않음 -> 열려 있는 연결이 DB 연결을 잡고 있지 않음
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control' : 'no-cache',
+        'X-Accel-Buffering' : 'no'   # nginx 등 프록시가 모아서 보내지 않도록
+    })
+
+# Search / 할 일 검색 (FTS5 전문 검색)
+# ?q=장보기 우유 : 제목 / 설명에 모든 단어가 들어 있는 할 일. 짧은(4글자 이하) 마지막 단어와 *로 끝나는 단어는 접두어 검색
+# 제목에서 모두 찾은 할 일 먼저, 그 안에서는 최신순. (순위, id)를 커서에 담아 다음 페이지를 이어서 조회 (?limit=20&cursor=...)
+# 검색 색인은 todos 트리거로 갱신되므로 할 일을 추가 / 수정하면 바로 검색됨 (search.py)
+@app.route('/todos/search', methods=['GET'])
+@jwt_required()
+def search_todos() :
+    user_id = current_user_id()
+
+    try :
+        match = search.build_match(request.args.get('q', ''))
+    except ValueError :
+        return jsonify({
+            'error' : 'Query is required',
+            'message' : '검색어(q)를 입력해주세요.'
+        }), 400
+
+    try :
+        limit = parse_limit(request.args.get('limit'),
+                            app.config['TODOS_PAGE_DEFAULT_LIMIT'],
+                            app.config['TODOS_PAGE_MAX_LIMIT'])
+    except ValueError :
+        return jsonify({
+            'error' : 'Invalid limit',
+            'message' : f"limit은 1 ~ {app.config['TODOS_PAGE_MAX_LIMIT']} 사이의 숫자만 가능합니다."
+        }), 400
+
+    # 목록 버전 + 검색 파라미터가 같으면 결과도 같으므로 목록 ETag를 그대로 사용
+    etag = todo_list_etag(user_id)
+    if request.if_none_match.contains(etag) :
+        return not_modified(etag)
+
+    hits = search.search_hits(match, user_id)
+    statement = (
+        db.select(Todo, hits.c.tier)
+        .join(hits, hits.c.id == Todo.id)
+        .where(Todo.user_id == user_id)
+    )
+
+    cursor = request.args.get('cursor')
+    if cursor :
+        try :
+            values = decode_cursor(cursor)
+            last_key = (int(values['tier']), -values['id'])
+        except (InvalidCursor, KeyError, TypeError, ValueError) :
+            return jsonify({
+                'error' : 'Invalid cursor',
+                'message' : '잘못된 커서입니다.'
+            }), 400
+        # 순위는 오름차순, id는 내림차순이라 id에 -를 붙여서 비교
+        statement = statement.where(db.tuple_(hits.c.tier, -Todo.id) > last_key)
+
+    # 다음 페이지 존재 여부를 알기 위해 limit + 1개 조회
+    rows = db.session.execute(
+        statement.order_by(hits.c.tier, Todo.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more :
+        last_todo, last_tier = rows[-1]
+        next_cursor = encode_cursor({'id' : last_todo.id, 'tier' : last_tier})
+
+    return with_etag(jsonify({
+        'message' : '할 일 검색 성공',
+        'count' : len(rows),
+        'data' : [todo.to_dict() for todo, _ in rows],
+        'next_cursor' : next_cursor
+    }), etag), 200
+
+# Export / 전체 할 일 내보내기 (NDJSON 스트리밍)
+# NDJSON : 한 줄에 JSON 객체 하나씩. 받는 쪽도 한 줄씩 처리 가능
+# 목록을 한 번에 만들지 않고 DB에서 TODOS_EXPORT_CHUNK_SIZE개씩 읽으면서 바로 전송
+# -> 할 일 개수와 상관없이 메모리 사용량 일정 + 첫 줄이 쿼리가 끝나기 전에 도착
+@app.route('/todos/export', methods=['GET'])
+@jwt_required()
+def export_todos() :
+    user_id = current_user_id()
+
+    try :
+        conditions = todo_list_filters(request.args)
+    except ValueError as e :
+        return jsonify({
+            'error' : 'Invalid parameter',
+            'message' : f'{e} 값이 올바르지 않습니다.'
+        }), 400
+
+    chunk_size = app.config['TODOS_EXPORT_CHUNK_SIZE']
+    statement = (
+        db.select(Todo)
+        .where(Todo.user_id == user_id, *conditions)
+        .order_by(Todo.id.asc())
+        .execution_options(yield_per=chunk_size)
+        # yield_per : 결과를 chunk_size개씩 나눠서 가져옴 (서버 사이드 커서처럼 동작)
+    )
+
+    def generate() :
+        for todo in db.session.execute(statement).scalars() :
+            yield json.dumps(todo.to_dict(), ensure_ascii=False) + '\n'
+
+    # stream_with_context : 응답을 보내는 동안 요청 컨텍스트(DB 세션 포함) 유지
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson'), 200
+
+# Import / 할 일 대량 가져오기
+# 본문 : NDJSON (한 줄에 하나) 또는 JSON 배열
+# 본문을 조금씩 읽으면서 검증하고, TODOS_IMPORT_BATCH_SIZE개씩 모아서 한 번에 INSERT (executemany)
+# -> 요청 수천 번 대신 요청 한 번 + 트랜잭션 몇 번으로 끝남
+# 검증에 실패한 항목은 건너뛰고 몇 번째 줄인지 errors에 담아 반환
+@app.route('/todos/import', methods=['POST'])
+@jwt_required()
+def import_todos() :
+    user_id = current_user_id()
+    batch_size = app.config['TODOS_IMPORT_BATCH_SIZE']
+    max_errors = app.config['TODOS_IMPORT_MAX_ERRORS']
+
+    imported = 0
+    rejected = 0
+    errors = []   # 너무 커지지 않도록 max_errors개까지만 저장
+    batch = []
+    received = False
+
+    def reject(line, error, message) :
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < max_errors :
+            errors.append({'line' : line, 'error' : error, 'message' : message})
+
+    def flush() :
+        nonlocal imported, batch
+        db.session.execute(db.insert(Todo), batch)   # 리스트를 넘기면 executemany로 실행
+        db.session.commit()
+        invalidate_todos(user_id)
+        # 할 일마다 보내지 않고 묶음마다 한 번. 클라이언트는 /todos/changes로 받아감
+        broker.publish(user_id, 'imported', {'count' : len(batch)})
+        imported += len(batch)
+        batch = []
+
+    try :
+        for line, item, parse_error in iter_records(request.stream) :
+            received = True
+
+            if parse_error :
+                reject(line, parse_error, 'JSON 형식이 올바르지 않습니다.')
+                continue
+            if not isinstance(item, dict) :
+                reject(line, 'Invalid item', '각 항목은 JSON 객체여야 합니다.')
+                continue
+
+            try :
+                title, description = clean_new_todo(item)
+                completed = item.get('completed', False)
+                if not isinstance(completed, bool) :
+                    raise TodoInputError('Invalid data type', 'completed는 true 혹은 false만 가능합니다.')
+            except TodoInputError as e :
+                reject(line, e.error, e.message)
+                continue
+            except AttributeError :
+                # title, description이 문자열이 아니면 strip()에서 발생
+                reject(line, 'Invalid data type', 'title, description은 문자열만 가능합니다.')
+                continue
+
+            batch.append({
+                'title' : title,
+                'description' : description,
+                'completed' : completed,
+                'user_id' : user_id
+            })
+            if len(batch) >= batch_size :
+                flush()
+
+        if batch :
+            flush()
+
+    except Exception as e :
+        db.session.rollback()
+        return jsonify({
+            'error' : 'Internal server error',
+            'message' : '서버 오류가 발생했습니다.',
+            'imported' : imported   # 이미 커밋된 개수
+        }), 500
+
+    if not received :
+        return jsonify({
+            'error' : 'No data provided',
+            'message' : '데이터를 입력해주세요.'
+        }), 400
+
+    return jsonify({
+        'message' : '할 일 가져오기 완료',
+        'imported' : imported,
+        'rejected' : rejected,
+        'errors' : errors
     }), 200
 
+# Batch / 여러 작업(create, update, delete) 한 번에 처리
+# 본문 : {"operations" : [{"op" : "create", "title" : ...}, {"op" : "update", "id" : 1, "completed" : true}, {"op" : "delete", "id" : 2}]}
+# 요청마다 조회 -> 권한 확인 -> 커밋을 반복하지 않고, 한 트랜잭션 안에서 집합 단위 SQL로 처리
+#   - create : INSERT 한 번 (executemany)
+#   - update : 바꿀 값이 같은 것끼리 묶어서 UPDATE ... WHERE id IN (...) AND user_id = ?
+#   - delete : DELETE ... WHERE id IN (...) AND user_id = ?
+# 잘못된 작업이 하나라도 있으면 아무것도 적용하지 않고 400
+# 없는 할 일(또는 다른 사용자의 할 일)에 대한 update / delete는 해당 작업만 404로 결과에 표시
+@app.route('/todos/batch', methods=['POST'])
+@jwt_required()
+def batch_todos() :
+    try :
+        user_id = current_user_id()
+        data = request.get_json()
+
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations :
+            return jsonify({
+                'error' : 'No data provided',
+                'message' : 'operations 목록을 입력해주세요.'
+            }), 400
+
+        max_operations = app.config['TODOS_BATCH_MAX_OPERATIONS']
+        if len(operations) > max_operations :
+            return jsonify({
+                'error' : 'Too many operations',
+                'message' : f'한 번에 {max_operations}개까지만 처리할 수 있습니다.'
+            }), 400
+
+        # 1. 전부 검증 (아직 DB 작업 없음)
+        creates = []        # (index, 새 행)
+        update_groups = {}  # 바꿀 값 -> [(index, id)]
+        deletes = []        # (index, id)
+        seen_ids = set()
+        invalid = []
+
+        for index, operation in enumerate(operations) :
+            try :
+                if not isinstance(operation, dict) :
+                    raise TodoInputError('Invalid operation', '각 작업은 JSON 객체여야 합니다.')
+
+                kind = operation.get('op')
+                if kind == 'create' :
+                    title, description = clean_new_todo(operation)
+                    creates.append((index, {'title' : title, 'description' : description, 'user_id' : user_id}))
+                    continue
+
+                if kind not in ('update', 'delete') :
+                    raise TodoInputError('Invalid operation', 'op는 create, update, delete만 가능합니다.')
+
+                todo_id = operation.get('id')
+                if not isinstance(todo_id, int) or isinstance(todo_id, bool) :
+                    raise TodoInputError('Invalid id', 'id는 숫자만 가능합니다.')
+                if todo_id in seen_ids :
+                    raise TodoInputError('Duplicate id', '같은 id는 한 요청에 한 번만 포함할 수 있습니다.')
+                seen_ids.add(todo_id)
+
+                if kind == 'update' :
+                    changes = clean_todo_changes(operation)
+                    if not changes :
+                        raise TodoInputError('No data', '수정할 데이터를 입력해주세요.')
+                    key = tuple(sorted(changes.items()))
+                    update_groups.setdefault(key, []).append((index, todo_id))
+                else :
+                    deletes.append((index, todo_id))
+
+            except TodoInputError as e :
+                invalid.append({'index' : index, 'error' : e.error, 'message' : e.message})
+            except AttributeError :
+                invalid.append({'index' : index, 'error' : 'Invalid data type',
+                                'message' : 'title, description은 문자열만 가능합니다.'})
+
+        if invalid :
+            return jsonify({
+                'error' : 'Invalid operations',
+                'message' : '잘못된 작업이 있어 아무것도 적용하지 않았습니다.',
+                'errors' : invalid
+            }), 400
+
+        # 2. 한 트랜잭션 안에서 집합 단위로 실행
+        results = [None] * len(operations)
+
+        if creates :
+            created = db.session.scalars(
+                db.insert(Todo).returning(Todo, sort_by_parameter_order=True),
+                [row for _, row in creates]
+            ).all()
+            for (index, _), todo in zip(creates, created) :
+                results[index] = {'index' : index, 'op' : 'create', 'status' : 201, 'data' : todo.to_dict()}
+
+        for key, targets in update_groups.items() :
+            updated = db.session.scalars(
+                db.update(Todo)
+                .where(Todo.id.in_([todo_id for _, todo_id in targets]), Todo.user_id == user_id)
+                .values(**dict(key))
+                .returning(Todo),
+                execution_options={'synchronize_session' : False}
+            ).all()
+            updated = {todo.id : todo.to_dict() for todo in updated}
+            for index, todo_id in targets :
+                if todo_id in updated :
+                    results[index] = {'index' : index, 'op' : 'update', 'id' : todo_id, 'status' : 200,
+                                      'data' : updated[todo_id]}
+
+        if deletes :
+            deleted = set(db.session.scalars(
+                db.delete(Todo)
+                .where(Todo.id.in_([todo_id for _, todo_id in deletes]), Todo.user_id == user_id)
+                .returning(Todo.id),
+                execution_options={'synchronize_session' : False}
+            ).all())
+            for index, todo_id in deletes :
+                if todo_id in deleted :
+                    results[index] = {'index' : index, 'op' : 'delete', 'id' : todo_id, 'status' : 200}
+
+        db.session.commit()   # 커밋(fsync)은 요청 전체에서 한 번
+        invalidate_todos(user_id)
+        for result in results :
+            if result is not None :
+                event = {'create' : 'created', 'update' : 'updated', 'delete' : 'deleted'}[result['op']]
+                broker.publish(user_id, event, result.get('data') or {'id' : result['id']})
+
+        # 결과가 비어있는 update / delete는 대상이 없었던 것
+        for index, operation in enumerate(operations) :
+            if results[index] is None :
+                results[index] = {
+                    'index' : index,
+                    'op' : operation['op'],
+                    'id' : operation['id'],
+                    'status' : 404,
+                    'error' : 'Not Found',
+                    'message' : f"ID {operation['id']}인 할 일을 찾을 수 없습니다."
+                }
+
+        return jsonify({
+            'message' : '일괄 처리 완료',
+            'results' : results
+        }), 200
+
+    except Exception as e :
+        db.session.rollback()
+        return jsonify({
+            'error' : 'Internal server error',
+            'message' : '서버 오류가 발생했습니다.'
+        }), 500
+
 # Read / 특정 할 일 목록
 @app.route('/todos/<int:todo_id>', methods = ['GET'])
 @jwt_required()
 def get_todo(todo_id) :
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
+
+    # 캐시에 있으면 목록 버전 조회(기본키 조회 한 번)만으로 ETag 비교 + 응답
+    # 키에 사용자가 들어 있어서 다른 사용자의 할 일은 항상 miss -> 아래에서 403
+    cache_key = todo_cache_key(user_id, todo_list_version(user_id), todo_id)
+    cached = cache.get(cache_key)
+    if cached is not None :
+        if request.if_none_match.contains(cached['etag']) :
+            return not_modified(cached['etag'])
+        return with_etag(jsonify({
+            'message' : '할 일 조회 성공',
+            'data' : cached['data']
+        }), cached['etag']), 200
 
-    todo = Todo.query.get(todo_id)
+    # If-None-Match가 있으면 수정 시각만 먼저 조회해서 바뀌지 않았으면 304
+    if request.if_none_match :
+        row = db.session.execute(
+            db.select(Todo.user_id, Todo.updated_at).where(Todo.id == todo_id)
+        ).first()
+        if row and row.user_id == user_id and request.if_none_match.contains(todo_etag(todo_id, row.updated_at)) :
+            return not_modified(todo_etag(todo_id, row.updated_at))
+
+    todo = db.session.get(Todo, todo_id)
 
     if not todo :
         return jsonify({
@@ -229,32 +1453,39 @@ def get_todo(todo_id) :
             'message' : '다른 사용자의 할 일입니다.'
         }), 403
 
-    return jsonify({
-        'message' : '할 일 조회 성공',
+    cached = {
+        'etag' : todo_etag(todo.id, todo.updated_at),
         'data' : todo.to_dict()
+    }
+    cache.set(cache_key, cached, tags=(f'user:{user_id}',))
+
+    return with_etag(jsonify({
+        'message' : '할 일 조회 성공',
+        'data' : cached['data']
+    }), cached['etag']), 200
+
+# 캐시 통계 (hit / miss 개수, 저장된 개수 등)
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats() :
+    return jsonify({
+        'message' : '캐시 통계 조회 성공',
+        'data' : cache.stats()
     }), 200
 
+# Prometheus 수집용 요청 지표 (텍스트 형식). METRICS_ENABLED = False면 404
+# 라우트별 응답 시간 / 단계별 시간(auth, sql, serialize, bcrypt) / 쿼리 수 히스토그램, 상태 코드별 요청 수
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint() :
+    if not metrics.enabled :
+        return jsonify({'error' : 'Not Found'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Update
 @app.route('/todos/<int:todo_id>', methods=['PUT'])
 @jwt_required()
 def update_todo(todo_id) :
     try :
-        user_id = get_jwt_identity()
-
-        todo = Todo.query.get(todo_id)
-
-        if not todo :
-            return jsonify({
-                'error' : 'No data',
-                'message' : f'ID {todo_id}인 할 일을 찾을 수 없습니다.'
-            }), 404
-
-        # 자기의 할 일인지 확인
-        if todo.user_id != user_id :
-            return jsonify({
-                'error': 'Forbidden',
-                'message': '다른 사용자의 할 일입니다.'
-            }), 403
+        user_id = current_user_id()
 
         data = request.get_json()
 
@@ -264,39 +1495,54 @@ def update_todo(todo_id) :
                 'message' : '수정할 데이터를 입력해주세요.'
             }), 400
 
-        # 제목 수정
-        if 'title' in data :
-            title = data['title'].strip()
-            if not title :
-                return jsonify({
-                    'error' : 'Title is required',
-                    'message' : '제목은 비울 수 없습니다.'
-                }), 400
-
-            if len(title) > 100 :
-                return jsonify({
-                    'error' : 'Title too long',
-                    'message' : '제목은 100글자 이내로 입력해주세요.'
-                }), 400
-            todo.title = title
-
-        if 'description' in data :
-            todo.description = data['description'].strip()
-
-        if 'completed' in data :
-            if not isinstance(data['completed'], bool) :
-            # isinstance : input되는 값이 뒤의 형식이 아니면
-                return jsonify({
-                    'error' : 'Invalid data type',
-                    'message' : 'completed는 true 혹은 false만 가능합니다.'
-                }), 400
-            todo.completed = data['completed']
+        try :
+            changes = clean_todo_changes(data)
+        except TodoInputError as e :
+            return jsonify({
+                'error' : e.error,
+                'message' : e.message
+            }), 400
+
+        if changes and group_writer.enabled :
+            # 그룹 커밋 : 다른 요청의 쓰기와 같이 커밋될 때까지 대기
+            updated_todo = group_writer.submit(update_todo_operation(todo_id, user_id, changes),
+                                                 db.session.get_bind(Todo.__mapper__))
+            if not updated_todo :
+                return todo_missing_response(todo_id, 'No data')
+            invalidate_todos(user_id)
+            broker.publish(user_id, 'updated', updated_todo)
+            return jsonify({
+                'message' : '할 일이 수정되었습니다.',
+                'data' : updated_todo
+            }), 200
+
+        # 조회 -> 권한 확인 -> 수정을 따로 하지 않고 UPDATE 한 번으로 처리
+        # WHERE에 user_id를 같이 걸어서 자기 할 일일 때만 수정, RETURNING으로 수정된 행을 바로 받음
+        if changes :
+            statement = (
+                db.update(Todo)
+                .where(Todo.id == todo_id, Todo.user_id == user_id)
+                .values(**changes)
+                .returning(Todo)
+            )
+        else :
+            # 바꿀 값이 없으면 현재 상태만 반환
+            statement = db.select(Todo).where(Todo.id == todo_id, Todo.user_id == user_id)
+        todo = db.session.execute(statement, execution_options={'synchronize_session' : False}).scalar_one_or_none()
+
+        if not todo :
+            db.session.rollback()
+            return todo_missing_response(todo_id, 'No data')
 
+        updated_todo = todo.to_dict()   # 커밋 후에 읽으면 다시 SELECT 하므로 미리 변환
         db.session.commit()
+        invalidate_todos(user_id)
+        if changes :
+            broker.publish(user_id, 'updated', updated_todo)
 
         return jsonify({
             'message' : '할 일이 수정되었습니다.',
-            'data' : todo.to_dict()
+            'data' : updated_todo
         }), 200
 
     except Exception as e :
@@ -312,26 +1558,24 @@ def update_todo(todo_id) :
 @jwt_required()
 def delete_todo(todo_id) :
     try :
-        user_id = get_jwt_identity()
+        user_id = current_user_id()
 
-        todo = Todo.query.get(todo_id)
+        # DELETE 한 번으로 권한 확인 + 삭제, RETURNING으로 삭제된 행을 바로 받음
+        todo = db.session.execute(
+            db.delete(Todo)
+            .where(Todo.id == todo_id, Todo.user_id == user_id)
+            .returning(Todo),
+            execution_options={'synchronize_session' : False}
+        ).scalar_one_or_none()
 
         if not todo :
-            return jsonify({
-                'error' : 'Not Found',
-                'message' : f'ID {todo_id}인 할 일을 찾을 수 없습니다.'
-            }), 404
-
-        # 자기의 할 일인지 확인
-        if todo.user_id != user_id :
-            return jsonify({
-                'error' : 'Forbidden',
-                'message' : '다른 사용자의 할 일입니다.'
-            }), 403
+            db.session.rollback()
+            return todo_missing_response(todo_id, 'Not Found')
 
         deleted_todo = todo.to_dict()
-        db.session.delete(todo)
         db.session.commit()
+        invalidate_todos(user_id)
+        broker.publish(user_id, 'deleted', {'id' : todo_id})
 
         return jsonify({
             'message' : '할 일이 삭제되었습니다.',
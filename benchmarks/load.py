@@ -0,0 +1,411 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# 엔드포인트 부하 테스트 (지연 시간 p50 / p95 / p99 + 초당 요청 수를 JSON으로)
+# 임시 DB에 사용자 --users명, 할 일 --todos개(1천 ~ 100만, seeding.py로 한꺼번에)를 넣고 워크로드마다 --concurrency개 스레드로 --duration초 동안 요청
+#   - login : 로그인 폭주. POST /login (bcrypt 확인 + 토큰 발급)
+#   - read  : 읽기 위주 폴링. ETag로 목록 확인(대부분 304), 변경 내역(since), 단건 / 페이지 / 통계 / 검색
+#   - write : 쓰기 몰림. 사용자 한 명이 할 일을 --burst개 연달아 추가한 뒤 일부 수정 / 삭제
+#   - mixed : 위 요청을 실제 사용 비율과 비슷하게 섞음
+# 대상
+#   - wsgi   : 같은 프로세스에서 app.test_client()로 호출 (네트워크 / 서버 비용 없이 앱 코드만)
+#   - server : 서버 프로세스를 직접 띄워서 HTTP(keep-alive)로 호출. 기본은 flask run, --server-cmd로 gunicorn 등 지정
+# --seed가 같으면 같은 데이터 / 같은 요청 순서 (스레드 스케줄링 차이만 남음) -> 커밋끼리 결과 비교 가능
+# 실행 : python benchmarks/load.py --todos 100000 --users 1000 --concurrency 8 --duration 10 --output before.json
+# 설정 비교 : --env GROUP_COMMIT_ENABLED=true --env CACHE_BACKEND=null
+
+PASSWORD = 'benchpassword'
+
+READ_MIX = {'list_poll': 40, 'changes': 20, 'get': 20, 'list_page': 10, 'stats': 5, 'search': 5}
+MIXED_MIX = {'list_poll': 30, 'changes': 15, 'get': 15, 'list_page': 8, 'stats': 4, 'search': 4,
+             'create': 12, 'update': 8, 'delete': 3, 'login': 1}
+
+
+def parse_args() :
+    parser = argparse.ArgumentParser(description='엔드포인트 부하 테스트')
+    parser.add_argument('--workloads', default='login,read,write,mixed', help='실행할 워크로드 (쉼표로 구분, 순서대로 실행)')
+    parser.add_argument('--target', choices=('wsgi', 'server'), default='wsgi', help='호출 방식')
+    parser.add_argument('--server-cmd', default=None,
+                        help='server 대상에서 실행할 명령 ({port} 자리에 포트). 기본 : flask run --with-threads')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시에 요청하는 클라이언트(스레드) 수')
+    parser.add_argument('--duration', type=float, default=10, help='워크로드마다 측정 시간(초)')
+    parser.add_argument('--warmup', type=float, default=1, help='측정 전에 버리는 시간(초)')
+    parser.add_argument('--users', type=int, default=100, help='사용자 수')
+    parser.add_argument('--todos', type=int, default=10000, help='할 일 개수 (--distribution에 따라 사용자에게 나눔)')
+    parser.add_argument('--description', type=int, default=100, help='설명 길이')
+    parser.add_argument('--distribution', default='uniform', help='사용자별 할 일 개수 분포 (fixed / uniform / zipf, seeding.py)')
+    parser.add_argument('--burst', type=int, default=20, help='write 워크로드에서 연달아 추가하는 할 일 수')
+    parser.add_argument('--bcrypt-rounds', type=int, default=int(os.getenv('BCRYPT_LOG_ROUNDS', 12)),
+                        help='사용자 비밀번호 해싱 비용 (서버 설정도 같은 값으로)')
+    parser.add_argument('--seed', type=int, default=1, help='데이터 / 요청 순서 난수 시드')
+    parser.add_argument('--db', default=None, help='DB 파일 경로. 이미 데이터가 있으면 넣지 않고 재사용 (쓰기 워크로드가 내용을 바꿈)')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='앱 설정 환경 변수 (여러 번 가능)')
+    parser.add_argument('--output', default=None, help='결과 JSON 파일 (기본 표준 출력)')
+    return parser.parse_args()
+
+
+def percentile(sorted_values, p) :
+    """nearest-rank 백분위수"""
+    if not sorted_values :
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies, statuses, errors, seconds) :
+    """지연 시간 목록(초) -> 요청 수 / 초당 요청 수 / 백분위수(ms)"""
+    latencies = sorted(latencies)
+    milliseconds = lambda value : None if value is None else round(value * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / seconds, 1),
+        'latency_ms': {
+            'p50': milliseconds(percentile(latencies, 50)),
+            'p95': milliseconds(percentile(latencies, 95)),
+            'p99': milliseconds(percentile(latencies, 99)),
+            'mean': milliseconds(sum(latencies) / len(latencies) if latencies else None),
+            'max': milliseconds(latencies[-1] if latencies else None),
+        },
+        'status': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+class WSGIClient :
+    """같은 프로세스의 Flask 테스트 클라이언트"""
+
+    def __init__(self, app) :
+        self.client = app.test_client()
+
+    def request(self, method, path, headers, body) :
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.headers.get('ETag'), response.get_data()
+
+
+class HTTPClient :
+    """스레드마다 keep-alive 연결 하나. 끊기면 다시 연결"""
+
+    def __init__(self, port) :
+        self.port = port
+        self.connection = None
+
+    def request(self, method, path, headers, body) :
+        headers = dict(headers)
+        data = None
+        if body is not None :
+            data = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2) :
+            if self.connection is None :
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try :
+                self.connection.request(method, path, body=data, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.getheader('ETag'), response.read()
+            except (http.client.HTTPException, OSError) :
+                self.connection.close()
+                self.connection = None
+                if attempt :
+                    raise
+
+
+class Worker :
+    """클라이언트 하나. 요청마다 (작업 이름, 지연 시간, 상태 코드) 기록"""
+
+    def __init__(self, bench, client, number) :
+        self.bench = bench
+        self.client = client
+        self.rng = random.Random(bench.args.seed * 1000 + number)
+        self.etags = {}     # user_id -> 마지막 목록 ETag
+        self.since = {}     # user_id -> 마지막 변경 내역 위치
+        self.created = {}   # user_id -> 이 클라이언트가 추가한 할 일 id (수정 / 삭제 대상)
+        self.samples = []   # (작업, 초, 상태)
+        self.errors = Counter()
+        self.recording = False
+
+    def call(self, operation, method, path, user_id=None, body=None, headers=None, expected=(200,)) :
+        headers = dict(headers or {})
+        if user_id is not None :
+            headers['Authorization'] = f'Bearer {self.bench.tokens[user_id]}'
+        started = time.perf_counter()
+        try :
+            status, etag, data = self.client.request(method, path, headers, body)
+        except Exception :
+            status, etag, data = 0, None, b''   # 연결 실패
+        elapsed = time.perf_counter() - started
+        if self.recording :
+            self.samples.append((operation, elapsed, status))
+            if status not in expected :
+                self.errors[operation] += 1
+        return status, etag, data
+
+    def user(self) :
+        return self.rng.randrange(len(self.bench.user_ids))
+
+    def todo_id(self, index) :
+        """사용자의 할 일 id 하나 (넣어 둔 할 일 범위 또는 이 클라이언트가 추가한 것)"""
+        created = self.created.get(index)
+        if created and self.rng.random() < 0.5 :
+            return self.rng.choice(created)
+        low, high = self.bench.todo_ranges.get(self.bench.user_ids[index], (None, None))
+        if low is None :
+            return self.rng.choice(created) if created else None
+        return self.rng.randint(low, high)
+
+    # 작업 하나 = 요청 하나
+    def login(self, index) :
+        self.call('login', 'POST', '/login',
+                  body={'username': self.bench.usernames[index], 'password': PASSWORD})
+
+    def list_poll(self, index) :
+        user_id = self.bench.user_ids[index]
+        headers = {'If-None-Match': self.etags[index]} if index in self.etags else {}
+        status, etag, _ = self.call('list_poll', 'GET', '/todos?limit=50', user_id,
+                                    headers=headers, expected=(200, 304))
+        if etag :
+            self.etags[index] = etag
+
+    def list_page(self, index) :
+        completed = self.rng.choice(('true', 'false'))
+        self.call('list_page', 'GET', f'/todos?limit=50&completed={completed}&fields=id,title,completed',
+                  self.bench.user_ids[index])
+
+    def changes(self, index) :
+        status, _, data = self.call('changes', 'GET', f'/todos/changes?since={self.since.get(index, 0)}&limit=100',
+                                    self.bench.user_ids[index])
+        if status == 200 :
+            self.since[index] = json.loads(data)['next_since']
+
+    def get(self, index) :
+        todo_id = self.todo_id(index)
+        if todo_id is not None :
+            # 다른 클라이언트가 같은 사용자의 할 일을 지웠을 수 있으므로 404도 정상
+            self.call('get', 'GET', f'/todos/{todo_id}', self.bench.user_ids[index], expected=(200, 404))
+
+    def stats(self, index) :
+        self.call('stats', 'GET', '/todos/stats?days=30', self.bench.user_ids[index])
+
+    def search(self, index) :
+        self.call('search', 'GET', f'/todos/search?q={self.rng.choice(self.bench.words)}&limit=20', self.bench.user_ids[index])
+
+    def create(self, index) :
+        body = {'title': f'{self.rng.choice(self.bench.words)} {self.rng.choice(self.bench.words)}',
+                'description': self.bench.description}
+        status, _, data = self.call('create', 'POST', '/todos', self.bench.user_ids[index], body=body, expected=(201,))
+        if status == 201 :
+            self.created.setdefault(index, []).append(json.loads(data)['data']['id'])
+
+    def update(self, index) :
+        todo_id = self.todo_id(index)
+        if todo_id is not None :
+            self.call('update', 'PUT', f'/todos/{todo_id}', self.bench.user_ids[index],
+                      body={'completed': self.rng.random() < 0.5}, expected=(200, 404))
+
+    def delete(self, index) :
+        created = self.created.get(index)
+        if created :
+            todo_id = created.pop(self.rng.randrange(len(created)))
+            self.call('delete', 'DELETE', f'/todos/{todo_id}', self.bench.user_ids[index], expected=(200, 404))
+
+    # 워크로드 한 단계
+    def step(self, workload) :
+        if workload == 'login' :
+            self.login(self.user())
+        elif workload == 'write' :
+            index = self.user()
+            for _ in range(self.bench.args.burst) :
+                self.create(index)
+            for _ in range(self.bench.args.burst // 2) :
+                self.update(index)
+            for _ in range(self.bench.args.burst // 4) :
+                self.delete(index)
+        else :
+            mix = READ_MIX if workload == 'read' else MIXED_MIX
+            operation = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+            getattr(self, operation)(self.user())
+
+
+class Bench :
+    def __init__(self, args, app) :
+        self.args = args
+        self.app = app
+        self.description = 'x' * args.description
+        self.user_ids = []
+        self.usernames = []
+        self.words = ()
+        self.todo_ranges = {}
+        self.tokens = {}
+
+    def seed(self) :
+        """사용자 / 할 일을 seeding.py로 한꺼번에 넣음 (flask seed와 같은 방식). 이미 있으면 재사용"""
+        from hashing import _hash_password
+        from models import db, Todo, User
+        from seeding import seed_database, DISTRIBUTIONS, WORDS
+
+        args = self.args
+        if args.distribution not in DISTRIBUTIONS :
+            raise SystemExit(f'알 수 없는 분포 : {args.distribution} ({", ".join(DISTRIBUTIONS)})')
+        self.words = WORDS   # 검색 / 추가 요청에 쓰는 단어 (넣은 할 일과 같은 단어)
+        seeded = None
+        with self.app.app_context() :
+            if db.session.scalar(db.select(db.func.count()).select_from(User)) == 0 :
+                seeded = seed_database(db.engine, _hash_password(PASSWORD, args.bcrypt_rounds), args.users, args.todos,
+                                       distribution=args.distribution,
+                                       description_length=(args.description, args.description),
+                                       seed=args.seed, prefix='bench')
+
+            users = db.session.execute(db.select(User.id, User.username).order_by(User.id)).all()
+            self.user_ids = [user_id for user_id, _ in users]
+            self.usernames = [username for _, username in users]
+            self.todo_ranges = {
+                user_id: (low, high) for user_id, low, high in db.session.execute(
+                    db.select(Todo.user_id, db.func.min(Todo.id), db.func.max(Todo.id)).group_by(Todo.user_id))
+            }
+            todos = db.session.scalar(db.select(db.func.count()).select_from(Todo))
+            self.tokens = self.issue_tokens()
+            db.session.remove()
+        return {'users': len(self.user_ids), 'todos': todos,
+                'seed_seconds': seeded['seconds'] if seeded else None}
+
+    def issue_tokens(self) :
+        from flask_jwt_extended import create_access_token
+        return {user_id: create_access_token(identity=str(user_id)) for user_id in self.user_ids}
+
+    def run(self, workload, make_client) :
+        workers = [Worker(self, make_client(), number) for number in range(self.args.concurrency)]
+        stop = threading.Event()
+
+        def loop(worker) :
+            while not stop.is_set() :
+                worker.step(workload)
+
+        threads = [threading.Thread(target=loop, args=(worker,), daemon=True) for worker in workers]
+        for thread in threads :
+            thread.start()
+        time.sleep(self.args.warmup)
+        for worker in workers :
+            worker.recording = True
+        started = time.perf_counter()
+        time.sleep(self.args.duration)
+        for worker in workers :
+            worker.recording = False
+        seconds = time.perf_counter() - started
+        stop.set()
+        for thread in threads :
+            thread.join()
+
+        samples = [sample for worker in workers for sample in worker.samples]
+        errors = sum((worker.errors for worker in workers), Counter())
+        result = summarize([elapsed for _, elapsed, _ in samples],
+                           Counter(status for _, _, status in samples), sum(errors.values()), seconds)
+        result['operations'] = {
+            operation: summarize([elapsed for name, elapsed, _ in samples if name == operation],
+                                 Counter(status for name, _, status in samples if name == operation),
+                                 errors[operation], seconds)
+            for operation in sorted({name for name, _, _ in samples})
+        }
+        return result
+
+
+def start_server(args, env) :
+    """서버 프로세스를 띄우고 응답할 때까지 대기. (프로세스, 포트)"""
+    import socket
+
+    with socket.socket() as sock :
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    command = (args.server_cmd or
+               f'{sys.executable} -m flask --app app run --port {{port}} --with-threads --no-reload --no-debugger')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command.format(port=port), shell=True, cwd=root, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline :
+        if process.poll() is not None :
+            raise SystemExit(f'서버 실행 실패 (종료 코드 {process.returncode}) : {command}')
+        try :
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            connection.close()
+            return process, port
+        except OSError :
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('서버가 30초 안에 응답하지 않음')
+
+
+def git_commit() :
+    try :
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError) :
+        return None
+
+
+def main() :
+    args = parse_args()
+    workloads = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(workloads) - {'login', 'read', 'write', 'mixed'}
+    if unknown :
+        raise SystemExit(f'알 수 없는 워크로드 : {", ".join(sorted(unknown))}')
+
+    # app을 불러오기 전에 설정해야 함 (import 때 DB 생성). 서버 프로세스도 같은 환경 변수 사용
+    database = args.db or os.path.join(tempfile.mkdtemp(prefix='todo-load-'), 'load.db')
+    os.environ['DATABASE_NAME'] = os.path.abspath(database)
+    os.environ['DATABASE_SHARDS'] = '0'   # 데이터를 기본 DB에 바로 넣으므로 샤딩은 사용하지 않음
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.bcrypt_rounds)   # 다르면 로그인마다 다시 해싱
+    for item in args.env :
+        key, _, value = item.partition('=')
+        os.environ[key] = value
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app import app
+
+    bench = Bench(args, app)
+    report = {
+        'commit': git_commit(),
+        'target': args.target,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'seed': args.seed,
+        'bcrypt_rounds': args.bcrypt_rounds,
+        'env': dict(item.partition('=')[::2] for item in args.env),
+        **bench.seed(),
+        'workloads': {},
+    }
+
+    process = None
+    if args.target == 'server' :
+        process, port = start_server(args, dict(os.environ))
+        make_client = lambda : HTTPClient(port)
+    else :
+        make_client = lambda : WSGIClient(app)
+    try :
+        for workload in workloads :
+            report['workloads'][workload] = bench.run(workload, make_client)
+            print(f'{workload} : {report["workloads"][workload]["rps"]} req/s', file=sys.stderr)
+    finally :
+        if process is not None :
+            process.terminate()
+            process.wait()
+
+    text = json.dumps(report, indent=2)
+    if args.output :
+        with open(args.output, 'w', encoding='utf-8') as file :
+            file.write(text + '\n')
+    else :
+        print(text)
+
+
+if __name__ == '__main__' :
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 목록 조회 경로별 행당 비용 측정
+#   - orm       : 기존 방식. Todo 객체 생성 + identity map + to_dict(isoformat) + 표준 json
+#   - core_json : 컬럼 튜플(Core select) + dict(zip) + 표준 json
+#   - core_fast : 컬럼 튜플 + orjson (설치되어 있을 때만)
+#   - http      : GET /todos 전체 (JWT 확인, ETag, 조회, 응답 생성). 캐시는 끄고 측정
+# 임시 DB 파일에 할 일 rows개를 넣고 page개씩 repeat번 읽어서 행당 마이크로초(중앙값 / 최솟값)를 JSON으로 출력
+# 실행 : python benchmarks/todo_list.py --rows 10000 --page 200 --repeat 50
+
+
+def parse_args() :
+    parser = argparse.ArgumentParser(description='목록 조회 경로별 행당 비용 측정')
+    parser.add_argument('--rows', type=int, default=10000, help='넣을 할 일 개수')
+    parser.add_argument('--page', type=int, default=200, help='한 번에 읽는 개수 (http는 TODOS_PAGE_MAX_LIMIT 이하)')
+    parser.add_argument('--repeat', type=int, default=50, help='경로마다 반복 횟수')
+    parser.add_argument('--description', type=int, default=200, help='설명 길이')
+    return parser.parse_args()
+
+
+def measure(function, rows, repeat) :
+    """function을 repeat번 실행해서 행당 시간(µs) 통계 반환"""
+    function()   # 첫 실행(캐시 준비)은 제외
+    samples = []
+    for _ in range(repeat) :
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000000 / rows)
+    return {'median_us_per_row': round(statistics.median(samples), 3),
+            'min_us_per_row': round(min(samples), 3)}
+
+
+def main() :
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix='todo-bench-')
+
+    # app을 불러오기 전에 설정해야 함 (import 때 DB 생성)
+    os.environ['DATABASE_NAME'] = os.path.join(directory, 'bench.db')
+    os.environ['DATABASE_SHARDS'] = '0'
+    os.environ['CACHE_BACKEND'] = 'null'
+    os.environ['BCRYPT_POOL_WORKERS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from flask_jwt_extended import create_access_token
+    from app import app, db, TODO_FIELDS
+    from json_provider import FastJSONProvider
+    from models import Todo, User
+
+    with app.app_context() :
+        user = User(username='bench', email='bench@test.com', password='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        db.session.execute(db.insert(Todo), [
+            {'title': f'todo {n}', 'description': 'x' * args.description,
+             'completed': n % 3 == 0, 'user_id': user_id}
+            for n in range(args.rows)
+        ])
+        db.session.commit()
+        token = create_access_token(identity=str(user_id))
+
+    standard = FastJSONProvider(app)
+    standard.use_orjson = False
+    fast = FastJSONProvider(app)
+    columns = [Todo.__table__.c[name] for name in TODO_FIELDS]
+    page = min(args.page, args.rows)
+
+    def orm() :
+        todos = db.session.scalars(db.select(Todo).where(Todo.user_id == user_id).limit(page)).all()
+        standard.dumps({'data': [todo.to_dict() for todo in todos]})
+        db.session.remove()   # 요청이 끝날 때처럼 세션 정리
+
+    def core(provider) :
+        def run() :
+            rows = db.session.execute(db.select(*columns).where(Todo.user_id == user_id).limit(page)).all()
+            provider.dumps({'data': [dict(zip(TODO_FIELDS, row)) for row in rows]})
+            db.session.remove()
+        return run
+
+    results = {'rows': args.rows, 'page': page, 'repeat': args.repeat, 'orjson': fast.use_orjson}
+    with app.app_context() :
+        results['orm'] = measure(orm, page, args.repeat)
+        results['core_json'] = measure(core(standard), page, args.repeat)
+        if fast.use_orjson :
+            results['core_fast'] = measure(core(fast), page, args.repeat)
+
+    http_page = min(page, app.config['TODOS_PAGE_MAX_LIMIT'])
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def http() :
+        response = client.get(f'/todos?limit={http_page}', headers=headers)
+        assert response.status_code == 200, response.status_code
+
+    results['http'] = {'page': http_page, **measure(http, http_page, args.repeat)}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__' :
+    main()
@@ -0,0 +1,108 @@
+import itertools
+import json
+import queue
+import threading
+
+# 할 일 변경 알림 (Server-Sent Events용 프로세스 내 pub/sub)
+# 클라이언트가 GET /todos를 주기적으로 다시 불러오는(polling) 대신, 연결 하나를 열어두고 변경이 있을 때만 받음
+#   - subscribe(user_id) : 구독자마다 크기가 정해진 큐(SSE_QUEUE_SIZE) 하나
+#   - publish(user_id, ...) : 커밋이 끝난 뒤 그 사용자의 구독자 큐에 넣기만 함 (기다리지 않음)
+#   - 큐가 가득 찬 느린 구독자는 끊음 -> 다른 요청이나 메모리가 느린 구독자 때문에 밀리지 않음
+#     끊긴 클라이언트는 GET /todos/changes로 빠진 변경을 받아서 이어가면 됨
+# 워커 프로세스마다 따로 가짐 (다른 프로세스에서 처리한 변경은 전달되지 않음)
+# -> 여러 프로세스로 실행할 때는 공유 저장소(Redis pub/sub 등)로 바꾸거나 /todos/changes로 보완
+# 스레드 방식 WSGI 서버(flask run, gunicorn gthread)에서는 열린 스트림 하나가 요청 스레드 하나를 계속 차지함
+# -> 프로세스마다 동시 스트림을 SSE_MAX_STREAMS개로 제한 (넘으면 503). 스레드 수보다 작게 잡아야 다른 요청이 처리됨
+#    연결을 훨씬 많이 열어둬야 하면 gevent 워커(gunicorn -k gevent)로 실행하고 SSE_MAX_STREAMS를 늘림
+#    (gevent에서는 기다리는 스트림이 스레드 대신 greenlet 하나만 차지)
+
+
+class StreamLimitReached(Exception) :
+    """동시 스트림 수가 SSE_MAX_STREAMS에 도달함"""
+
+
+class Subscription :
+    """구독자 한 명의 이벤트 큐"""
+
+    def __init__(self, user_id, size) :
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = False   # 큐가 넘쳐서 끊겼으면 True
+
+    def get(self, timeout) :
+        """다음 이벤트(문자열) 반환. timeout초 동안 없으면 None"""
+        try :
+            return self.queue.get(timeout=timeout)
+        except queue.Empty :
+            return None
+
+
+class EventBroker :
+    """사용자별 구독자 목록에 이벤트를 나눠주는 브로커"""
+
+    def __init__(self, app=None) :
+        self.published = 0    # 발행한 이벤트 수
+        self.dropped = 0      # 느려서 끊은 구독자 수
+        self._subscribers = {}   # user_id -> set(Subscription)
+        self._ids = itertools.count(1)   # 이벤트 id (프로세스 안에서 증가)
+        self._lock = threading.Lock()
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('SSE_QUEUE_SIZE', 100)
+        app.config.setdefault('SSE_HEARTBEAT_SECONDS', 15)
+        app.config.setdefault('SSE_RETRY_MS', 3000)
+        app.config.setdefault('SSE_MAX_STREAMS', 32)
+        self.app = app
+
+    def subscribe(self, user_id) :
+        """구독 추가. 이미 SSE_MAX_STREAMS개가 열려 있으면 StreamLimitReached"""
+        subscription = Subscription(user_id, self.app.config['SSE_QUEUE_SIZE'])
+        with self._lock :
+            if sum(len(subscribers) for subscribers in self._subscribers.values()) >= self.app.config['SSE_MAX_STREAMS'] :
+                raise StreamLimitReached()
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription) :
+        with self._lock :
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is None :
+                return
+            subscribers.discard(subscription)
+            if not subscribers :
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event, data) :
+        """user_id의 구독자에게 이벤트 전달 (커밋 후 호출). 전달한 구독자 수 반환"""
+        with self._lock :
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if not subscribers :
+            return 0   # 구독자가 없으면 직렬화도 하지 않음
+
+        message = format_event(event, data, next(self._ids))
+        delivered = 0
+        for subscription in subscribers :
+            try :
+                subscription.queue.put_nowait(message)
+                delivered += 1
+            except queue.Full :
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+                self.dropped += 1
+        self.published += 1
+        return delivered
+
+    def subscriber_count(self) :
+        with self._lock :
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def format_event(event, data, event_id=None) :
+    """SSE 형식 메시지. data는 JSON 한 줄 (줄바꿈이 없으므로 data: 한 줄로 충분)"""
+    lines = [f'event: {event}']
+    if event_id is not None :
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
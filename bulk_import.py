@@ -0,0 +1,119 @@
+import codecs
+import json
+
+# 대량 가져오기(import)용 스트리밍 파서
+# 요청 본문 전체를 메모리에 올리지 않고 조금씩 읽으면서 항목을 하나씩 꺼냄
+# 지원 형식
+#   - NDJSON : 한 줄에 JSON 객체 하나
+#   - JSON 배열 : [{...}, {...}, ...]
+# 각 항목은 (번호, 값, 에러) 형태로 반환. 파싱에 실패한 항목은 값 대신 에러 메시지
+
+READ_SIZE = 64 * 1024   # 한 번에 읽는 바이트 수
+
+
+def _read_text(stream) :
+    """바이트 스트림 -> 문자열 조각 제너레이터 (UTF-8 멀티바이트가 잘려도 안전하게 디코딩)"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True :
+        chunk = stream.read(READ_SIZE)
+        if not chunk :
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_records(stream) :
+    """본문 형식을 첫 글자로 판단해서 (번호, 값, 에러)를 하나씩 반환"""
+    chunks = _read_text(stream)
+    buffer = ''
+    for chunk in chunks :
+        buffer += chunk
+        if buffer.strip() :
+            break
+
+    if buffer.lstrip().startswith('[') :
+        return _iter_json_array(buffer, chunks)
+    return _iter_ndjson(buffer, chunks)
+
+
+def _iter_ndjson(buffer, chunks) :
+    line_no = 0
+    pending = buffer
+    while True :
+        *lines, pending = pending.split('\n')
+        for line in lines :
+            line_no += 1
+            record = _parse_line(line_no, line)
+            if record :
+                yield record
+
+        chunk = next(chunks, None)
+        if chunk is None :
+            break
+        pending += chunk
+
+    # 마지막 줄은 줄바꿈 없이 끝날 수 있음
+    record = _parse_line(line_no + 1, pending)
+    if record :
+        yield record
+
+
+def _parse_line(line_no, line) :
+    line = line.strip()
+    if not line :
+        return None   # 빈 줄은 무시
+    try :
+        return line_no, json.loads(line), None
+    except ValueError :
+        return line_no, None, 'Invalid JSON'
+
+
+def _iter_json_array(buffer, chunks) :
+    decoder = json.JSONDecoder()
+    position = buffer.index('[') + 1
+    eof = False
+    index = 0
+
+    def fill() :
+        # 데이터를 더 읽어서 buffer 뒤에 붙임. 더 없으면 False
+        nonlocal buffer, eof
+        for chunk in chunks :
+            if chunk :
+                buffer += chunk
+                return True
+        eof = True
+        return False
+
+    while True :
+        # 공백과 쉼표 건너뛰기
+        while True :
+            while position < len(buffer) and buffer[position] in ' \t\r\n,' :
+                position += 1
+            if position < len(buffer) or not fill() :
+                break
+
+        if position >= len(buffer) :
+            yield index + 1, None, 'Unexpected end of JSON array'
+            return
+        if buffer[position] == ']' :
+            return
+
+        try :
+            value, end = decoder.raw_decode(buffer, position)
+        except ValueError :
+            value, end = None, None
+
+        # 값이 조각 경계에서 잘렸을 수 있으면 더 읽고 다시 시도
+        if end is None or (end == len(buffer) and not eof) :
+            if fill() :
+                continue
+            if end is None :
+                yield index + 1, None, 'Invalid JSON'
+                return   # 배열이 깨지면 이후 위치를 알 수 없으므로 중단
+
+        index += 1
+        yield index, value, None
+
+        # 이미 처리한 앞부분은 버려서 메모리 사용량 유지
+        buffer = buffer[end:]
+        position = 0
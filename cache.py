@@ -0,0 +1,188 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+
+# 읽기 캐시 (read-through)
+# 조회 요청이 수정 요청보다 훨씬 많아서, 한 번 만든 응답 데이터를 메모리에 보관했다가 재사용
+#   - 조회 : 캐시에 있으면(hit) 바로 반환, 없으면(miss) DB 조회 후 캐시에 저장
+#   - 수정 : 바뀐 할 일 / 사용자의 목록 항목만 골라서 삭제 (정확한 무효화)
+# 저장소(backend)는 교체 가능
+#   - 'lru'  : 프로세스 메모리. 개수 제한(LRU) + 유효시간(TTL). 워커 프로세스마다 따로 가짐
+#   - 'null' : 캐시 사용 안 함
+#   - 'module:Class' : CacheBackend를 구현한 공유 저장소(Redis 등)를 직접 지정
+# 목록 / 할 일 하나의 키에는 목록 버전이 들어가서 다른 프로세스에서 수정해도 오래된 값을 주지 않음
+
+
+class CacheBackend :
+    """캐시 저장소 인터페이스. 공유 저장소를 붙이려면 이 메서드들을 구현"""
+
+    def get(self, key) :
+        """값 반환. 없거나 만료되었으면 None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, tags=()) :
+        """ttl초 동안 값 저장. tags로 묶어두면 delete_tag로 한 번에 삭제 가능"""
+        raise NotImplementedError
+
+    def delete(self, key) :
+        raise NotImplementedError
+
+    def delete_tag(self, tag) :
+        """tag로 저장한 값 모두 삭제"""
+        raise NotImplementedError
+
+    def clear(self) :
+        raise NotImplementedError
+
+    def __len__(self) :
+        return 0
+
+
+class NullCache(CacheBackend) :
+    """아무것도 저장하지 않는 저장소 (캐시 끄기)"""
+
+    def get(self, key) :
+        return None
+
+    def set(self, key, value, ttl, tags=()) :
+        pass
+
+    def delete(self, key) :
+        pass
+
+    def delete_tag(self, tag) :
+        pass
+
+    def clear(self) :
+        pass
+
+
+class LRUCache(CacheBackend) :
+    """프로세스 메모리 저장소. 가장 오래 안 쓴 것부터 버리고(LRU), 유효시간이 지나면 만료"""
+
+    def __init__(self, max_entries) :
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> (만료 시각, 값, tags). 뒤쪽일수록 최근 사용
+        self._tags = {}                 # tag -> key 집합
+        self._lock = threading.Lock()
+
+    def get(self, key) :
+        with self._lock :
+            entry = self._entries.get(key)
+            if entry is None :
+                return None
+            if entry[0] < time.monotonic() :
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl, tags=()) :
+        with self._lock :
+            if key in self._entries :
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags :
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries :
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key) :
+        with self._lock :
+            if key in self._entries :
+                self._remove(key)
+
+    def delete_tag(self, tag) :
+        with self._lock :
+            for key in list(self._tags.get(tag, ())) :
+                self._remove(key)
+
+    def clear(self) :
+        with self._lock :
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key) :
+        _, _, tags = self._entries.pop(key)
+        for tag in tags :
+            keys = self._tags.get(tag)
+            if keys is not None :
+                keys.discard(key)
+                if not keys :
+                    del self._tags[tag]
+
+    def __len__(self) :
+        return len(self._entries)
+
+
+class ReadCache :
+    """조회 캐시 + hit / miss 카운터"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        self.backend = NullCache()
+        self.hits = 0
+        self.misses = 0
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('CACHE_BACKEND', 'lru')
+        app.config.setdefault('CACHE_MAX_ENTRIES', 10000)
+        app.config.setdefault('CACHE_TTL_SECONDS', 60)
+        self.app = app
+        self.backend = self._create_backend(app.config)
+
+    def _create_backend(self, config) :
+        name = config['CACHE_BACKEND']
+        if name == 'lru' :
+            return LRUCache(config['CACHE_MAX_ENTRIES'])
+        if name in ('null', None, '') :
+            return NullCache()
+
+        # 'module:Class' 형식이면 해당 클래스를 불러와서 config를 넘겨 생성
+        module_name, _, class_name = name.partition(':')
+        backend_class = getattr(importlib.import_module(module_name), class_name)
+        return backend_class(config)
+
+    def get(self, key) :
+        value = self.backend.get(key)
+        # 카운터는 대략적인 값이면 충분해서 락 없이 증가
+        if value is None :
+            self.misses += 1
+        else :
+            self.hits += 1
+        return value
+
+    def set(self, key, value, tags=()) :
+        self.backend.set(key, value, self.app.config['CACHE_TTL_SECONDS'], tags)
+
+    def delete(self, *keys) :
+        for key in keys :
+            self.backend.delete(key)
+
+    def delete_tag(self, tag) :
+        self.backend.delete_tag(tag)
+
+    def clear(self) :
+        """전부 비우고 카운터 초기화"""
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) :
+        """캐시 크기를 정할 때 참고할 통계"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.app.config['CACHE_BACKEND'],
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self.backend),
+            'max_entries': self.app.config['CACHE_MAX_ENTRIES'],
+            'evictions': getattr(self.backend, 'evictions', 0)
+        }
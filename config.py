@@ -12,9 +12,106 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(BASE_DIR, os.getenv("DATABASE_NAME", "todo.db"))}'
     # sqlite:/// -> DB를 SQLite 형식으로 변환, 경로 변환한 곳에 todo.db를 생성하겠다는 의미
     # os.getnev -> .env에서 입력값 1을 찾는다. 있으면 복사, 없으면 입력값 2 반환
+
+    # 샤딩 : 할 일을 user_id 기준으로 여러 SQLite 파일에 나눠 저장 (sharding.py). 0이면 사용 안 함
+    # 사용자 / 토큰은 DATABASE_NAME(디렉터리 DB), 할 일은 SHARD_DATABASE_NAME의 {}에 샤드 번호를 넣은 파일
+    DATABASE_SHARDS = int(os.getenv('DATABASE_SHARDS', 0))
+    SHARD_DATABASE_NAME = os.getenv('SHARD_DATABASE_NAME', 'todo_shard{}.db')
+    SHARD_MOVE_CHUNK_SIZE = int(os.getenv('SHARD_MOVE_CHUNK_SIZE', 500))   # 사용자를 옮길 때 한 번에 복사하는 행 수
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # 객체 변경 추적 기능 비활성화. 대부분 불필요
 
+    # SQLite 연결마다 적용할 PRAGMA (sqlite_profile.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode' : os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),              # 읽기 / 쓰기가 서로 막지 않음
+        'synchronous' : os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),             # WAL에서는 NORMAL로도 안전
+        'busy_timeout' : int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),       # 잠겨 있을 때 기다리는 시간(ms)
+        'mmap_size' : int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # 메모리 매핑 크기(byte)
+        'cache_size' : int(os.getenv('SQLITE_CACHE_SIZE', -64000)),            # 음수면 KB 단위 (약 64MB)
+        'temp_store' : os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),               # 임시 테이블 / 인덱스를 메모리에
+        'foreign_keys' : 'ON'                                                  # 외래키 검사 + ON DELETE CASCADE (계정 삭제에 필요)
+    }
+
+    # 연결 풀 설정
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size' : int(os.getenv('DB_POOL_SIZE', 5)),           # 유지하는 연결 수
+        'max_overflow' : int(os.getenv('DB_MAX_OVERFLOW', 10)),    # 바쁠 때 추가로 만들 수 있는 연결 수
+        'pool_timeout' : int(os.getenv('DB_POOL_TIMEOUT', 30)),    # 연결을 기다리는 최대 시간(초)
+        'pool_recycle' : int(os.getenv('DB_POOL_RECYCLE', 3600))   # 이 시간(초)이 지난 연결은 새로 만듦
+    }
+
+    # 조회(GET) 전용 읽기 연결 풀. DB_READ_POOL_SIZE=0이면 사용 안 함
+    # 같은 DB 파일을 query_only 모드로 연결 (:memory: DB에서는 연결마다 DB가 달라서 사용 불가)
+    # url은 앱의 SQLALCHEMY_DATABASE_URI로 채움 (sqlite_profile.configure)
+    SQLALCHEMY_BINDS = {
+        'readonly' : {
+            'pool_size' : int(os.getenv('DB_READ_POOL_SIZE', 10)),
+            'max_overflow' : int(os.getenv('DB_READ_MAX_OVERFLOW', 10)),
+            'pool_timeout' : int(os.getenv('DB_POOL_TIMEOUT', 30))
+        }
+    } if int(os.getenv('DB_READ_POOL_SIZE', 10)) > 0 else {}
+
+    # 샤드마다 bind 하나 (shard0, shard1, ...). 연결 풀 설정은 기본 연결과 같음
+    for _shard in range(DATABASE_SHARDS) :
+        SQLALCHEMY_BINDS[f'shard{_shard}'] = {
+            'url' : f'sqlite:///{os.path.join(BASE_DIR, SHARD_DATABASE_NAME.format(_shard))}',
+            **SQLALCHEMY_ENGINE_OPTIONS
+        }
+
     # JWT 설정 추가
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-do-not-use-in-production')      # JMT 인증
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-jwt-secret-key')   # JWT 전용키
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES_HOURS', 1)))   # 토큰 유효기간 : 1시간
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES_DAYS', 30)))   # 리프레시 토큰 유효기간 : 30일
+
+    # 목록 조회 페이지네이션 설정
+    TODOS_PAGE_DEFAULT_LIMIT = int(os.getenv('TODOS_PAGE_DEFAULT_LIMIT', 50))   # limit 미지정 시 한 페이지 크기
+    TODOS_PAGE_MAX_LIMIT = int(os.getenv('TODOS_PAGE_MAX_LIMIT', 200))          # 한 번에 받을 수 있는 최대 개수
+    TODOS_EXPORT_CHUNK_SIZE = int(os.getenv('TODOS_EXPORT_CHUNK_SIZE', 1000))   # 내보내기 때 DB에서 한 번에 읽는 개수
+    TODOS_IMPORT_BATCH_SIZE = int(os.getenv('TODOS_IMPORT_BATCH_SIZE', 500))    # 가져오기 때 한 번에 INSERT + 커밋하는 개수
+    TODOS_IMPORT_MAX_ERRORS = int(os.getenv('TODOS_IMPORT_MAX_ERRORS', 100))    # 가져오기 응답에 담는 최대 에러 개수
+    TODOS_BATCH_MAX_OPERATIONS = int(os.getenv('TODOS_BATCH_MAX_OPERATIONS', 500))   # 일괄 처리 한 번에 받는 최대 작업 수
+    TODOS_STATS_DEFAULT_DAYS = int(os.getenv('TODOS_STATS_DEFAULT_DAYS', 30))   # 통계의 날짜별 개수 기본 기간(일)
+    TODOS_STATS_MAX_DAYS = int(os.getenv('TODOS_STATS_MAX_DAYS', 366))         # 통계로 조회할 수 있는 최대 기간(일)
+
+    # 비밀번호 해싱(bcrypt) 설정
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))              # 해싱 비용. 바꾸면 다음 로그인 때 다시 해싱
+    BCRYPT_POOL_WORKERS = int(os.getenv('BCRYPT_POOL_WORKERS', 2))           # 해싱 전용 프로세스 수 (0이면 요청 스레드에서 실행)
+    BCRYPT_POOL_QUEUE_SIZE = int(os.getenv('BCRYPT_POOL_QUEUE_SIZE', 16))    # 대기 가능한 해싱 작업 수. 넘치면 503
+    BCRYPT_POOL_RETRY_AFTER = int(os.getenv('BCRYPT_POOL_RETRY_AFTER', 1))   # 503 응답의 Retry-After(초)
+
+    # 토큰 폐기 목록 설정 (revocation.py)
+    REVOCATION_BLOOM_BITS = int(os.getenv('REVOCATION_BLOOM_BITS', 1 << 20))          # 블룸 필터 크기(비트). 약 10만 개까지 오탐 1% 수준
+    REVOCATION_BLOOM_HASHES = int(os.getenv('REVOCATION_BLOOM_HASHES', 7))            # 블룸 필터 해시 개수
+    REVOCATION_SYNC_SECONDS = int(os.getenv('REVOCATION_SYNC_SECONDS', 5))            # 다른 프로세스의 폐기 기록을 읽어오는 주기
+    REVOCATION_PRUNE_SECONDS = int(os.getenv('REVOCATION_PRUNE_SECONDS', 3600))       # 만료된 폐기 기록을 지우고 블룸 필터를 다시 만드는 주기
+
+    # 조회 캐시 설정 (cache.py)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'lru')                    # lru(프로세스 메모리) / null(끄기) / 'module:Class'(공유 저장소)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))       # 최대 저장 개수. 넘으면 오래 안 쓴 것부터 삭제
+    CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', 60))          # 저장 후 유효시간(초)
+
+    # 그룹 커밋 설정 (group_commit.py)
+    GROUP_COMMIT_ENABLED = os.getenv('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'   # 할 일 추가 / 수정을 모아서 커밋
+    GROUP_COMMIT_MAX_DELAY_MS = int(os.getenv('GROUP_COMMIT_MAX_DELAY_MS', 2))             # 같이 커밋할 작업을 기다리는 최대 시간(ms)
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 100))                 # 한 번에 커밋하는 최대 작업 수
+
+    # 할 일 변경 알림 설정 (broker.py, GET /todos/stream)
+    SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', 100))                 # 구독자마다 쌓아둘 수 있는 이벤트 수. 넘치면 연결 끊음
+    SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', 15))    # 변경이 없을 때 연결 유지용 주석을 보내는 주기(초)
+    SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 3000))                    # 연결이 끊겼을 때 클라이언트가 다시 연결하기 전 대기 시간(ms)
+    SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', 32))                # 프로세스마다 동시에 열 수 있는 스트림 수 (스트림마다 요청 스레드 하나)
+
+    # 요청 지표 설정 (metrics.py, GET /metrics)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'   # 끄면 요청 훅을 등록하지 않음
+
+    # 느린 쿼리 / N+1 쿼리 로그 설정 (query_log.py)
+    QUERY_LOG_ENABLED = os.getenv('QUERY_LOG_ENABLED', 'false').lower() == 'true'   # 켜면 쿼리마다 실행 시간 측정
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))                           # 이 시간(ms) 이상 걸린 쿼리를 경고 로그로
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))              # 한 요청에서 같은 쿼리가 이 횟수를 넘으면 경고
+
+    # 요청 단위 프로파일러 설정 (profiler.py)
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'   # 켜고 토큰도 있어야 요청 훅 등록
+    PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')                              # 이 값을 PROFILER_HEADER로 보낸 요청만 기록 (관리자용)
+    PROFILER_HEADER = os.getenv('PROFILER_HEADER', 'X-Profile')
+    PROFILER_DIR = os.getenv('PROFILER_DIR', 'profiles')                          # collapsed stack 파일을 저장할 디렉터리
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from models import db
+
+# 그룹 커밋(group commit) 쓰기 큐
+# SQLite는 커밋마다 fsync + DB 전체에 쓰기 잠금이 하나뿐이라, 동시에 들어온 쓰기 요청이 한 줄로 서서 하나씩 커밋됨
+# 그룹 커밋 모드에서는
+#   1. 요청 스레드는 쓰기 작업을 큐에 넣고 기다림
+#   2. 전용 쓰기 스레드 하나가 큐에 쌓인 작업을 최대 GROUP_COMMIT_MAX_BATCH개까지
+#      (또는 GROUP_COMMIT_MAX_DELAY_MS 동안) 모아서 트랜잭션 하나로 실행 + 커밋(fsync 한 번)
+#   3. 커밋이 끝난 뒤에야 각 요청에 결과를 돌려줌 -> 응답을 받았으면 DB에 저장된 것
+# GROUP_COMMIT_ENABLED = True 일 때만 사용 (기본은 요청마다 커밋)
+# 샤딩 모드에서는 샤드(엔진)마다 쓰기 스레드가 하나씩 생김 (샤드마다 쓰기 잠금이 따로 있으므로)
+# 효과 비교 : python benchmarks/load.py --workloads write [--env GROUP_COMMIT_ENABLED=true]
+
+
+class GroupCommitWriter :
+    """쓰기 작업을 모아서 한 트랜잭션으로 커밋하는 전용 스레드 (엔진마다 하나)"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        self.batches = 0       # 커밋 횟수
+        self.operations = 0    # 처리한 작업 수
+        self._queues = {}      # engine -> 작업 큐. 처음 사용할 때 쓰기 스레드와 같이 생성
+        self._lock = threading.Lock()
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('GROUP_COMMIT_ENABLED', False)
+        app.config.setdefault('GROUP_COMMIT_MAX_DELAY_MS', 2)
+        app.config.setdefault('GROUP_COMMIT_MAX_BATCH', 100)
+        self.app = app
+
+    @property
+    def enabled(self) :
+        return self.app.config['GROUP_COMMIT_ENABLED']
+
+    def submit(self, operation, engine=None) :
+        """operation(connection)을 engine(기본 : db.engine)의 다음 그룹에 넣고,
+        커밋까지 끝나면 결과 반환 (실패하면 예외 발생)"""
+        future = Future()
+        self._start(engine or db.engine).put((operation, future))   # 요청 중(app context)에 호출되므로 여기서 엔진을 가져옴
+        return future.result()
+
+    def _start(self, engine) :
+        with self._lock :
+            work_queue = self._queues.get(engine)
+            if work_queue is None :
+                work_queue = self._queues[engine] = queue.Queue()
+                threading.Thread(target=self._run, args=(work_queue, engine),
+                                 name='group-commit-writer', daemon=True).start()
+        return work_queue
+
+    def _run(self, work_queue, engine) :
+        while True :
+            batch = [work_queue.get()]   # 첫 작업이 올 때까지 대기
+
+            # 조금 더 기다리면서 같이 커밋할 작업 모으기
+            deadline = time.monotonic() + self.app.config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000
+            while len(batch) < self.app.config['GROUP_COMMIT_MAX_BATCH'] :
+                remaining = deadline - time.monotonic()
+                try :
+                    if remaining > 0 :
+                        batch.append(work_queue.get(timeout=remaining))
+                    else :
+                        batch.append(work_queue.get_nowait())   # 이미 쌓여 있는 것만
+                except queue.Empty :
+                    break
+
+            self._flush(batch, engine)
+
+    def _flush(self, batch, engine) :
+        results = []
+        try :
+            with engine.begin() as connection :
+                for operation, future in batch :
+                    # SQLite는 문장 하나가 실패해도 그 문장만 취소되고 트랜잭션은 유지됨
+                    # -> 실패한 작업만 에러로 돌려주고 나머지는 같이 커밋
+                    try :
+                        results.append((future, operation(connection), None))
+                    except Exception as e :
+                        results.append((future, None, e))
+        except Exception as e :
+            # 커밋 자체가 실패하면 그룹 전체 실패
+            for _, future in batch :
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(batch)
+        for future, result, error in results :
+            if error is None :
+                future.set_result(result)
+            else :
+                future.set_exception(error)
@@ -0,0 +1,137 @@
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+import bcrypt
+
+# 비밀번호 해싱 전용 프로세스 풀
+# bcrypt는 일부러 느리게 만든 알고리즘이라 CPU를 많이 씀
+# 요청 처리 워커에서 바로 돌리면 로그인이 몰릴 때 가벼운 GET /todos 요청까지 같이 밀림
+# -> 별도 프로세스 풀(크기 제한)에서 실행하고, 대기열이 꽉 차면 바로 거절(503)해서 다른 요청을 보호
+#
+# 설정 (config.py)
+#   BCRYPT_LOG_ROUNDS : bcrypt 비용(2^n번 반복). 바꾸면 로그인할 때 자동으로 다시 해싱
+#   BCRYPT_POOL_WORKERS : 해싱 프로세스 수. 0이면 풀 없이 요청 스레드에서 바로 실행
+#   BCRYPT_POOL_QUEUE_SIZE : 실행 중인 것 외에 기다릴 수 있는 작업 수
+#   BCRYPT_POOL_RETRY_AFTER : 503 응답의 Retry-After(초)
+#
+# 워커 프로세스는 이 모듈과 bcrypt만 import (Flask 앱, DB 연결을 복사하거나 다시 만들지 않음)
+
+
+class HashPoolBusy(Exception) :
+    """해싱 대기열이 꽉 참"""
+
+
+_main_lock = threading.Lock()
+
+
+class _WorkerProcess(SpawnProcess) :
+    """부모의 __main__을 다시 실행하지 않는 spawn 프로세스"""
+
+    def start(self) :
+        # spawn은 자식 프로세스에서 부모의 __main__ 파일을 다시 실행함
+        # python app.py로 실행하면 app.py의 모듈 코드(DB 테이블 생성, 확장 초기화 등)가 워커마다 다시 돌아감
+        # -> 프로세스를 띄우는 동안만 __main__을 빈 모듈로 바꿔서 자식에 넘기지 않음
+        #    (해싱 함수는 이 모듈의 최상위 함수라 자식은 hashing만 import)
+        with _main_lock :
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try :
+                super().start()
+            finally :
+                sys.modules['__main__'] = main
+
+
+class _WorkerContext(SpawnContext) :
+    Process = _WorkerProcess
+
+
+def _hash_password(password, rounds) :
+    # 워커 프로세스에서 실행. 피클링 가능하도록 모듈 최상위 함수로 둠
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password_hash, password) :
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash) :
+    """저장된 해시의 비용 값. 형식 : $2b$<rounds>$<salt + hash>"""
+    try :
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError) :
+        return None
+
+
+class HashPool :
+    """bcrypt 해싱 / 검증을 크기가 제한된 프로세스 풀에서 실행"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        self._executor = None
+        self._slots = None   # 실행 중 + 대기 중인 작업 수 제한
+        self._lock = threading.Lock()
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('BCRYPT_POOL_WORKERS', 2)
+        app.config.setdefault('BCRYPT_POOL_QUEUE_SIZE', 16)
+        app.config.setdefault('BCRYPT_POOL_RETRY_AFTER', 1)
+        self.app = app
+
+    @property
+    def retry_after(self) :
+        return self.app.config['BCRYPT_POOL_RETRY_AFTER']
+
+    @property
+    def rounds(self) :
+        return self.app.config['BCRYPT_LOG_ROUNDS']
+
+    def _start(self) :
+        # 처음 사용할 때 풀 생성. 설정이 바뀐 테스트 등에서도 그때의 값을 사용
+        with self._lock :
+            if self._executor is None :
+                workers = self.app.config['BCRYPT_POOL_WORKERS']
+                queue_size = self.app.config['BCRYPT_POOL_QUEUE_SIZE']
+                # spawn : Flask 앱, DB 연결 등을 복사하지 않은 깨끗한 프로세스로 시작 (_WorkerProcess)
+                self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=_WorkerContext())
+                self._slots = threading.BoundedSemaphore(workers + queue_size)
+        return self._executor
+
+    def _run(self, func, *args) :
+        if self.app.config['BCRYPT_POOL_WORKERS'] <= 0 :
+            return func(*args)
+
+        executor = self._start()
+        if not self._slots.acquire(blocking=False) :
+            raise HashPoolBusy()   # 기다리지 않고 바로 거절
+
+        try :
+            future = executor.submit(func, *args)
+        except Exception :
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _ : self._slots.release())
+        return future.result()
+
+    def generate_password_hash(self, password) :
+        """비밀번호 -> bcrypt 해시 문자열"""
+        return self._run(_hash_password, password, self.rounds)
+
+    def check_password_hash(self, password_hash, password) :
+        """비밀번호가 해시와 일치하는지 확인"""
+        return self._run(_check_password, password_hash, password)
+
+    def needs_rehash(self, password_hash) :
+        """저장된 해시의 비용이 현재 설정과 다른지 확인"""
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self) :
+        with self._lock :
+            if self._executor is not None :
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+import query_timing
+
+# 요청 지표 수집 + Prometheus 텍스트 형식 출력 (GET /metrics)
+# 요청마다
+#   - before_request : 시작 시각 기록
+#   - 쿼리 수 / SQL 실행 시간 누적 (모든 엔진 : 기본, 읽기 전용, 샤드. 시간 측정은 query_timing.py)
+#   - 단계별 시간 : auth(JWT 확인, current_user_id에서 표시), bcrypt(회원가입 / 로그인), serialize(jsonify)
+#   - after_request : 라우트(URL 규칙)별 응답 시간 / 단계별 시간 / 쿼리 수 히스토그램 + 상태 코드별 요청 수
+# 요청 중에는 g에만 쌓고, 끝날 때 잠금 한 번으로 한꺼번에 반영 (잠금 안에서는 정수 몇 개 증가만)
+# 워커 프로세스마다 따로 집계 (프로세스 여러 개로 실행하면 Prometheus에서 인스턴스별로 수집)
+# 요청 밖의 쿼리(시작할 때, 그룹 커밋 쓰기 스레드)는 집계하지 않음
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)   # 초
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)   # 요청당 쿼리 수
+
+
+class Histogram :
+    """누적 전 버킷별 개수 + 합계 (잠금은 호출한 쪽에서)"""
+
+    def __init__(self, buckets) :
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막 칸 : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value) :
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels) :
+        """Prometheus 형식 줄 목록 (_bucket은 le 이하 누적 개수)"""
+        cumulative = 0
+        lines = []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts) :
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class Metrics :
+    """라우트별 요청 지표 수집기"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        self._lock = threading.Lock()
+        self._requests = {}   # (method, route, status) -> 요청 수
+        self._latency = {}    # (method, route) -> Histogram
+        self._phases = {}     # (route, phase) -> Histogram
+        self._queries = {}    # route -> Histogram (요청당 쿼리 수)
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_LATENCY_BUCKETS', LATENCY_BUCKETS)
+        self.app = app
+        self.buckets = tuple(app.config['METRICS_LATENCY_BUCKETS'])
+        if not self.enabled :
+            return   # 꺼져 있으면 훅을 등록하지 않음 (요청 비용 0)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        query_timing.add_listener(_record_query)
+
+        # jsonify(app.json.response) 시간 = 직렬화 시간
+        response = app.json.response
+
+        def timed_response(*args, **kwargs) :
+            with self.phase('serialize') :
+                return response(*args, **kwargs)
+        app.json.response = timed_response
+
+    @property
+    def enabled(self) :
+        return self.app.config['METRICS_ENABLED']
+
+    @contextmanager
+    def phase(self, name) :
+        """with 블록 실행 시간을 현재 요청의 name 단계에 더함 (요청 밖이거나 꺼져 있으면 무시)"""
+        started = time.perf_counter()
+        try :
+            yield
+        finally :
+            phases = g.get('metrics_phases') if has_request_context() else None
+            if phases is not None :
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+    def mark(self, name) :
+        """요청 시작부터 지금까지를 name 단계로 기록 (예 : auth - 뷰 함수에 들어오기 전 JWT 확인까지)"""
+        phases = g.get('metrics_phases') if has_request_context() else None
+        if phases is not None and name not in phases :
+            phases[name] = time.perf_counter() - g.metrics_started
+
+    def _start(self) :
+        g.metrics_started = time.perf_counter()
+        g.metrics_phases = {}
+        g.metrics_queries = 0
+        g.metrics_sql_seconds = 0.0
+
+    def _finish(self, response) :
+        started = g.get('metrics_started')
+        if started is None :
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'   # 404 주소마다 라벨이 생기지 않도록
+        method = request.method
+        phases = dict(g.metrics_phases, sql=g.metrics_sql_seconds)
+
+        with self._lock :
+            key = (method, route, response.status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._latency, (method, route), self.buckets).observe(elapsed)
+            self._histogram(self._queries, route, QUERY_BUCKETS).observe(g.metrics_queries)
+            for name, seconds in phases.items() :
+                self._histogram(self._phases, (route, name), self.buckets).observe(seconds)
+        return response
+
+    @staticmethod
+    def _histogram(histograms, key, buckets) :
+        histogram = histograms.get(key)
+        if histogram is None :
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    def render(self) :
+        """Prometheus 텍스트 형식 (text/plain; version=0.0.4)"""
+        lines = [
+            '# HELP todo_http_requests_total 라우트 / 상태 코드별 요청 수',
+            '# TYPE todo_http_requests_total counter',
+        ]
+        with self._lock :
+            for (method, route, status), count in sorted(self._requests.items()) :
+                lines.append(f'todo_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP todo_http_request_duration_seconds 요청 처리 시간 (응답 헤더까지)',
+                '# TYPE todo_http_request_duration_seconds histogram',
+            ]
+            for (method, route), histogram in sorted(self._latency.items()) :
+                lines += histogram.lines('todo_http_request_duration_seconds',
+                                         f'method="{method}",route="{_escape(route)}"')
+
+            lines += [
+                '# HELP todo_http_request_phase_seconds 요청 안의 단계별 시간 (auth, sql, serialize, bcrypt)',
+                '# TYPE todo_http_request_phase_seconds histogram',
+            ]
+            for (route, phase), histogram in sorted(self._phases.items()) :
+                lines += histogram.lines('todo_http_request_phase_seconds',
+                                         f'route="{_escape(route)}",phase="{phase}"')
+
+            lines += [
+                '# HELP todo_http_request_queries 요청당 SQL 쿼리 수',
+                '# TYPE todo_http_request_queries histogram',
+            ]
+            for route, histogram in sorted(self._queries.items()) :
+                lines += histogram.lines('todo_http_request_queries', f'route="{_escape(route)}"')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) :
+        with self._lock :
+            self._requests.clear()
+            self._latency.clear()
+            self._phases.clear()
+            self._queries.clear()
+
+
+def _escape(value) :
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _record_query(conn, statement, parameters, seconds) :
+    if has_request_context() and 'metrics_queries' in g :
+        g.metrics_queries += 1
+        g.metrics_sql_seconds += seconds
@@ -1,10 +1,16 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlite_profile import RoutingSession
+import search
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_' : RoutingSession})
+# RoutingSession : GET 요청의 SELECT는 읽기 전용 연결 풀로 보냄 (sqlite_profile.py)
 
 class User(db.Model) :
     __tablename__ = 'users'
+    __table_args__ = {'sqlite_autoincrement' : True}
+    # 탈퇴한 사용자의 id를 새 사용자에게 다시 주지 않음 (남아 있는 토큰이 다른 사람의 계정을 가리키지 않도록)
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -12,13 +18,17 @@ class User(db.Model) :
     password = db.Column(db.String(200), nullable=False)  # 나중에 해시화 작업 필요
     created_at = db.Column(db.DateTime, default=datetime.now)
 
-    todos = db.relationship('Todo', backref='user', lazy=True, cascade='all, delete-orphan')
+    todos = db.relationship('Todo', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     # db.relationship은 실제 DB에 저장되지 않는 가상 연결통로
     # 매개 변수 : 연결할 모델명 / 역참조 생성 / 지연 로딩 여부 / 종속
     # 관계 설정 : 이 유저가 가진 모든 Todo
     # backref : 역참조 설정. 원래는 존재하지 않지만 가상으로 속성을 추가. 즉, 이름은 마음껏 바꿔도 됨
     # lazy = True : 필요할 때만 Todo 로드 (즉시 로딩과 비슷)
     # cascade = 'all, delete-orphan' : User 삭제되면 그 밑의 Todo 삭제
+    # passive_deletes = True : 삭제할 때 Todo를 불러와서 하나씩 지우지 않고 DB의 ON DELETE CASCADE에 맡김
+
+    refresh_tokens = db.relationship('RefreshToken', backref='user', lazy=True, cascade='all, delete-orphan',
+                                     passive_deletes=True)
 
 
     def to_dict(self):
@@ -32,6 +42,17 @@ class User(db.Model) :
 
 class Todo(db.Model) :
     __tablename__ = 'todos'   # table명 선언
+    __table_args__ = (
+        db.Index('ix_todos_user_id_id', 'user_id', 'id'),
+        db.Index('ix_todos_user_id_completed_created_at', 'user_id', 'completed', 'created_at'),
+        db.Index('ix_todos_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_todos_user_id_updated_at', 'user_id', 'updated_at'),
+        # 목록 조회용 복합 인덱스. 항상 user_id로 먼저 찾기 때문에 user_id가 맨 앞
+        # 뒤에 오는 컬럼으로 필터(completed, created_after, updated_after)와 정렬(sort)을 인덱스 순서대로 바로 처리
+        {'sqlite_autoincrement' : True}
+        # 삭제된 할 일의 id를 새 할 일에 다시 주지 않음
+        # 다시 주면 todo_changes(할 일 id별 한 행)의 삭제 기록이 새 할 일의 기록으로 덮여서, 동기화하는 클라이언트가 삭제를 모름
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -40,8 +61,9 @@ class Todo(db.Model) :
     created_at = db.Column(db.DateTime, default = datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     # 외래키 추가, 해당 Todo를 만들 User의 id
+    # ondelete='CASCADE' : 사용자가 삭제되면 DB가 직접 할 일 삭제 (PRAGMA foreign_keys = ON 필요, config.py)
 
     def to_dict(self):
         """객체를 딕셔너리 형태로 전환(JSON 응답용)"""
@@ -53,4 +75,219 @@ class Todo(db.Model) :
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat(),  # datetime 객체는 JSON으로 직렬화가 불가해 변경
             'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class RefreshToken(db.Model) :
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)   # 토큰 고유 ID (JWT의 jti 클레임)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked = db.Column(db.Boolean, default=False, nullable=False)
+    # 리프레시 토큰 발급 기록
+    # 재발급(회전)할 때마다 이전 토큰은 revoked = True. 폐기된 토큰으로는 다시 재발급 불가
+
+class RevokedToken(db.Model) :
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = {'sqlite_autoincrement' : True}
+    # 삭제한 행의 id를 다시 쓰지 않음 (다른 프로세스는 마지막으로 읽은 id보다 큰 행만 읽으므로)
+
+    id = db.Column(db.Integer, primary_key=True)   # 다른 프로세스가 새로 추가된 것만 읽어갈 때 기준
+    jti = db.Column(db.String(36), unique=True, nullable=False)   # 폐기된 토큰의 jti
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)   # 토큰 만료 시각. 지나면 기록 삭제
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    # 로그아웃 등으로 만료 전에 폐기된 JWT 기록 (revocation.py)
+
+class TodoListVersion(db.Model) :
+    __tablename__ = 'todo_list_versions'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # 사용자별 할 일 목록 버전. 할 일이 추가 / 수정 / 삭제될 때마다 +1
+    # 목록 조회의 ETag로 사용 -> 버전이 같으면 목록을 다시 읽지 않고 304 응답
+
+class TodoChange(db.Model) :
+    __tablename__ = 'todo_changes'
+    __table_args__ = (
+        db.Index('ix_todo_changes_user_id_seq', 'user_id', 'seq'),
+        # 변경 내역 조회(GET /todos/changes)는 항상 user_id + seq 범위로 찾음
+    )
+
+    todo_id = db.Column(db.Integer, primary_key=True, autoincrement=False)   # 삭제된 할 일도 남아야 해서 외래키 없음
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    # 할 일별 마지막 변경 기록. 사용자마다 1씩 증가하는 변경 번호(seq)를 가짐
+    # 삭제된 할 일은 deleted = True로 남음 (tombstone) -> 동기화할 때 클라이언트가 지울 id를 알 수 있음
+    # 할 일마다 한 행만 유지하므로 변경이 많아도 할 일 개수 이상으로 커지지 않음
+
+class TodoStats(db.Model) :
+    __tablename__ = 'todo_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    # 사용자별 할 일 개수 / 완료 개수. todos 트리거로 유지 -> 통계 조회(GET /todos/stats)는 기본키 조회 한 번
+
+class TodoDailyStats(db.Model) :
+    __tablename__ = 'todo_daily_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    created = db.Column(db.Integer, nullable=False, default=0)     # 그날 만든 할 일 수
+    completed = db.Column(db.Integer, nullable=False, default=0)   # 그날 완료한 할 일 수 (완료를 취소하면 -1)
+    # 사용자별 하루 단위 활동 기록 (todos 트리거로 유지). 할 일을 삭제해도 지나간 기록은 바뀌지 않음
+    # 기간 조회는 (user_id, day) 기본키 범위만 읽으므로 할 일 개수와 상관없이 일수만큼만 읽음
+
+class UserShard(db.Model) :
+    __tablename__ = 'user_shards'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False, index=True)
+    # 샤딩 모드(DATABASE_SHARDS > 0)에서 사용자의 할 일이 저장된 샤드 번호 (sharding.py)
+    # 디렉터리 DB에만 존재. 사용자를 다른 샤드로 옮기면 이 값만 바뀜
+
+class IdSequence(db.Model) :
+    __tablename__ = 'id_sequences'
+
+    name = db.Column(db.String(50), primary_key=True)   # 테이블 이름
+    next_id = db.Column(db.Integer, nullable=False)      # 다음에 나눠줄 id 묶음의 시작 값
+    # 샤딩 모드에서 샤드 전체에 걸쳐 겹치지 않는 id 발급용 (sharding.py). 디렉터리 DB에만 존재
+
+def ensure_indexes(engine) :
+    """todos 인덱스가 없는 기존 DB에 인덱스 생성 (db.create_all은 이미 있는 테이블을 건너뛰어서 인덱스도 만들지 않음)"""
+    for index in Todo.__table__.indexes :
+        index.create(bind=engine, checkfirst=True)   # checkfirst : 이미 있으면 건너뜀
+
+# 버전 증가는 todos 테이블 트리거로 처리
+# 할 일을 바꾸는 모든 경로(생성, 수정, 삭제, 가져오기, 일괄 처리)에서 같은 트랜잭션 안에 자동으로 반영되고 쿼리도 추가되지 않음
+# todo_list_versions 테이블이 만들어질 때 트리거 생성 + 이미 있는 할 일로 버전을 채움
+# (todos가 이미 있는 기존 DB도 db.create_all로 적용. todos 생성에 묶으면 기존 DB에는 트리거가 생기지 않음)
+TODO_VERSION_TRIGGERS = {
+    'todos_version_after_insert' : ('AFTER INSERT', 'NEW'),
+    'todos_version_after_update' : ('AFTER UPDATE', 'NEW'),
+    'todos_version_after_delete' : ('AFTER DELETE', 'OLD')
+}
+
+TodoListVersion.__table__.add_is_dependent_on(Todo.__table__)   # todos 다음에 생성되도록
+
+for trigger_name, (timing, row) in TODO_VERSION_TRIGGERS.items() :
+    event.listen(TodoListVersion.__table__, 'after_create', DDL(f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger_name} {timing} ON todos
+        BEGIN
+            INSERT INTO todo_list_versions (user_id, version) VALUES ({row}.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+    """))
+
+# 할 일이 있는 사용자는 버전 0(할 일 없음)과 다른 값에서 시작
+event.listen(TodoListVersion.__table__, 'after_create', DDL("""
+    INSERT INTO todo_list_versions (user_id, version)
+    SELECT user_id, COUNT(*) FROM todos GROUP BY user_id
+"""))
+
+# 사용자 삭제 : 할 일은 사용자 행보다 먼저 삭제
+# 할 일 삭제 트리거가 todo_list_versions / todo_changes에 쓰는데, 이 테이블들이 CASCADE로 먼저 지워진 뒤에 쓰면
+# 없는 사용자를 가리키는 행이 생겨서 외래키 오류 -> 사용자가 남아 있을 때 할 일을 지우고, 나머지는 CASCADE로 정리
+# users와 todos가 같은 DB에 있을 때만 생성 (샤딩 모드의 샤드 DB에는 users가 없음, sharding.py에서 따로 삭제)
+event.listen(Todo.__table__, 'after_create', DDL("""
+    CREATE TRIGGER IF NOT EXISTS users_delete_todos BEFORE DELETE ON users
+    BEGIN
+        DELETE FROM todos WHERE user_id = OLD.id;
+    END
+""").execute_if(callable_=lambda ddl, target, bind, **kw : bind.dialect.has_table(bind, 'users')))
+
+# 제목 / 설명 전문 검색 색인(todos_fts)과 동기화 트리거도 todos 테이블과 같이 생성 (search.py)
+search.listen(Todo.__table__)
+
+# 변경 번호도 todos 트리거로 기록 (생성 / 수정 / 삭제, 가져오기, 일괄 처리, 그룹 커밋 모두 같은 트랜잭션 안에서 반영)
+# 같은 사용자의 쓰기는 SQLite 쓰기 잠금 때문에 순서대로 커밋되므로 seq는 커밋 순서와 같음 (시간 기준과 달리 시계가 틀려도 안전)
+# todo_changes 테이블이 만들어질 때 트리거 생성 + 이미 있는 할 일을 변경 내역으로 채움 (기존 DB도 db.create_all로 적용)
+TODO_CHANGE_TRIGGERS = {
+    'todos_change_after_insert' : ('AFTER INSERT', 'NEW', 0),
+    'todos_change_after_update' : ('AFTER UPDATE', 'NEW', 0),
+    'todos_change_after_delete' : ('AFTER DELETE', 'OLD', 1)
+}
+
+TodoChange.__table__.add_is_dependent_on(Todo.__table__)   # todos 다음에 생성되도록
+
+for trigger_name, (timing, row, deleted) in TODO_CHANGE_TRIGGERS.items() :
+    event.listen(TodoChange.__table__, 'after_create', DDL(f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger_name} {timing} ON todos
+        BEGIN
+            INSERT INTO todo_changes (todo_id, user_id, seq, deleted)
+            VALUES ({row}.id, {row}.user_id,
+                    (SELECT COALESCE(MAX(seq), 0) + 1 FROM todo_changes WHERE user_id = {row}.user_id), {deleted})
+            ON CONFLICT (todo_id) DO UPDATE
+            SET user_id = excluded.user_id, seq = excluded.seq, deleted = excluded.deleted;
+        END
+    """))
+
+event.listen(TodoChange.__table__, 'after_create', DDL("""
+    INSERT INTO todo_changes (todo_id, user_id, seq, deleted)
+    SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id), 0 FROM todos
+"""))
+
+# 통계 카운터도 todos 트리거로 유지 (모든 쓰기 경로에서 같은 트랜잭션 안에 반영)
+# 완료 여부는 0 / 1로 저장되므로 더하고 빼는 것으로 완료 개수 계산
+# 통계 테이블이 만들어질 때 트리거 생성 + 이미 있는 할 일로 채움 (기존 DB도 db.create_all로 적용)
+TODO_STATS_TRIGGERS = {
+    'todos_stats_after_insert' : ('AFTER INSERT', '', """
+        INSERT INTO todo_stats (user_id, total, completed) VALUES (NEW.user_id, 1, COALESCE(NEW.completed, 0))
+        ON CONFLICT (user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed;
+    """),
+    'todos_stats_after_delete' : ('AFTER DELETE', '', """
+        UPDATE todo_stats SET total = total - 1, completed = completed - COALESCE(OLD.completed, 0)
+        WHERE user_id = OLD.user_id;
+    """),
+    # 완료 여부 / 사용자가 실제로 바뀐 행만 (제목 수정 등은 건너뜀)
+    'todos_stats_after_update' : ('AFTER UPDATE OF completed, user_id',
+                                  'WHEN OLD.completed IS NOT NEW.completed OR OLD.user_id IS NOT NEW.user_id', """
+        UPDATE todo_stats SET total = total - 1, completed = completed - COALESCE(OLD.completed, 0)
+        WHERE user_id = OLD.user_id;
+        INSERT INTO todo_stats (user_id, total, completed) VALUES (NEW.user_id, 1, COALESCE(NEW.completed, 0))
+        ON CONFLICT (user_id) DO UPDATE SET total = total + 1, completed = completed + excluded.completed;
+    """)
+}
+
+# 하루 단위 기록 : 만든 날(created_at)에 created +1, 완료한 날(updated_at)에 completed +1 (완료 취소는 -1)
+TODO_DAILY_STATS_TRIGGERS = {
+    'todos_daily_stats_after_insert' : ('AFTER INSERT', '', """
+        INSERT INTO todo_daily_stats (user_id, day, created, completed)
+        VALUES (NEW.user_id, COALESCE(date(NEW.created_at), date('now', 'localtime')), 1, COALESCE(NEW.completed, 0))
+        ON CONFLICT (user_id, day) DO UPDATE SET created = created + 1, completed = completed + excluded.completed;
+    """),
+    'todos_daily_stats_after_update' : ('AFTER UPDATE OF completed', 'WHEN OLD.completed IS NOT NEW.completed', """
+        INSERT INTO todo_daily_stats (user_id, day, created, completed)
+        VALUES (NEW.user_id, COALESCE(date(NEW.updated_at), date('now', 'localtime')), 0,
+                CASE WHEN NEW.completed THEN 1 ELSE -1 END)
+        ON CONFLICT (user_id, day) DO UPDATE SET completed = completed + excluded.completed;
+    """)
+}
+
+TodoStats.__table__.add_is_dependent_on(Todo.__table__)
+TodoDailyStats.__table__.add_is_dependent_on(Todo.__table__)
+
+for stats_table, triggers in ((TodoStats.__table__, TODO_STATS_TRIGGERS),
+                              (TodoDailyStats.__table__, TODO_DAILY_STATS_TRIGGERS)) :
+    for trigger_name, (timing, when, body) in triggers.items() :
+        event.listen(stats_table, 'after_create', DDL(
+            f'CREATE TRIGGER IF NOT EXISTS {trigger_name} {timing} ON todos FOR EACH ROW {when} BEGIN {body} END'
+        ))
+
+event.listen(TodoStats.__table__, 'after_create', DDL("""
+    INSERT INTO todo_stats (user_id, total, completed)
+    SELECT user_id, COUNT(*), COALESCE(SUM(completed), 0) FROM todos GROUP BY user_id
+"""))
+# 기존 할 일은 완료한 날을 알 수 없어서 마지막 수정일(updated_at)을 완료한 날로 사용
+event.listen(TodoDailyStats.__table__, 'after_create', DDL("""
+    INSERT INTO todo_daily_stats (user_id, day, created, completed)
+    SELECT user_id, date(created_at), COUNT(*), 0 FROM todos GROUP BY user_id, date(created_at)
+"""))
+event.listen(TodoDailyStats.__table__, 'after_create', DDL("""
+    INSERT INTO todo_daily_stats (user_id, day, created, completed)
+    SELECT user_id, date(updated_at), 0, COUNT(*) FROM todos WHERE completed GROUP BY user_id, date(updated_at)
+    ON CONFLICT (user_id, day) DO UPDATE SET completed = completed + excluded.completed
+"""))
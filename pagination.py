@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+
+# 커서(cursor) 기반 페이지네이션 헬퍼
+# OFFSET은 앞의 행을 전부 읽고 버리기 때문에 뒤 페이지로 갈수록 느려짐
+# 대신 마지막으로 본 행의 정렬 키를 커서에 담아 WHERE 조건으로 이어서 조회 (keyset pagination)
+# 커서는 클라이언트가 내용을 신경 쓰지 않도록 base64로 감싼 불투명(opaque) 문자열
+
+
+class InvalidCursor(ValueError) :
+    """잘못된 커서 문자열"""
+
+
+def encode_cursor(values) :
+    """정렬 키 딕셔너리 -> 커서 문자열"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor) :
+    """커서 문자열 -> 정렬 키 딕셔너리"""
+    try :
+        padded = cursor + '=' * (-len(cursor) % 4)  # encode 때 제거한 패딩 복원
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) :
+        raise InvalidCursor(cursor)
+
+    if not isinstance(values, dict) or not isinstance(values.get('id'), int) :
+        raise InvalidCursor(cursor)
+    return values
+
+
+def parse_limit(value, default, maximum) :
+    """limit 파라미터 검증. 없으면 기본값, 범위를 벗어나면 ValueError"""
+    if value is None or value == '' :
+        return default
+    limit = int(value)  # 숫자가 아니면 ValueError
+    if limit < 1 or limit > maximum :
+        raise ValueError(value)
+    return limit
+
+
+def parse_bool(value) :
+    """'true' / 'false' 문자열 -> bool. 그 외 값은 ValueError"""
+    lowered = value.strip().lower()
+    if lowered in ('true', '1') :
+        return True
+    if lowered in ('false', '0') :
+        return False
+    raise ValueError(value)
+
+
+def parse_datetime(value) :
+    """ISO 8601 문자열 -> datetime. 형식이 틀리면 ValueError"""
+    return datetime.fromisoformat(value.strip())
+
+
+def parse_fields(value, allowed) :
+    """fields 파라미터(쉼표로 구분) -> 필드 이름 튜플. 없으면 allowed 전체, 모르는 필드가 있으면 ValueError"""
+    if value is None or value.strip() == '' :
+        return tuple(allowed)
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))   # 순서 유지 + 중복 제거
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields :
+        raise ValueError(', '.join(unknown) or value)
+    return fields
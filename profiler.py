@@ -0,0 +1,173 @@
+import hmac
+import os
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+
+from flask import g, request
+
+# 요청 하나만 골라서 프로파일링 (PROFILER_ENABLED = True 이고 관리자 헤더가 있을 때만)
+#   X-Profile : <PROFILER_TOKEN>  헤더를 붙인 요청만 sys.setprofile로 함수 호출 / 반환을 모두 기록
+#   요청이 끝나면 PROFILER_DIR에 collapsed stack 형식 파일 하나 저장 (응답 헤더 X-Profile-Dump : 파일 이름)
+#     'GET /todos;app.get_todos;sqlalchemy...execute;... 1234'  <- 호출 경로와 그 경로에서 쓴 시간(µs, 자기 시간)
+#     flamegraph.pl, speedscope, inferno 등에서 그대로 열 수 있음. 맨 앞 프레임은 라우트
+# 샘플링이 아니라 모든 호출을 기록 -> 몇 ms짜리 요청도 빠짐없이 보이지만, 기록 중에는 요청이 몇 배 느려짐
+# 요청을 처리하는 스레드만 기록 (그룹 커밋 쓰기 스레드, bcrypt 프로세스 풀 안의 시간은 기다린 시간으로 보임)
+# 스트리밍 응답(GET /todos/stream)은 응답 헤더를 보내기 전까지만 기록
+# 꺼져 있거나 PROFILER_TOKEN이 비어 있으면 훅을 등록하지 않음 (요청 비용 0)
+# 여러 파일을 라우트별로 합치기 : flask --app app profile-report --route /todos
+
+DUMP_SUFFIX = '.collapsed'
+
+
+class StackProfiler :
+    """호출 경로(프레임 이름 튜플)별 자기 시간(ns) 누적기. 시작한 스레드에서만 동작"""
+
+    def __init__(self, root) :
+        self.stacks = Counter()
+        self._paths = [(root,)]
+        self._last = None
+
+    def start(self) :
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._event)
+
+    def stop(self) :
+        sys.setprofile(None)
+        self._account()
+
+    def _account(self) :
+        now = time.perf_counter_ns()
+        self.stacks[self._paths[-1]] += now - self._last
+        self._last = now
+
+    def _event(self, frame, event, arg) :
+        self._account()
+        if event == 'call' :
+            self._paths.append(self._paths[-1] + (_frame_name(frame),))
+        elif event == 'c_call' :
+            self._paths.append(self._paths[-1] + (_builtin_name(arg),))
+        elif len(self._paths) > 1 :
+            # return / c_return / c_exception. 기록을 시작하기 전에 들어간 함수의 반환은 무시
+            self._paths.pop()
+
+    def lines(self) :
+        """collapsed stack 줄 목록 ('a;b;c 마이크로초'). 1µs 미만 경로는 제외"""
+        return [f'{";".join(path)} {nanoseconds // 1000}'
+                for path, nanoseconds in self.stacks.items() if nanoseconds >= 1000]
+
+
+def _frame_name(frame) :
+    code = frame.f_code
+    return _clean(f'{frame.f_globals.get("__name__", "?")}.{code.co_qualname}')
+
+
+def _builtin_name(function) :
+    # 내장 함수는 __module__, C 타입의 메서드(sqlite3.Cursor.execute 등)는 객체 타입의 모듈
+    module = getattr(function, '__module__', None) or type(getattr(function, '__self__', None)).__module__
+    return _clean(f'{module}.{getattr(function, "__qualname__", repr(function))}')
+
+
+def _clean(name) :
+    # ';'는 프레임 구분자, 줄바꿈은 줄 구분자
+    return name.replace(';', ':').replace('\n', ' ')
+
+
+class Profiler :
+    """관리자 헤더가 붙은 요청만 StackProfiler로 기록해서 파일로 저장"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('PROFILER_ENABLED', False)
+        app.config.setdefault('PROFILER_TOKEN', '')
+        app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+        app.config.setdefault('PROFILER_DIR', 'profiles')
+        self.app = app
+        if not self.enabled :
+            return   # 요청 훅을 등록하지 않음
+
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abort)
+
+    @property
+    def enabled(self) :
+        # 토큰 없이 켜면 아무나 프로파일링을 요청할 수 있으므로 꺼진 것으로 취급
+        return bool(self.app.config['PROFILER_ENABLED'] and self.app.config['PROFILER_TOKEN'])
+
+    @property
+    def directory(self) :
+        return os.path.join(self.app.root_path, self.app.config['PROFILER_DIR'])
+
+    def _requested(self) :
+        token = request.headers.get(self.app.config['PROFILER_HEADER'])
+        return token is not None and hmac.compare_digest(token.encode(), self.app.config['PROFILER_TOKEN'].encode())
+
+    def _start(self) :
+        if self._requested() :
+            g.profiler = StackProfiler(route_name())
+            g.profiler.start()
+
+    def _finish(self, response) :
+        profiler = g.pop('profiler', None)
+        if profiler is not None :
+            profiler.stop()
+            response.headers['X-Profile-Dump'] = self._dump(profiler)
+        return response
+
+    def _abort(self, error) :
+        # 처리되지 않은 예외로 after_request가 불리지 않은 경우 기록만 멈춤
+        profiler = g.pop('profiler', None)
+        if profiler is not None :
+            profiler.stop()
+
+    def _dump(self, profiler) :
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route_name()).strip('_')
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{slug}-{uuid.uuid4().hex[:8]}{DUMP_SUFFIX}'
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as file :
+            file.write('\n'.join(profiler.lines()) + '\n')
+        return name
+
+
+def route_name() :
+    """'메서드 URL 규칙' (예 : GET /todos/<int:todo_id>). 규칙이 없으면 경로"""
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f'{request.method} {rule}'
+
+
+def aggregate_dumps(directory, route=None) :
+    """directory의 collapsed 파일들을 합쳐서 (경로별 µs Counter, 합친 파일 수)
+    route가 있으면 그 라우트만 ('/todos' 또는 'GET /todos')"""
+    stacks = Counter()
+    dumps = 0
+    for name in sorted(os.listdir(directory)) :
+        if not name.endswith(DUMP_SUFFIX) :
+            continue
+        matched = False
+        with open(os.path.join(directory, name), encoding='utf-8') as file :
+            for line in file :
+                path, _, count = line.rstrip('\n').rpartition(' ')
+                if not path :
+                    continue
+                root = path.split(';', 1)[0]
+                if route is not None and route not in (root, root.partition(' ')[2]) :
+                    continue
+                stacks[path] += int(count)
+                matched = True
+        dumps += matched
+    return stacks, dumps
+
+
+def top_frames(stacks, limit) :
+    """자기 시간이 큰 프레임 [(이름, µs)] (경로의 마지막 프레임 기준)"""
+    frames = Counter()
+    for path, microseconds in stacks.items() :
+        frames[path.rsplit(';', 1)[-1]] += microseconds
+    return frames.most_common(limit)
@@ -0,0 +1,106 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+import query_timing
+
+# 느린 쿼리 로그 + N+1 쿼리 감지 (QUERY_LOG_ENABLED = True 일 때만)
+# db의 엔진에서 실행한 쿼리의 실행 시간을 받아서 (query_timing.py, metrics.py와 같은 측정값)
+#   - SLOW_QUERY_MS 이상 걸린 쿼리 : SQL, 파라미터, 실행한 라우트를 경고 로그로 남김
+#   - 한 요청 안에서 같은 모양의 SQL(파라미터만 다른 것)이 N_PLUS_ONE_THRESHOLD번을 넘으면 경고
+#     예 : 사용자 목록을 돌면서 user.todos(lazy 로딩)를 읽으면 사용자마다 SELECT가 한 번씩 실행됨
+# 꺼져 있으면 이벤트를 등록하지 않음 (요청 비용 0)
+# 테스트에서는 assert_max_queries로 엔드포인트의 쿼리 수 상한을 검사 (설정과 상관없이 사용 가능)
+
+PARAMETERS_MAX_LENGTH = 200   # 로그에 남기는 파라미터 길이 (긴 본문이 로그를 채우지 않도록)
+
+
+class QueryLog :
+    """느린 쿼리 / 반복 쿼리 감지기"""
+
+    def __init__(self, app=None, db=None) :
+        self.app = None
+        if app is not None :
+            self.init_app(app, db)
+
+    def init_app(self, app, db) :
+        app.config.setdefault('QUERY_LOG_ENABLED', False)
+        app.config.setdefault('SLOW_QUERY_MS', 100)
+        app.config.setdefault('N_PLUS_ONE_THRESHOLD', 10)
+        self.app = app
+        if not app.config['QUERY_LOG_ENABLED'] :
+            return
+
+        with app.app_context() :
+            self._engines = set(db.engines.values())
+        query_timing.add_listener(self._record_query)
+        app.after_request(self._check_repeats)
+
+    def _record_query(self, conn, statement, parameters, seconds) :
+        if conn.engine not in self._engines :
+            return   # 다른 앱의 엔진
+        elapsed_ms = seconds * 1000
+
+        if elapsed_ms >= self.app.config['SLOW_QUERY_MS'] :
+            self.app.logger.warning('느린 쿼리 %.1fms [%s] %s 파라미터=%s',
+                                    elapsed_ms, current_route(), statement, _short(parameters))
+
+        if has_request_context() :
+            shapes = g.get('query_shapes')
+            if shapes is None :
+                shapes = g.query_shapes = Counter()
+            shapes[statement] += 1   # SQL 문자열은 파라미터가 ?로 되어 있어서 그대로 쿼리 모양
+
+    def _check_repeats(self, response) :
+        shapes = g.pop('query_shapes', None)
+        if shapes :
+            for statement, count in repeated_statements(shapes, self.app.config['N_PLUS_ONE_THRESHOLD']) :
+                self.app.logger.warning('N+1 쿼리 의심 [%s] 같은 쿼리 %d번 실행: %s', current_route(), count, statement)
+        return response
+
+
+def repeated_statements(shapes, threshold) :
+    """{SQL: 실행 횟수}에서 threshold번을 넘게 실행된 것만 [(SQL, 횟수)] (많은 순)"""
+    return [(statement, count) for statement, count in shapes.most_common() if count > threshold]
+
+
+def current_route() :
+    """로그용 현재 요청 '메서드 URL 규칙' (요청 밖이면 '-')"""
+    if not has_request_context() :
+        return '-'
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f'{request.method} {rule}'
+
+
+def _short(parameters) :
+    text = repr(parameters)
+    return text if len(text) <= PARAMETERS_MAX_LENGTH else text[:PARAMETERS_MAX_LENGTH] + '...'
+
+
+@contextmanager
+def count_queries() :
+    """with 블록 안에서 현재 스레드가 실행한 SQL 목록 (모든 엔진). 테스트용"""
+    statements = []
+    thread_id = threading.get_ident()   # 그룹 커밋 쓰기 스레드 등 다른 스레드의 쿼리는 제외
+
+    def record(conn, statement, parameters, seconds) :
+        if threading.get_ident() == thread_id :
+            statements.append(statement)
+
+    query_timing.add_listener(record)
+    try :
+        yield statements
+    finally :
+        query_timing.remove_listener(record)
+
+
+@contextmanager
+def assert_max_queries(limit) :
+    """with 블록 안의 쿼리가 limit개를 넘으면 AssertionError (실행된 SQL 목록 포함). 테스트용"""
+    with count_queries() as statements :
+        yield statements
+    assert len(statements) <= limit, (
+        f'쿼리 {len(statements)}개 실행 (최대 {limit}개)\n' + '\n'.join(statements)
+    )
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 쿼리 실행 시간 측정 (metrics.py 요청 지표, query_log.py 느린 쿼리 로그가 같이 사용)
+# 모든 엔진(Engine 클래스 : 기본, 읽기 전용, 샤드)에 before / after_cursor_execute 이벤트를 한 번만 등록하고,
+# 쿼리가 끝나면 add_listener로 등록한 함수를 listener(conn, statement, parameters, seconds)로 호출
+# -> 기능을 여러 개 켜도 쿼리마다 시간은 한 번만 잼
+# 등록한 함수가 없으면 이벤트도 등록하지 않음 (쿼리 비용 0)
+
+_listeners = ()   # 쿼리마다 읽으므로 잠금 없이 읽을 수 있게 튜플을 통째로 교체
+_lock = threading.Lock()
+
+
+def add_listener(listener) :
+    """쿼리가 끝날 때마다 listener(conn, statement, parameters, seconds) 호출 (쿼리를 실행한 스레드에서)"""
+    global _listeners
+    with _lock :
+        if listener in _listeners :
+            return
+        if not _listeners :
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+        _listeners += (listener,)
+
+
+def remove_listener(listener) :
+    global _listeners
+    with _lock :
+        if listener not in _listeners :
+            return
+        _listeners = tuple(registered for registered in _listeners if registered != listener)
+        if not _listeners :
+            event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.remove(Engine, 'handle_error', _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) :
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) :
+    started = conn.info.get('query_started')
+    if not started :
+        return   # 이벤트를 등록하기 전에 시작한 쿼리
+    seconds = time.perf_counter() - started.pop()
+    for listener in _listeners :
+        listener(conn, statement, parameters, seconds)
+
+
+def _handle_error(context) :
+    # 실패한 쿼리는 after_cursor_execute가 불리지 않으므로 시작 시각만 제거
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started :
+        started.pop()
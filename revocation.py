@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from models import db, RevokedToken
+
+# 토큰 폐기(로그아웃) 목록
+# JWT는 서버에 세션을 저장하지 않아서 만료 전에 무효화하려면 폐기된 jti(토큰 고유 ID) 목록이 필요
+# 모든 요청마다 DB를 조회하면 CRUD 요청의 쿼리 수가 두 배가 되므로
+#   1. 프로세스 메모리의 블룸 필터로 먼저 확인 -> "확실히 없음"이면 DB 조회 없이 통과
+#   2. 블룸 필터에 걸린 경우에만 revoked_tokens 테이블 조회 (오탐 가능성이 있으므로)
+# 다른 워커 프로세스에서 폐기한 토큰은 REVOCATION_SYNC_SECONDS마다 새로 추가된 행만 읽어와 반영
+# 만료된 토큰은 어차피 거부되므로 REVOCATION_PRUNE_SECONDS마다 블룸 필터를 만료되지 않은 기록으로만 다시 만듦
+# 토큰 확인(is_revoked)은 읽기만 함 -> GET 요청은 읽기 전용 연결(query_only)을 쓰고, DB가 잠겨 있어도 실패하지 않음
+# 만료된 행 삭제는 쓰기 경로에서만 : 폐기(revoke)할 때 REVOCATION_PRUNE_SECONDS마다 한 번 + flask prune-tokens 명령어
+
+
+class BloomFilter :
+    """블룸 필터 : '없음'은 확실, '있음'은 가끔 틀릴 수 있는 작은 집합"""
+
+    def __init__(self, size_bits, num_hashes) :
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, item) :
+        # 해시 두 개로 k개의 위치를 만드는 방식 (double hashing)
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.num_hashes)]
+
+    def add(self, item) :
+        for position in self._positions(item) :
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item) :
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList :
+    """폐기된 JWT 목록 (DB 저장 + 블룸 필터 캐시)"""
+
+    def __init__(self, app=None) :
+        self.app = None
+        self._bloom = None
+        self._last_id = 0          # 블룸 필터에 반영한 마지막 revoked_tokens.id
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0   # 블룸 필터를 만료되지 않은 기록으로 다시 만든 시각
+        self._last_prune = 0.0     # 만료된 행을 마지막으로 삭제한 시각 (이 프로세스 기준)
+        self._lock = threading.Lock()
+        if app is not None :
+            self.init_app(app)
+
+    def init_app(self, app) :
+        app.config.setdefault('REVOCATION_BLOOM_BITS', 1 << 20)
+        app.config.setdefault('REVOCATION_BLOOM_HASHES', 7)
+        app.config.setdefault('REVOCATION_SYNC_SECONDS', 5)
+        app.config.setdefault('REVOCATION_PRUNE_SECONDS', 3600)
+        self.app = app
+
+    def _load(self, bloom, last_id) :
+        """revoked_tokens에서 id > last_id인 jti를 bloom에 넣고 마지막 id 반환. SELECT만 실행"""
+        # 만료된 기록은 건너뜀 (삭제되기 전이어도 블룸 필터에 넣지 않음)
+        rows = db.session.execute(
+            db.select(RevokedToken.id, RevokedToken.jti)
+            .where(RevokedToken.id > last_id, RevokedToken.expires_at >= datetime.now())
+            .order_by(RevokedToken.id)
+        ).all()
+        for row_id, jti in rows :
+            bloom.add(jti)
+            last_id = row_id
+        return last_id
+
+    def _sync(self) :
+        # 다른 프로세스에서 추가된 폐기 기록을 블룸 필터에 반영 (일정 시간마다 한 번)
+        now = time.monotonic()
+        if self._bloom is not None and now - self._last_sync < self.app.config['REVOCATION_SYNC_SECONDS'] :
+            return
+
+        with self._lock :
+            if self._bloom is None or now - self._last_rebuild >= self.app.config['REVOCATION_PRUNE_SECONDS'] :
+                # 블룸 필터는 항목 삭제가 불가능해서 만료된 jti를 빼려면 처음부터 다시 만듦
+                # is_revoked는 잠금 없이 self._bloom을 읽으므로 새 필터를 다 채운 뒤에 교체 (빈 필터가 보이지 않게)
+                config = self.app.config
+                bloom = BloomFilter(config['REVOCATION_BLOOM_BITS'], config['REVOCATION_BLOOM_HASHES'])
+                last_id = self._load(bloom, 0)
+                self._bloom, self._last_id = bloom, last_id
+                self._last_rebuild = now
+            else :
+                self._last_id = self._load(self._bloom, self._last_id)
+            self._last_sync = now
+
+    def prune(self) :
+        """만료된 폐기 기록 삭제. 삭제한 행 수 반환 (커밋은 호출한 쪽에서)"""
+        self._last_prune = time.monotonic()
+        return db.session.execute(
+            db.delete(RevokedToken).where(RevokedToken.expires_at < datetime.now())
+        ).rowcount
+
+    def revoke(self, jti, expires_at) :
+        """토큰 폐기 기록 추가 (커밋은 호출한 쪽에서)"""
+        self._sync()
+        # 이미 쓰기 트랜잭션이므로 만료된 기록 삭제도 같이 (REVOCATION_PRUNE_SECONDS마다 한 번)
+        if time.monotonic() - self._last_prune >= self.app.config['REVOCATION_PRUNE_SECONDS'] :
+            self.prune()
+        db.session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        with self._lock :
+            self._bloom.add(jti)   # 같은 프로세스에서는 바로 반영
+
+    def is_revoked(self, jti) :
+        """폐기된 토큰인지 확인. 블룸 필터에 없으면 DB 조회 없이 False"""
+        self._sync()
+        if jti not in self._bloom :
+            return False
+        return db.session.scalar(
+            db.select(RevokedToken.id).where(RevokedToken.jti == jti)
+        ) is not None
@@ -0,0 +1,126 @@
+import re
+
+from sqlalchemy import DDL, case, column, event, literal_column, select, table
+
+# 할 일 전문 검색 (SQLite FTS5)
+# GET /todos로 전부 받아서 클라이언트에서 거르는 대신, 제목 / 설명을 단어 단위로 색인한 FTS5 가상 테이블에서 검색
+#   - todos_fts : contentless 테이블 (content=''). 본문은 todos에만 저장하고 색인(단어 -> 행 목록)만 보관
+#   - 색인의 rowid = (user_id << USER_SHIFT) + 할 일 id
+#     -> 한 사용자의 할 일이 rowid 한 구간에 모여 있어서 "rowid BETWEEN" 조건으로 그 구간만 읽음
+#        (다른 사용자의 할 일이 수백만 개여도 자주 나오는 단어 검색이 1ms 이하)
+#   - prefix='2 3 4' : 2 ~ 4글자 접두어 색인. 입력 중인 마지막 단어가 짧으면(PREFIX_MAX_LENGTH 이하) 접두어로 검색
+#     더 긴 접두어는 색인이 없어서 전체 사용자의 단어 목록을 합쳐야 함 (자주 나오는 단어면 수십 ms)
+#     -> 긴 단어는 단어 전체로 찾고, 접두어로 찾으려면 직접 *를 붙여야 함
+#   - todos 트리거로 추가 / 수정 / 삭제가 같은 트랜잭션 안에서 바로 반영
+#   - 순위 : 제목에 검색어가 모두 있는 할 일 먼저, 그 안에서는 최신순
+#     bm25는 단어마다 전체 테이블 기준 빈도(IDF)를 계산하느라 자주 나오는 단어에서 수십 ms가 걸려서 사용하지 않음
+# todos 테이블이 만들어질 때(db.create_all) 같이 생성. 이미 있는 DB는 ensure_index로 만들고 기존 할 일을 색인
+
+FTS_TABLE = 'todos_fts'
+USER_SHIFT = 40   # 할 일 id는 2^40 미만, user_id는 2^23 미만이어야 함
+MAX_TERMS = 16    # 검색어 단어 수 제한 (너무 긴 검색어로 느려지지 않게)
+PREFIX_MAX_LENGTH = 4   # prefix 색인의 가장 긴 길이
+
+# 검색어에서 단어만 추출 (unicode61 토크나이저처럼 문자 / 숫자만). 끝에 *가 붙으면 접두어 검색
+TERM = re.compile(r'[^\W_]+\*?')
+
+CREATE_FTS = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='', prefix='2 3 4', tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+FTS_ROWID = f'({{row}}.user_id << {USER_SHIFT}) + {{row}}.id'
+
+# contentless 테이블은 삭제할 때 원래 값을 그대로 넘겨야 함 ('delete' 명령)
+FTS_INSERT = f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, description)
+    VALUES ({FTS_ROWID.format(row='NEW')}, NEW.title, COALESCE(NEW.description, ''));
+"""
+FTS_DELETE = f"""
+    INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description)
+    VALUES ('delete', {FTS_ROWID.format(row='OLD')}, OLD.title, COALESCE(OLD.description, ''));
+"""
+
+FTS_TRIGGERS = {
+    'todos_fts_after_insert': ('AFTER INSERT', FTS_INSERT),
+    'todos_fts_after_delete': ('AFTER DELETE', FTS_DELETE),
+    # 완료 여부만 바뀔 때는 색인을 건드리지 않음
+    'todos_fts_after_update': ('AFTER UPDATE OF title, description, user_id', FTS_DELETE + FTS_INSERT),
+}
+
+# 검색 쿼리용 테이블 표현 (metadata에 넣지 않음 -> create_all이 일반 테이블로 만들지 않음)
+fts = table(FTS_TABLE, column('rowid'))
+fts_match = literal_column(FTS_TABLE).op('MATCH')
+
+
+def _create_statements() :
+    yield CREATE_FTS
+    for name, (timing, body) in FTS_TRIGGERS.items() :
+        yield f'CREATE TRIGGER IF NOT EXISTS {name} {timing} ON todos BEGIN {body} END'
+
+
+def listen(todos_table) :
+    """todos 테이블 생성 / 삭제 때 검색 색인도 같이 생성 / 삭제"""
+    # drop_all 후 create_all 하면 id가 다시 1부터 시작하므로 예전 색인이 남아 있으면 안 됨
+    event.listen(todos_table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+    for statement in _create_statements() :
+        event.listen(todos_table, 'after_create', DDL(statement))
+
+
+def ensure_index(engine) :
+    """검색 색인이 없는 기존 DB에 색인과 트리거를 만들고 기존 할 일을 색인"""
+    with engine.begin() as connection :
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).scalar()
+        if exists :
+            return False
+
+        for statement in _create_statements() :
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"""
+            INSERT INTO {FTS_TABLE} (rowid, title, description)
+            SELECT {FTS_ROWID.format(row='todos')}, title, COALESCE(description, '') FROM todos
+            ORDER BY user_id, id
+        """)
+    return True
+
+
+def build_match(query) :
+    """검색어 -> FTS5 MATCH 식. 단어가 없으면 ValueError
+
+    단어는 모두 포함(AND)해야 하고, 짧은 마지막 단어와 *로 끝나는 단어는 접두어로 검색
+    FTS5 문법 문자(따옴표, 괄호, NEAR 등)는 단어로만 취급되도록 따옴표로 감쌈
+    """
+    terms = TERM.findall(query)[:MAX_TERMS]
+    if not terms :
+        raise ValueError(query)
+
+    phrases = []
+    for index, term in enumerate(terms) :
+        word = term.rstrip('*')
+        prefix = term.endswith('*') or (index == len(terms) - 1 and len(word) <= PREFIX_MAX_LENGTH)
+        phrases.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(phrases)
+
+
+def search_hits(match, user_id) :
+    """사용자의 검색 결과 (id, tier) 서브쿼리. tier 0 : 제목에서 모두 찾음, 1 : 설명까지 합쳐서 찾음"""
+    low = user_id << USER_SHIFT
+    in_user = fts.c.rowid.between(low, low + (1 << USER_SHIFT) - 1)
+
+    title_hits = (
+        select(fts.c.rowid)
+        .where(fts_match(f'title : ({match})'), in_user)
+        .correlate(None)
+    )
+    return (
+        select(
+            (fts.c.rowid - low).label('id'),
+            case((fts.c.rowid.in_(title_hits), 0), else_=1).label('tier')
+        )
+        .where(fts_match(match), in_user)
+        .subquery('hits')
+    )
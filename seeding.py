@@ -0,0 +1,231 @@
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+
+import search
+from models import Todo, User, TODO_VERSION_TRIGGERS, TODO_CHANGE_TRIGGERS, TODO_STATS_TRIGGERS, TODO_DAILY_STATS_TRIGGERS
+
+# 벤치마크 / 재현용 대량 데이터 생성 (flask seed, benchmarks/load.py)
+# API로 만들면 사용자마다 bcrypt 해싱 + 할 일마다 요청 / 트리거 5개가 돌아서 수백만 행에 몇 시간이 걸림
+#   - 비밀번호 해시는 한 번만 만들어서 모든 사용자가 같이 사용
+#   - INSERT는 Core 테이블에서 컴파일한 문장 하나를 DB-API executemany로 (행마다 SQLAlchemy 바인드 처리를 거치면 4배 느림)
+#   - 한 트랜잭션 안에서 todos의 보조 인덱스와 파생 테이블 트리거를 지우고 넣은 뒤,
+#     인덱스는 한 번에 다시 만들고 파생 테이블(목록 버전, 변경 내역, 검색 색인, 통계)은 새 행만 집합 단위 INSERT ... SELECT로 채움
+#     트리거가 행마다 하던 일과 결과가 같음. 모르는 트리거는 지우지 않음 (행마다 실행되어 느려질 뿐 결과는 맞음)
+#     실패하면 롤백되어 인덱스 / 트리거도 그대로 (SQLite는 DDL도 트랜잭션으로 처리)
+#   - 외래키 검사는 이 연결에서만 끔 (방금 넣은 사용자만 참조하므로)
+# 같은 seed면 같은 사용자 / 할 일 (시각만 실행 시점 기준)
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'zipf')   # 사용자별 할 일 개수 분포
+ZIPF_EXPONENT = 1.1   # zipf : 순위 k인 사용자가 1 / k^1.1 비율 (소수의 사용자가 대부분의 할 일을 가짐)
+WORDS = ('report', 'meeting', 'review', 'deploy', 'invoice', 'groceries', 'workout', 'study', 'refactor',
+         'release', 'dentist', 'travel', 'budget', 'backup', 'interview', 'draft', 'laundry', 'call', 'email',
+         'plan', 'fix', 'write', 'read', 'book', 'pay', 'clean', 'update', 'prepare', 'check', 'order')
+
+# 검색 색인을 한꺼번에 채우는 동안만 세그먼트 병합을 미룸 (FTS5 기본값 : automerge 4, crisismerge 16)
+# 끝나면 원래 값으로 돌려서 이후 쓰기 때 조금씩 병합 (미루지 않으면 색인 시간이 2배 가까이 걸림)
+FTS_BULK_SETTINGS = {'automerge': (0, 4), 'crisismerge': (2000, 16)}   # 이름 : (채우는 동안, 기본값)
+
+# 트리거 이름 -> 새 행(id > :since)으로 파생 테이블을 채우는 문장 (models.py, search.py의 트리거와 같은 결과)
+# 트리거 묶음마다 INSERT 트리거가 DB에 있을 때만 실행
+BACKFILLS = (
+    (tuple(TODO_VERSION_TRIGGERS), ("""
+        INSERT INTO todo_list_versions (user_id, version)
+        SELECT user_id, COUNT(*) FROM todos WHERE id > :since GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET version = version + excluded.version
+    """,)),
+    (tuple(TODO_CHANGE_TRIGGERS), ("""
+        INSERT INTO todo_changes (todo_id, user_id, seq, deleted)
+        SELECT todos.id, todos.user_id,
+               COALESCE(last.seq, 0) + ROW_NUMBER() OVER (PARTITION BY todos.user_id ORDER BY todos.id), 0
+        FROM todos LEFT JOIN (SELECT user_id, MAX(seq) AS seq FROM todo_changes GROUP BY user_id) AS last
+            ON last.user_id = todos.user_id
+        WHERE todos.id > :since
+    """,)),
+    (tuple(search.FTS_TRIGGERS), (f"""
+        INSERT INTO {search.FTS_TABLE} (rowid, title, description)
+        SELECT {search.FTS_ROWID.format(row='todos')}, title, COALESCE(description, '') FROM todos
+        WHERE id > :since ORDER BY user_id, id
+    """,)),
+    (tuple(TODO_STATS_TRIGGERS), ("""
+        INSERT INTO todo_stats (user_id, total, completed)
+        SELECT user_id, COUNT(*), COALESCE(SUM(completed), 0) FROM todos WHERE id > :since GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET total = total + excluded.total, completed = completed + excluded.completed
+    """,)),
+    # 만든 날(created_at) + 완료한 날(updated_at, API로 만들고 나중에 완료한 것과 같은 기록)을 한 번에 묶어서 upsert
+    # 날짜는 앞 10글자 (seed가 넣은 행은 모두 'YYYY-MM-DD HH:MM:SS.ffffff' 형식이라 date()와 같고 파싱하지 않아서 빠름)
+    (tuple(TODO_DAILY_STATS_TRIGGERS), ("""
+        INSERT INTO todo_daily_stats (user_id, day, created, completed)
+        SELECT user_id, day, SUM(created), SUM(completed) FROM (
+            SELECT user_id, substr(created_at, 1, 10) AS day, 1 AS created, 0 AS completed FROM todos WHERE id > :since
+            UNION ALL
+            SELECT user_id, substr(updated_at, 1, 10), 0, 1 FROM todos WHERE id > :since AND completed
+        ) GROUP BY user_id, day
+        ON CONFLICT (user_id, day) DO UPDATE SET created = created + excluded.created,
+                                                 completed = completed + excluded.completed
+    """,)),
+)
+
+
+def todo_counts(rng, users, todos, distribution) :
+    """사용자별 할 일 개수 목록 (합계 = todos)"""
+    if distribution == 'fixed' :
+        weights = [1.0] * users
+    elif distribution == 'uniform' :
+        weights = [rng.random() for _ in range(users)]   # 평균의 0 ~ 2배
+    elif distribution == 'zipf' :
+        ranks = list(range(1, users + 1))
+        rng.shuffle(ranks)
+        weights = [1 / rank ** ZIPF_EXPONENT for rank in ranks]
+    else :
+        raise ValueError(f'알 수 없는 분포 : {distribution}')
+
+    scale = todos / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.sample(range(users), todos - sum(counts)) :   # 버림으로 남은 개수 (users개 미만)
+        counts[index] += 1
+    return counts
+
+
+@contextmanager
+def _fts_bulk_settings(connection) :
+    table = search.FTS_TABLE
+    saved = dict(connection.exec_driver_sql(f'SELECT k, v FROM {table}_config').all())
+    for name, (value, _) in FTS_BULK_SETTINGS.items() :
+        connection.exec_driver_sql(f'INSERT INTO {table} ({table}, rank) VALUES (?, ?)', (name, value))
+    yield
+    for name, (_, default) in FTS_BULK_SETTINGS.items() :
+        connection.exec_driver_sql(f'INSERT INTO {table} ({table}, rank) VALUES (?, ?)', (name, saved.get(name, default)))
+
+
+def _insert_sql(connection, table, columns) :
+    """Core 테이블의 INSERT를 이 DB 문법으로 컴파일 (값 순서 = 테이블 컬럼 순서)"""
+    compiled = table.insert().compile(dialect=connection.dialect, column_keys=columns)
+    if tuple(compiled.positiontup) != tuple(columns) :
+        raise RuntimeError(f'컬럼 순서가 다름 : {compiled.positiontup}')
+    return str(compiled)
+
+
+def _timestamps(start, end) :
+    """start ~ end 사이의 초(float, start 자정 기준) -> DateTime 컬럼 저장 형식 문자열 함수"""
+    midnight = datetime.combine(start.date(), datetime.min.time())
+    days = [(midnight + timedelta(days=day)).strftime('%Y-%m-%d ') for day in range((end - midnight).days + 1)]
+    clock = [f'{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}.000000' for second in range(86400)]
+
+    def format_seconds(seconds) :
+        seconds = int(seconds)
+        return days[seconds // 86400] + clock[seconds % 86400]
+
+    return (start - midnight).total_seconds(), (end - midnight).total_seconds(), format_seconds
+
+
+def seed_database(engine, password_hash, users, todos, distribution='uniform', completed_ratio=0.3,
+                  description_length=(0, 200), days=90, seed=0, prefix='seed', batch_size=50000) :
+    """사용자 users명과 할 일 todos개를 한 트랜잭션으로 추가. 단계별 시간과 초당 행 수를 dict로 반환
+    (rows_per_second : 인덱스 / 파생 테이블까지 다 만든 전체 시간 기준. 단계별로는 phases의 초)
+
+    사용자 이름은 '{prefix}{번호}' (번호는 기존 사용자 id 최댓값부터), 비밀번호는 모두 password_hash
+    할 일은 최근 days일 사이에 만든 것으로, 완료한 할 일은 만든 뒤 지금까지 사이에 완료한 것으로 기록
+    """
+    if users < 1 and todos > 0 :
+        raise ValueError('할 일을 넣으려면 사용자가 1명 이상 필요')
+    min_length, max_length = description_length
+    rng = random.Random(seed)
+    counts = todo_counts(rng, users, todos, distribution) if users else []
+
+    # 제목 / 설명 재료. 설명은 긴 본문에서 단어 시작 위치부터 잘라서 사용 (행마다 문자열을 조립하지 않음)
+    titles = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) for _ in range(4096)]
+    text = ' '.join(rng.choice(WORDS) for _ in range(20000))
+    starts = [0] + [index + 1 for index, char in enumerate(text[:-max_length - 1]) if char == ' ']
+
+    end = datetime.now().replace(microsecond=0)
+    low, high, format_seconds = _timestamps(end - timedelta(days=days), end)
+    span = high - low
+    timings = {}
+    started = time.perf_counter()
+
+    with engine.connect() as connection :
+        foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        connection.exec_driver_sql('PRAGMA foreign_keys = OFF')   # 트랜잭션 밖에서만 바뀜
+        connection.commit()
+        try :
+            with connection.begin() :
+                first_user = connection.exec_driver_sql('SELECT COALESCE(MAX(id), 0) FROM users').scalar()
+                since = connection.exec_driver_sql('SELECT COALESCE(MAX(id), 0) FROM todos').scalar()
+
+                # 보조 인덱스 / 알고 있는 트리거를 지움 (다시 만들 문장은 sqlite_master에서)
+                known = {name for names, _ in BACKFILLS for name in names}
+                schema = connection.exec_driver_sql(
+                    "SELECT type, name, sql FROM sqlite_master "
+                    "WHERE tbl_name = 'todos' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+                ).all()
+                dropped = [(kind, name, sql) for kind, name, sql in schema if kind == 'index' or name in known]
+                for kind, name, _ in dropped :
+                    connection.exec_driver_sql(f'DROP {kind.upper()} {name}')
+
+                user_columns = ('username', 'email', 'password', 'created_at')
+                if users :   # 빈 목록으로 executemany 하면 바인드 개수 오류
+                    connection.exec_driver_sql(_insert_sql(connection, User.__table__, user_columns), [
+                        (f'{prefix}{first_user + n}', f'{prefix}{first_user + n}@example.com', password_hash,
+                         format_seconds(low))
+                        for n in range(users)
+                    ])
+                user_ids = [row[0] for row in connection.exec_driver_sql(
+                    'SELECT id FROM users WHERE id > ? ORDER BY id', (first_user,))]
+
+                # 사용자 순서대로 넣어서 한 사용자의 할 일 id가 이어지게 (user_id로 시작하는 인덱스도 거의 순서대로 만들어짐)
+                todo_columns = ('title', 'description', 'completed', 'created_at', 'updated_at', 'user_id')
+                insert = _insert_sql(connection, Todo.__table__, todo_columns)
+                random_value = rng.random
+                title_count = len(titles)
+                start_count = len(starts)
+                length_range = max_length - min_length + 1
+                rows = []
+                for user_id, count in zip(user_ids, counts) :
+                    for _ in range(count) :
+                        created = low + random_value() * span
+                        completed = random_value() < completed_ratio
+                        updated = created + random_value() * (high - created) if completed else created
+                        start = starts[int(random_value() * start_count)]
+                        length = min_length + int(random_value() * length_range)
+                        rows.append((titles[int(random_value() * title_count)], text[start:start + length],
+                                     completed, format_seconds(created), format_seconds(updated), user_id))
+                        if len(rows) == batch_size :
+                            connection.exec_driver_sql(insert, rows)
+                            rows = []
+                if rows :
+                    connection.exec_driver_sql(insert, rows)
+                timings['insert'] = time.perf_counter() - started
+
+                phase_started = time.perf_counter()
+                for kind, _, sql in dropped :
+                    if kind == 'index' :
+                        connection.exec_driver_sql(sql)
+                timings['indexes'] = time.perf_counter() - phase_started
+
+                phase_started = time.perf_counter()
+                present = {name for kind, name, _ in dropped if kind == 'trigger'}
+                for names, statements in BACKFILLS :
+                    if names[0] not in present :   # INSERT 트리거가 있는 파생 테이블만
+                        continue
+                    bulk = _fts_bulk_settings(connection) if names == tuple(search.FTS_TRIGGERS) else nullcontext()
+                    with bulk :
+                        for statement in statements :
+                            connection.exec_driver_sql(statement, {'since': since})
+                for kind, _, sql in dropped :
+                    if kind == 'trigger' :
+                        connection.exec_driver_sql(sql)
+                timings['derived'] = time.perf_counter() - phase_started
+        finally :
+            connection.exec_driver_sql(f'PRAGMA foreign_keys = {int(foreign_keys)}')
+            connection.commit()
+
+    seconds = time.perf_counter() - started
+    return {
+        'users': users,
+        'todos': todos,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round((users + todos) / seconds) if seconds else None,
+        'phases': {name: round(value, 3) for name, value in timings.items()},
+    }
@@ -0,0 +1,315 @@
+import threading
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import Insert, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql.util import find_tables
+
+# 사용자별 샤딩 (DATABASE_SHARDS > 0 일 때만 사용)
+# SQLite는 파일 하나에 쓰기 잠금이 하나뿐이라, DB 파일 하나로는 인스턴스 전체가 한 번에 하나씩만 쓸 수 있음
+# 할 일 데이터를 user_id 기준으로 N개의 SQLite 파일(샤드)에 나눠 저장해서 쓰기 잠금도 N개로 나눔
+#   - 디렉터리 DB(DATABASE_NAME) : users, 토큰, user_shards(사용자 -> 샤드 배정)
+#   - 샤드 DB(SHARD_DATABASE_NAME) : todos와 todos 트리거가 관리하는 테이블 (SHARD_TABLES)
+# RoutingSession이 SHARD_TABLES를 쓰는 쿼리를 현재 사용자(g.user_id)의 샤드 엔진으로 보냄
+# -> app.py의 엔드포인트는 그대로 db.session을 사용
+#
+# 할 일 id는 디렉터리 DB의 id_sequences에서 SHARD_ID_BLOCK_SIZE개씩 묶음으로 받아와 프로세스 안에서 나눠줌 (hi/lo 방식)
+# -> 전체 샤드에서 겹치지 않고, id 하나마다 디렉터리 DB에 쓰지 않음
+# (샤드를 옮겨도 id가 그대로라 캐시 / ETag / 클라이언트가 가진 id가 계속 유효)
+# 대신 id 순서는 프로세스마다 받은 묶음에 따라 만든 순서와 조금 다를 수 있음
+# 다른 사용자의 할 일은 다른 샤드에 있을 수 있어서, 샤딩 모드에서는 403 대신 404로 응답
+#
+# 사용자 이동(move_user) / 재분배(plan_rebalance)는 관리 명령어(flask shard-move, shard-rebalance)로 실행
+# 샤드 배정은 프로세스마다 메모리에 보관하므로, 서버를 멈춘 상태에서 실행하거나 실행 후 워커를 재시작해야 함
+
+SHARD_BIND_PREFIX = 'shard'
+SHARD_TABLES = ('todos', 'todo_list_versions', 'todo_changes', 'todos_fts',   # todos_fts : 검색 색인 (search.py, todos와 같이 생성)
+                'todo_stats', 'todo_daily_stats')
+# 사용자를 옮길 때 트리거가 새로 만든 값 대신 원래 행을 그대로 복사하는 테이블 (변경 번호, 통계)
+COPIED_TABLES = ('todo_changes', 'todo_stats', 'todo_daily_stats')
+ID_TABLES = ('todos',)   # 샤드 전체에서 겹치지 않는 id를 발급하는 테이블
+
+
+def shard_bind_key(shard) :
+    return f'{SHARD_BIND_PREFIX}{shard}'
+
+
+class ShardRouter :
+    """사용자 -> 샤드 배정과 샤드 엔진 선택"""
+
+    def __init__(self, app=None, db=None) :
+        self.app = None
+        self.db = db
+        self._assignments = {}   # user_id -> shard (디렉터리 조회 결과 캐시)
+        self._id_blocks = {}     # 테이블 이름 -> [다음 id, 묶음 끝(미포함)]
+        self._directory = None   # 디렉터리 DB 엔진 (요청 밖의 쓰기 스레드에서도 쓰도록 보관)
+        self._lock = threading.Lock()
+        if app is not None :
+            self.init_app(app, db)
+
+    def init_app(self, app, db) :
+        app.config.setdefault('DATABASE_SHARDS', 0)
+        app.config.setdefault('SHARD_MOVE_CHUNK_SIZE', 500)
+        app.config.setdefault('SHARD_ID_BLOCK_SIZE', 1000)
+        self.app = app
+        self.db = db
+        app.extensions['sharding'] = self
+
+        if self.enabled :
+            with app.app_context() :
+                self._directory = db.engine
+                for shard in range(self.num_shards) :
+                    event.listen(self.engine(shard), 'before_execute', self._assign_ids, retval=True)
+
+    @property
+    def num_shards(self) :
+        return self.app.config['DATABASE_SHARDS']
+
+    @property
+    def enabled(self) :
+        return self.num_shards > 0
+
+    def engine(self, shard) :
+        return self.db.engines[shard_bind_key(shard)]
+
+    # 배정
+
+    def shard_of(self, user_id) :
+        """사용자가 배정된 샤드 번호. 처음 보는 사용자는 user_id % N으로 배정 후 디렉터리에 기록"""
+        shard = self._assignments.get(user_id)
+        if shard is not None :
+            return shard
+
+        from models import UserShard
+        table = UserShard.__table__
+        # 세션 밖의 별도 연결 사용 (get_bind 안에서 불리므로 세션을 쓰면 재귀 호출)
+        with self._directory.begin() as connection :
+            connection.execute(
+                sqlite_insert(table)
+                .values(user_id=user_id, shard=user_id % self.num_shards)
+                .on_conflict_do_nothing(index_elements=['user_id'])   # 다른 프로세스가 먼저 배정했으면 그대로 사용
+            )
+            shard = connection.scalar(self.db.select(table.c.shard).where(table.c.user_id == user_id))
+
+        with self._lock :
+            self._assignments[user_id] = shard
+        return shard
+
+    def forget(self, user_id=None) :
+        """캐시한 배정 삭제 (None이면 전부)"""
+        with self._lock :
+            if user_id is None :
+                self._assignments.clear()
+            else :
+                self._assignments.pop(user_id, None)
+
+    def engine_for(self, user_id) :
+        return self.engine(self.shard_of(user_id))
+
+    def current_engine(self) :
+        """현재 요청 사용자(g.user_id)의 샤드 엔진"""
+        user_id = g.get('user_id')
+        if user_id is None :
+            raise RuntimeError('샤딩 모드에서는 할 일 쿼리 전에 사용자를 정해야 합니다 (g.user_id)')
+        return self.engine_for(user_id)
+
+    # id 발급
+
+    def next_id(self, name) :
+        """name 테이블의 다음 id. 묶음을 다 쓰면 디렉터리 DB에서 새 묶음을 받아옴"""
+        with self._lock :
+            block = self._id_blocks.get(name)
+            if block is None or block[0] >= block[1] :
+                block = self._id_blocks[name] = self._reserve_ids(name)
+            block[0] += 1
+            return block[0] - 1
+
+    def _assign_ids(self, connection, statement, multiparams, params, execution_options) :
+        # 샤드 엔진의 INSERT INTO todos에 id가 없으면 채워 넣음
+        # ORM(flush)과 Core(가져오기, 일괄 처리, 그룹 커밋) 경로가 모두 여기를 지나감
+        if not (isinstance(statement, Insert) and statement.table.name in ID_TABLES) :
+            return statement, multiparams, params
+
+        name = statement.table.name
+        if multiparams :
+            multiparams = [row if row.get('id') is not None else {**row, 'id': self.next_id(name)}
+                           for row in multiparams]
+        elif params.get('id') is None :
+            params = {**params, 'id': self.next_id(name)}
+        return statement, multiparams, params
+
+    def _reserve_ids(self, name) :
+        from models import IdSequence
+        table = IdSequence.__table__
+        size = self.app.config['SHARD_ID_BLOCK_SIZE']
+        with self._directory.begin() as connection :
+            connection.execute(
+                sqlite_insert(table).values(name=name, next_id=1).on_conflict_do_nothing(index_elements=['name'])
+            )
+            # UPDATE ... RETURNING 한 문장이라 여러 프로세스가 동시에 받아도 묶음이 겹치지 않음
+            end = connection.scalar(
+                self.db.update(table).where(table.c.name == name)
+                .values(next_id=table.c.next_id + size)
+                .returning(table.c.next_id)
+            )
+        return [end - size, end]
+
+    # 테이블 생성
+
+    def create_all(self) :
+        """디렉터리 DB에는 SHARD_TABLES를 뺀 테이블, 각 샤드에는 SHARD_TABLES만 생성"""
+        metadata = self.db.metadata
+        if not self.enabled :
+            self.db.create_all()
+            return
+
+        shard_tables = [table for table in metadata.sorted_tables if table.name in SHARD_TABLES]
+        directory_tables = [table for table in metadata.sorted_tables if table.name not in SHARD_TABLES]
+        metadata.create_all(bind=self.db.engine, tables=directory_tables)
+
+        for shard in range(self.num_shards) :
+            with self.engine(shard).begin() as connection :
+                metadata.create_all(bind=connection, tables=shard_tables)
+
+    def todo_engines(self) :
+        """todos 테이블이 있는 엔진 목록 (샤딩 모드가 아니면 기본 엔진 하나)"""
+        if not self.enabled :
+            return [self.db.engine]
+        return [self.engine(shard) for shard in range(self.num_shards)]
+
+    # 재분배
+
+    def user_loads(self) :
+        """{shard: {user_id: 할 일 개수}}"""
+        todos = self.db.metadata.tables['todos']
+        loads = {}
+        for shard in range(self.num_shards) :
+            with self.engine(shard).connect() as connection :
+                rows = connection.execute(
+                    self.db.select(todos.c.user_id, self.db.func.count())
+                    .group_by(todos.c.user_id)
+                ).all()
+            loads[shard] = dict(rows)
+        return loads
+
+    def plan_rebalance(self, loads=None) :
+        """할 일 개수가 비슷해지도록 옮길 사용자 목록 [(user_id, 원래 샤드, 새 샤드, 개수)]"""
+        users = loads if loads is not None else self.user_loads()
+        users = {shard: dict(counts) for shard, counts in users.items()}
+        totals = {shard: sum(counts.values()) for shard, counts in users.items()}
+        moves = []
+
+        while True :
+            heavy = max(totals, key=totals.get)
+            light = min(totals, key=totals.get)
+            gap = totals[heavy] - totals[light]
+            # 옮겼을 때 두 샤드의 차이가 줄어드는 사용자 중 차이의 절반에 가장 가까운 사용자
+            # (0 < count < gap 이면 항상 차이가 줄어들어서 반복이 끝남)
+            candidates = [(abs(gap / 2 - count), user_id, count)
+                          for user_id, count in users[heavy].items() if 0 < count < gap]
+            if not candidates :
+                return moves
+
+            _, user_id, count = min(candidates)
+            moves.append((user_id, heavy, light, count))
+            users[light][user_id] = users[heavy].pop(user_id)
+            totals[heavy] -= count
+            totals[light] += count
+
+    def move_user(self, user_id, target) :
+        """사용자의 할 일을 target 샤드로 옮기고 옮긴 개수 반환"""
+        from models import UserShard
+        if not 0 <= target < self.num_shards :
+            raise ValueError(f'샤드 번호는 0 ~ {self.num_shards - 1} 사이여야 합니다.')
+
+        source = self.shard_of(user_id)
+        if source == target :
+            return 0
+
+        db = self.db
+        todos = db.metadata.tables['todos']
+        versions = db.metadata.tables['todo_list_versions']
+        copied = [db.metadata.tables[name] for name in COPIED_TABLES]
+        chunk_size = self.app.config['SHARD_MOVE_CHUNK_SIZE']
+        moved = 0
+
+        # 1. 새 샤드에 복사 (한 트랜잭션)
+        with self.engine(source).connect() as src, self.engine(target).begin() as dst :
+            source_version = src.scalar(db.select(versions.c.version).where(versions.c.user_id == user_id)) or 0
+
+            result = src.execution_options(yield_per=chunk_size).execute(
+                db.select(todos).where(todos.c.user_id == user_id).order_by(todos.c.id)
+            )
+            for rows in result.partitions() :
+                dst.execute(db.insert(todos), [row._asdict() for row in rows])
+                moved += len(rows)
+
+            # 변경 내역(삭제 기록 포함)과 통계는 트리거가 새로 만든 것 대신 원래 행 그대로 복사
+            # -> 클라이언트가 가진 since 값으로 계속 동기화 가능, 하루 단위 기록(완료한 날 등)도 그대로
+            for table in copied :
+                dst.execute(db.delete(table).where(table.c.user_id == user_id))
+                result = src.execution_options(yield_per=chunk_size).execute(
+                    db.select(table).where(table.c.user_id == user_id)
+                )
+                for rows in result.partitions() :
+                    dst.execute(db.insert(table), [row._asdict() for row in rows])
+
+            # 트리거가 새로 센 버전이 예전 ETag와 겹치지 않도록 이전 버전보다 크게 맞춤
+            upsert = sqlite_insert(versions).values(user_id=user_id, version=source_version + 1)
+            dst.execute(upsert.on_conflict_do_update(
+                index_elements=['user_id'],
+                set_={'version': db.func.max(versions.c.version, source_version) + 1}
+            ))
+
+        # 2. 디렉터리 갱신 -> 이후 쿼리는 새 샤드로
+        with db.engine.begin() as connection :
+            connection.execute(
+                db.update(UserShard.__table__).where(UserShard.user_id == user_id).values(shard=target)
+            )
+        with self._lock :
+            self._assignments[user_id] = target
+
+        # 3. 원래 샤드에서 삭제
+        with self.engine(source).begin() as src :
+            src.execute(db.delete(todos).where(todos.c.user_id == user_id))
+            src.execute(db.delete(versions).where(versions.c.user_id == user_id))
+            for table in copied :
+                src.execute(db.delete(table).where(table.c.user_id == user_id))
+
+        return moved
+
+    def delete_user(self, user_id) :
+        """사용자의 샤드에서 할 일과 관련 행 삭제 (디렉터리의 사용자 행은 호출한 쪽에서 삭제)
+        샤드 DB에는 users가 없어서 ON DELETE CASCADE가 닿지 않으므로 테이블마다 DELETE 한 번씩"""
+        db = self.db
+        todos = db.metadata.tables['todos']
+        # 할 일 먼저 (삭제 트리거가 쓰는 변경 내역 / 버전 / 통계를 그 뒤에 정리)
+        tables = [todos] + [db.metadata.tables[name] for name in SHARD_TABLES
+                            if name in db.metadata.tables and name != 'todos']
+        with self.engine(self.shard_of(user_id)).begin() as connection :
+            for table in tables :
+                connection.execute(db.delete(table).where(table.c.user_id == user_id))
+
+
+def _table_names(mapper, clause) :
+    if mapper is not None :
+        return {table.name for table in mapper.tables}
+    if clause is not None :
+        return {getattr(table, 'name', None) for table in find_tables(clause, check_columns=True, include_crud=True)}
+    return set()
+
+
+def route(mapper=None, clause=None) :
+    """SHARD_TABLES를 쓰는 쿼리면 현재 사용자의 샤드 엔진, 아니면 None (RoutingSession에서 사용)"""
+    if not has_app_context() :
+        return None
+    router = current_app.extensions.get('sharding')
+    if router is None or not router.enabled :
+        return None
+
+    names = _table_names(mapper, clause)
+    if not names.intersection(SHARD_TABLES) :
+        return None
+    if not names.issubset(SHARD_TABLES) :
+        raise ValueError(f'샤드 테이블과 디렉터리 테이블을 한 쿼리에서 같이 사용할 수 없습니다: {sorted(names)}')
+    return router.current_engine()
@@ -0,0 +1,124 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+import sharding
+
+# SQLite 운영용 엔진 설정
+# 기본 SQLite 설정(롤백 저널, 매 커밋마다 완전 동기화, 대기 없음)은 동시 쓰기에서 "database is locked"와 느린 fsync 발생
+# 새 연결이 만들어질 때마다 PRAGMA를 적용해서
+#   - journal_mode=WAL    : 읽기와 쓰기가 서로 막지 않음
+#   - synchronous=NORMAL  : WAL에서는 커밋마다 fsync 하지 않아도 DB가 깨지지 않음 (체크포인트 때 동기화)
+#   - busy_timeout        : 잠겨 있으면 바로 에러 대신 지정한 시간(ms)까지 기다림
+#   - mmap_size / cache_size / temp_store : 메모리 매핑, 페이지 캐시, 임시 테이블 위치
+#   - foreign_keys=ON     : 외래키 검사 + ON DELETE CASCADE 실행 (SQLite는 연결마다 켜야 함)
+#                           샤드 DB에는 users 테이블이 없어서 샤드 엔진에는 적용하지 않음
+# 조회(GET) 요청의 SELECT는 별도 읽기 전용 연결 풀('readonly' bind)로 보내서 쓰기 연결을 기다리지 않게 함
+# 읽기 전용 bind의 주소는 configure에서 앱의 SQLALCHEMY_DATABASE_URI로 채움 (config.py에 복사해 두면
+# 배포 / 테스트에서 기본 DB 주소만 바꿨을 때 GET이 쓰기와 다른 DB를 읽게 됨)
+
+READ_BIND = 'readonly'
+
+# PRAGMA 조회 결과는 숫자로 나오는 것이 있어서 비교용으로 변환
+PRAGMA_VALUES = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+    'foreign_keys': {'OFF': 0, 'ON': 1},
+}
+
+
+class RoutingSession(Session) :
+    """GET 요청의 SELECT는 읽기 전용 엔진, 나머지(INSERT / UPDATE / DELETE, flush)는 기본 엔진 사용
+    샤딩 모드에서는 할 일 테이블 쿼리를 현재 사용자의 샤드 엔진으로 보냄 (sharding.py)"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs) :
+        if bind is None :
+            engine = sharding.route(mapper, clause)
+            if engine is not None :
+                return engine
+        if (bind is None and not self._flushing and getattr(clause, 'is_select', False)
+                and has_request_context() and request.method in ('GET', 'HEAD')) :
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None :
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _engine_pragmas(key, pragmas) :
+    """bind key에 맞게 조정한 PRAGMA 목록"""
+    engine_pragmas = dict(pragmas)
+    if key == READ_BIND :
+        engine_pragmas['query_only'] = 1   # 읽기 전용 풀에서 실수로 쓰면 바로 에러
+    if key and key.startswith(sharding.SHARD_BIND_PREFIX) :
+        engine_pragmas.pop('foreign_keys', None)   # 참조하는 users가 디렉터리 DB에 있음
+    return engine_pragmas
+
+
+def _listen_pragmas(engine, pragmas) :
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record) :
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items() :
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def configure(app) :
+    """읽기 전용 bind의 주소를 기본 DB 주소로 설정. db.init_app 전에 호출
+    메모리 DB는 연결마다 DB가 달라서 읽기 전용 bind를 쓰지 않음"""
+    binds = app.config.get('SQLALCHEMY_BINDS') or {}
+    if READ_BIND not in binds :
+        return
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if make_url(uri).database in (None, '', ':memory:') :
+        app.config['SQLALCHEMY_BINDS'] = {key : value for key, value in binds.items() if key != READ_BIND}
+        return
+    app.config['SQLALCHEMY_BINDS'] = {**binds, READ_BIND : {**binds[READ_BIND], 'url' : uri}}
+
+
+def init_app(app, db) :
+    """엔진마다 PRAGMA 적용 등록. 첫 연결(db.create_all) 전에 호출해야 함
+    읽기 전용 엔진이 기본 엔진과 다른 DB를 가리키면 RuntimeError (configure 없이 주소를 따로 지정한 경우)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+
+    with app.app_context() :
+        readonly = db.engines.get(READ_BIND)
+        if readonly is not None and readonly.url.database != db.engine.url.database :
+            raise RuntimeError(f'읽기 전용 DB({readonly.url.database})가 기본 DB({db.engine.url.database})와 다릅니다.')
+        for key, engine in db.engines.items() :
+            if engine.dialect.name != 'sqlite' :
+                continue
+            _listen_pragmas(engine, _engine_pragmas(key, pragmas))
+
+
+def report(app, db) :
+    """엔진별로 실제 적용된 PRAGMA 값과 풀 설정을 확인해서 반환 + 로그 출력"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    result = {}
+
+    with app.app_context() :
+        for key, engine in db.engines.items() :
+            name = key or 'default'
+            if engine.dialect.name != 'sqlite' :
+                result[name] = {'dialect': engine.dialect.name}
+                continue
+
+            engine_pragmas = _engine_pragmas(key, pragmas)
+            with engine.connect() as connection :
+                actual = {
+                    pragma: connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+                    for pragma in list(pragmas) + ['query_only']
+                }
+
+            for pragma, wanted in engine_pragmas.items() :
+                expected = PRAGMA_VALUES.get(pragma, {}).get(str(wanted).upper(), wanted)
+                if str(actual[pragma]).lower() != str(expected).lower() :
+                    # 예 : 네트워크 드라이브나 :memory: DB에서는 WAL을 쓸 수 없음
+                    app.logger.warning('SQLite %s: PRAGMA %s=%s 요청, 실제 값 %s',
+                                       name, pragma, wanted, actual[pragma])
+
+            result[name] = {'pragmas': actual, 'pool': engine.pool.status()}
+            app.logger.info('SQLite %s 엔진 설정: %s', name, result[name])
+
+    return result
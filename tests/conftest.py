@@ -1,7 +1,8 @@
 # 테스트 설정
 
 import pytest
-from app import app, db
+from flask import Flask
+from app import app, db, cache
 from models import User, Todo
 
 @pytest.fixture
@@ -11,6 +12,7 @@ def client() :
     """테스트 Flask 클라이언트 생성"""
     app.config['TESTING'] = True   # 테스트 모드 활성화. Flask 내장함수
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory' # 메모리 DB사용. 테스트 끝나면 자동 삭제
+    app.config['BCRYPT_LOG_ROUNDS'] = 4   # 테스트는 해싱 비용을 최소로 해서 빠르게
 
     with app.test_client() as client:
     # with app.test_client()가 반환되는 값을 client라 명
@@ -18,6 +20,7 @@ def client() :
         with app.app_context() :
     # Flask에는 DB처럼 App context안에서만 접근 가능한 경우 존재. db.create_all() 하려면 필요
             db.create_all() # 테스트용 DB 테이블 생성
+        cache.clear()   # 이전 테스트의 조회 캐시 제거
         yield client
     # yield 기준으로 테스트 시작 전 / 후로 나눔
         with app.app_context():
@@ -86,4 +89,33 @@ def auth_client(client) :
             kwargs['headers']['Authorization'] = f'Bearer {self.token}'
             return self.client.delete(*args, **kwargs)
 
-    return AuthClient(client, token)
\ No newline at end of file
+    return AuthClient(client, token)
+
+@pytest.fixture
+def isolated_app(tmp_path) :
+    """메인 앱과 따로 설정하는 테스트용 Flask 앱을 만드는 함수
+
+    isolated_app(**config) : 설정을 넣은 새 앱. tmp_path의 빈 DB 파일에 테이블까지 생성
+    isolated_app(database = False, **config) : DB 없이 앱만 (확장 하나만 확인할 때)
+    확장(QueryLog, Profiler 등)은 돌려받은 앱에 직접 초기화. 테스트가 끝나면 세션 정리 + 엔진 닫음
+    """
+    apps = []
+
+    def make(database = True, **config) :
+        isolated = Flask(__name__)
+        isolated.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / f'isolated{len(apps)}.db'}"
+        isolated.config.update(config)
+        if database :
+            db.init_app(isolated)
+            with isolated.app_context() :
+                db.create_all(bind_key = None)   # 기본 DB만. 메인 앱의 bind(readonly, 샤드)는 이 앱에 없음
+            apps.append(isolated)
+        return isolated
+
+    yield make
+
+    for isolated in apps :
+        with isolated.app_context() :
+            db.session.remove()
+            for engine in db.engines.values() :
+                engine.dispose()
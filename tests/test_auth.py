@@ -3,6 +3,19 @@
 #           -> client_fixture 실행 -> 반환값 받기 -> test_register_success 반환값 호출
 # pytest를 실행할 경우 test_로 시작하는 함수를 찾아 실행한다.
 # 원래대로라면 def를 선언한다고 해서 실행되지는 않지만, pytest 사용법임
+import os
+import sys
+import types
+from datetime import datetime, timedelta
+import bcrypt as bcrypt_module
+from flask import Flask
+from app import app, bcrypt, metrics
+from hashing import HashPool, HashPoolBusy, hash_rounds
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db, User, Todo, RefreshToken, RevokedToken, TodoListVersion, TodoChange, TodoStats, TodoDailyStats
+from revocation import BloomFilter, RevocationList
+
 def test_register_success(client) :
     """회원가입 성공 테스트"""
     response = client.post('/register', json = {
@@ -91,4 +104,262 @@ def test_login_nonexistent_user(client) :
         'password' : '1234'
     })
 
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+def test_register_duplicate_email(client) :
+    """중복 email 테스트 (INSERT 한 번으로 UNIQUE 제약 위반 확인)"""
+    client.post('/register', json = {
+        'username' : 'user1',
+        'email' : 'same@test.com',
+        'password' : '1234'
+    })
+
+    response = client.post('/register', json = {
+        'username' : 'user2',
+        'email' : 'same@test.com',
+        'password' : '1234'
+    })
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Email already exists'
+
+def test_login_rehash_when_rounds_change(client, monkeypatch) :
+    """BCRYPT_LOG_ROUNDS가 바뀌면 로그인할 때 다시 해싱"""
+    client.post('/register', json = {
+        'username' : 'testuser',
+        'email' : 'test@test.com',
+        'password' : '1234'
+    })
+
+    monkeypatch.setitem(app.config, 'BCRYPT_LOG_ROUNDS', 5)
+    response = client.post('/login', json = {
+        'username' : 'testuser',
+        'password' : '1234'
+    })
+
+    assert response.status_code == 200
+    with app.app_context() :
+        assert hash_rounds(User.query.filter_by(username = 'testuser').first().password) == 5
+
+def test_login_hash_pool_busy(client, monkeypatch) :
+    """해싱 대기열이 꽉 차면 503 + Retry-After"""
+    def busy(*args) :
+        raise HashPoolBusy()
+    monkeypatch.setattr(bcrypt, 'check_password_hash', busy)
+
+    client.post('/register', json = {
+        'username' : 'testuser',
+        'email' : 'test@test.com',
+        'password' : '1234'
+    })
+    response = client.post('/login', json = {
+        'username' : 'testuser',
+        'password' : '1234'
+    })
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_refresh_token_rotation(client) :
+    """리프레시 토큰으로 재발급 + 이전 토큰 재사용 차단"""
+    client.post('/register', json = {
+        'username' : 'testuser',
+        'email' : 'test@test.com',
+        'password' : '1234'
+    })
+    login = client.post('/login', json = {
+        'username' : 'testuser',
+        'password' : '1234'
+    })
+    old_refresh = login.json['refresh_token']
+
+    # 재발급
+    response = client.post('/token/refresh', headers = {'Authorization' : f'Bearer {old_refresh}'})
+    assert response.status_code == 200
+    new_access = response.json['access_token']
+    new_refresh = response.json['refresh_token']
+
+    # 새 액세스 토큰 사용 가능
+    todos = client.get('/todos', headers = {'Authorization' : f'Bearer {new_access}'})
+    assert todos.status_code == 200
+
+    # 이미 사용한 리프레시 토큰 재사용 -> 거부 + 새 리프레시 토큰까지 폐기
+    reused = client.post('/token/refresh', headers = {'Authorization' : f'Bearer {old_refresh}'})
+    assert reused.status_code == 401
+    response = client.post('/token/refresh', headers = {'Authorization' : f'Bearer {new_refresh}'})
+    assert response.status_code == 401
+
+def test_refresh_token_prunes_expired(client) :
+    """로그인 / 재발급할 때 그 사용자의 만료된 리프레시 토큰 기록 삭제"""
+    client.post('/register', json = {
+        'username' : 'testuser',
+        'email' : 'test@test.com',
+        'password' : '1234'
+    })
+    with app.app_context() :
+        user_id = User.query.filter_by(username = 'testuser').first().id
+        db.session.add(RefreshToken(jti = 'expired', user_id = user_id, revoked = True,
+                                    expires_at = datetime.now() - timedelta(days = 1)))
+        db.session.commit()
+
+    refresh = client.post('/login', json = {
+        'username' : 'testuser',
+        'password' : '1234'
+    }).json['refresh_token']
+    client.post('/token/refresh', headers = {'Authorization' : f'Bearer {refresh}'})
+
+    with app.app_context() :
+        jtis = db.session.scalars(db.select(RefreshToken.jti)).all()
+    assert 'expired' not in jtis
+    assert len(jtis) == 2   # 로그인 때 발급 (폐기됨, 만료 전) + 재발급
+
+def test_revoke_refresh_token(client) :
+    """리프레시 토큰 폐기 후 재발급 불가"""
+    client.post('/register', json = {
+        'username' : 'testuser',
+        'email' : 'test@test.com',
+        'password' : '1234'
+    })
+    refresh = client.post('/login', json = {
+        'username' : 'testuser',
+        'password' : '1234'
+    }).json['refresh_token']
+
+    response = client.post('/token/revoke', headers = {'Authorization' : f'Bearer {refresh}'})
+    assert response.status_code == 200
+
+    response = client.post('/token/refresh', headers = {'Authorization' : f'Bearer {refresh}'})
+    assert response.status_code == 401
+
+def test_logout(auth_client) :
+    """로그아웃 후 같은 토큰 사용 불가"""
+    assert auth_client.get('/todos').status_code == 200
+
+    response = auth_client.post('/logout')
+    assert response.status_code == 200
+
+    response = auth_client.get('/todos')
+    assert response.status_code == 401
+
+def test_revocation_check_is_read_only(auth_client, monkeypatch) :
+    """토큰 확인(GET 요청)은 DB에 쓰지 않고, 만료된 기록은 쓰기 경로 / prune-tokens에서만 삭제"""
+    from app import revocation
+    with app.app_context() :
+        db.session.add(RevokedToken(jti = 'expired', expires_at = datetime.now() - timedelta(days = 1)))
+        db.session.commit()
+
+    monkeypatch.setattr(revocation, '_last_rebuild', 0.0)
+    monkeypatch.setattr(revocation, '_last_sync', 0.0)
+    statements = []
+    def on_execute(conn, cursor, statement, parameters, context, executemany) :
+        statements.append(statement)
+    event.listen(Engine, 'before_cursor_execute', on_execute)
+    try :
+        assert auth_client.get('/todos').status_code == 200
+    finally :
+        event.remove(Engine, 'before_cursor_execute', on_execute)
+    assert not [statement for statement in statements if not statement.lstrip().upper().startswith('SELECT')]
+
+    result = app.test_cli_runner().invoke(args = ['prune-tokens'])
+    assert '폐기 기록 1개' in result.output
+    with app.app_context() :
+        assert db.session.scalar(db.select(RevokedToken.id).where(RevokedToken.jti == 'expired')) is None
+
+def test_revocation_sync_after_prune(client) :
+    """가장 큰 id의 기록을 삭제한 뒤 폐기한 토큰도 다른 프로세스(다른 RevocationList)가 읽어감"""
+    with app.app_context() :
+        first, second = RevocationList(app), RevocationList(app)
+        future = datetime.now() + timedelta(hours = 1)
+        first.revoke('old1', future)
+        first.revoke('old2', future)
+        db.session.commit()
+        assert second.is_revoked('old2')   # second는 id 2까지 읽음
+
+        db.session.execute(db.update(RevokedToken).values(expires_at = datetime.now() - timedelta(days = 1)))
+        assert first.prune() == 2   # 두 기록 모두 만료되어 삭제
+        first.revoke('new', future)
+        db.session.commit()
+
+        assert db.session.scalar(db.select(RevokedToken.id).where(RevokedToken.jti == 'new')) == 3
+        second._last_sync = 0.0   # 다음 확인 때 동기화
+        assert second.is_revoked('new')
+
+def test_revocation_rebuild_keeps_filter_until_filled(client) :
+    """블룸 필터를 다시 만드는 동안(SELECT 중)에도 다른 스레드에는 채워진 필터가 보임"""
+    with app.app_context() :
+        revocation = RevocationList(app)
+        revocation.revoke('revoked', datetime.now() + timedelta(hours = 1))
+        db.session.commit()
+
+        revocation._last_rebuild = revocation._last_sync = 0.0   # 다음 확인 때 다시 만듦
+        seen = []
+        def on_execute(conn, cursor, statement, parameters, context, executemany) :
+            if 'revoked_tokens' in statement :
+                seen.append('revoked' in revocation._bloom)
+        event.listen(Engine, 'before_cursor_execute', on_execute)
+        try :
+            assert revocation.is_revoked('revoked')
+        finally :
+            event.remove(Engine, 'before_cursor_execute', on_execute)
+        assert seen and all(seen)
+
+def test_delete_account(client, auth_client) :
+    """회원 탈퇴 : 사용자와 모든 데이터가 CASCADE로 삭제되고, 같은 토큰은 사용 불가"""
+    for i in range(3) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    # 다른 사용자의 데이터는 그대로
+    client.post('/register', json = {'username' : 'other', 'email' : 'other@test.com', 'password' : '1234'})
+    other_token = client.post('/login', json = {'username' : 'other', 'password' : '1234'}).json['access_token']
+    client.post('/todos', json = {'title' : 'other'}, headers = {'Authorization' : f'Bearer {other_token}'})
+
+    response = auth_client.delete('/users/me')
+    assert response.status_code == 200
+
+    with app.app_context() :
+        assert db.session.get(User, 1) is None
+        for model in (Todo, RefreshToken, TodoListVersion, TodoChange, TodoStats, TodoDailyStats) :
+            assert db.session.scalar(db.select(db.func.count()).select_from(model).where(model.user_id == 1)) == 0
+        assert db.session.scalar(db.select(db.func.count()).select_from(Todo)) == 1
+
+    assert auth_client.get('/todos').status_code == 401
+    assert client.post('/login', json = {'username' : 'testuser', 'password' : 'testpass'}).status_code == 401
+
+    # 같은 이름으로 다시 가입해도 예전 id를 다시 받지 않음
+    response = client.post('/register', json = {'username' : 'testuser', 'email' : 'test@test.com', 'password' : 'x'})
+    assert response.json['data']['id'] == 3
+
+def test_hash_pool_worker_skips_main_module(monkeypatch) :
+    """python app.py로 실행해도 해싱 워커는 app 모듈을 다시 실행하지 않음"""
+    main = types.ModuleType('__main__')
+    main.__file__ = os.path.join(app.root_path, 'app.py')   # 스크립트로 실행한 __main__
+    monkeypatch.setitem(sys.modules, '__main__', main)
+
+    pool = HashPool(Flask(__name__))
+    pool.app.config['BCRYPT_POOL_WORKERS'] = 1
+    try :
+        loaded = pool._start().submit(eval, "sorted({'app', 'flask', 'sqlalchemy'} & set(__import__('sys').modules))")
+        assert loaded.result(timeout = 30) == []
+        assert pool.check_password_hash(bcrypt_module.hashpw(b'1234', bcrypt_module.gensalt(4)).decode(), '1234')
+    finally :
+        pool.shutdown()
+    assert sys.modules['__main__'] is main
+
+def test_bloom_filter() :
+    """블룸 필터 : 추가한 값은 항상 있음"""
+    bloom = BloomFilter(1 << 12, 5)
+    jtis = [f'jti-{i}' for i in range(100)]
+    for jti in jtis :
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in jtis)
+    assert 'not-added' not in bloom
+
+def test_bcrypt_metrics(client) :
+    """회원가입 / 로그인의 bcrypt 시간은 따로 기록"""
+    metrics.reset()
+    client.post('/register', json = {'username' : 'testuser', 'email' : 'test@test.com', 'password' : '1234'})
+    client.post('/login', json = {'username' : 'testuser', 'password' : '1234'})
+
+    text = client.get('/metrics').get_data(as_text = True)
+    assert 'todo_http_request_phase_seconds_count{route="/register",phase="bcrypt"} 1' in text
+    assert 'todo_http_request_phase_seconds_count{route="/login",phase="bcrypt"} 1' in text
@@ -0,0 +1,91 @@
+# 요청 단위 프로파일러 테스트
+import os
+import pytest
+from app import app
+from profiler import Profiler, aggregate_dumps, top_frames
+
+def busy(n) :
+    return sum(i * i for i in range(n))
+
+@pytest.fixture
+def profiled_app(isolated_app, tmp_path) :
+    """PROFILER_ENABLED인 테스트용 앱 (DB 없음)"""
+    profiled = isolated_app(database = False, PROFILER_ENABLED = True, PROFILER_TOKEN = 'admin-secret',
+                            PROFILER_DIR = str(tmp_path / 'profiles'))
+    Profiler(profiled)
+
+    @profiled.route('/work/<int:n>')
+    def work(n) :
+        return {'result' : busy(n)}
+
+    return profiled
+
+def test_profile_requires_admin_header(profiled_app) :
+    """헤더가 없거나 토큰이 틀리면 기록하지 않음"""
+    client = profiled_app.test_client()
+    directory = profiled_app.config['PROFILER_DIR']
+
+    assert 'X-Profile-Dump' not in client.get('/work/10').headers
+    assert 'X-Profile-Dump' not in client.get('/work/10', headers = {'X-Profile' : 'wrong'}).headers
+    assert os.listdir(directory) == []
+
+def test_profile_dump(profiled_app) :
+    """관리자 헤더가 붙은 요청은 라우트를 맨 앞 프레임으로 한 collapsed stack 파일 저장"""
+    response = profiled_app.test_client().get('/work/20000', headers = {'X-Profile' : 'admin-secret'})
+
+    assert response.status_code == 200
+    name = response.headers['X-Profile-Dump']
+    with open(os.path.join(profiled_app.config['PROFILER_DIR'], name), encoding = 'utf-8') as file :
+        lines = file.read().splitlines()
+
+    assert lines
+    for line in lines :
+        path, count = line.rsplit(' ', 1)
+        assert path.startswith('GET /work/<int:n>')
+        assert int(count) >= 1
+    assert any('test_profiler.busy' in line for line in lines)   # 뷰 함수 안에서 부른 함수까지 기록
+
+def test_profile_aggregate(profiled_app) :
+    """여러 요청의 프로파일을 라우트별로 합침"""
+    client = profiled_app.test_client()
+    for _ in range(3) :
+        client.get('/work/1000', headers = {'X-Profile' : 'admin-secret'})
+    client.get('/missing', headers = {'X-Profile' : 'admin-secret'})
+    directory = profiled_app.config['PROFILER_DIR']
+
+    stacks, dumps = aggregate_dumps(directory, '/work/<int:n>')
+    assert dumps == 3
+    assert all(path.startswith('GET /work/<int:n>') for path in stacks)
+    assert aggregate_dumps(directory, 'GET /work/<int:n>')[1] == 3
+    assert aggregate_dumps(directory)[1] == 4
+    frames = top_frames(stacks, len(stacks))
+    assert sum(microseconds for _, microseconds in frames) == sum(stacks.values())   # 자기 시간은 빠짐없이 한 번씩
+    assert frames == sorted(frames, key = lambda frame : -frame[1])
+
+def test_profiler_disabled(isolated_app) :
+    """꺼져 있거나 토큰이 없으면 요청 훅을 등록하지 않음"""
+    for enabled, token in ((False, 'admin-secret'), (True, '')) :
+        disabled = isolated_app(database = False, PROFILER_ENABLED = enabled, PROFILER_TOKEN = token)
+        Profiler(disabled)
+        assert not disabled.before_request_funcs and not disabled.after_request_funcs
+
+def test_profile_report_command(profiled_app) :
+    """flask profile-report : 합친 collapsed stack / 자기 시간 상위 함수 출력"""
+    client = profiled_app.test_client()
+    for _ in range(2) :
+        client.get('/work/5000', headers = {'X-Profile' : 'admin-secret'})
+    directory = profiled_app.config['PROFILER_DIR']
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args = ['profile-report', '--dir', directory, '--route', '/work/<int:n>'])
+    assert result.exit_code == 0
+    assert '프로파일 2개' in result.output
+    assert any(line.startswith('GET /work/<int:n>;') for line in result.output.splitlines())
+
+    result = runner.invoke(args = ['profile-report', '--dir', directory, '--top', '3'])
+    assert result.exit_code == 0
+    assert len([line for line in result.output.splitlines() if 'ms  ' in line]) == 3
+
+    result = runner.invoke(args = ['profile-report', '--dir', directory, '--route', '/todos'])
+    assert result.exit_code != 0
+    assert '합칠 프로파일이 없습니다' in result.output
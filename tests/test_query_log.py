@@ -0,0 +1,84 @@
+# 느린 쿼리 / N+1 쿼리 로그 테스트
+import logging
+from collections import Counter
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+import query_timing
+from models import db, Todo, User
+from query_log import QueryLog, assert_max_queries, repeated_statements
+
+@pytest.fixture
+def logged_app(isolated_app) :
+    """QUERY_LOG_ENABLED인 테스트용 앱 + 사용자마다 user.todos를 읽는(N+1) 라우트"""
+    logged = isolated_app(QUERY_LOG_ENABLED = True, SLOW_QUERY_MS = 10000, N_PLUS_ONE_THRESHOLD = 3)
+    query_log = QueryLog(logged, db)
+
+    @logged.route('/counts')
+    def counts() :
+        users = User.query.all()
+        return {user.username : len(user.todos) for user in users}   # lazy 로딩 -> 사용자마다 SELECT
+
+    with logged.app_context() :
+        users = [User(username = f'user{n}', email = f'user{n}@test.com', password = 'x') for n in range(5)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all([Todo(title = 'todo', user_id = user.id) for user in users])
+        db.session.commit()
+
+    yield logged
+    query_timing.remove_listener(query_log._record_query)
+
+def test_n_plus_one_warning(logged_app, caplog) :
+    """같은 모양의 쿼리가 기준보다 많이 실행되면 라우트와 SQL을 경고"""
+    with caplog.at_level(logging.WARNING) :
+        response = logged_app.test_client().get('/counts')
+
+    assert response.status_code == 200
+    warnings = [record.getMessage() for record in caplog.records if 'N+1' in record.getMessage()]
+    assert len(warnings) == 1
+    assert 'GET /counts' in warnings[0] and '5번' in warnings[0] and 'FROM todos' in warnings[0]
+    assert not any('느린 쿼리' in record.getMessage() for record in caplog.records)
+
+def test_slow_query_log(logged_app, caplog) :
+    """SLOW_QUERY_MS 이상 걸린 쿼리는 SQL / 파라미터 / 라우트와 함께 기록"""
+    logged_app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING) :
+        logged_app.test_client().get('/counts')
+
+    slow = [record.getMessage() for record in caplog.records if '느린 쿼리' in record.getMessage()]
+    assert len(slow) == 6   # 사용자 목록 1 + 사용자별 할 일 5
+    assert all('[GET /counts]' in message for message in slow)
+    assert any('파라미터=(1,)' in message for message in slow)
+
+def test_assert_max_queries(logged_app) :
+    """쿼리 수 상한을 넘으면 실행된 SQL과 함께 실패"""
+    client = logged_app.test_client()
+    with pytest.raises(AssertionError, match = '쿼리 6개 실행') :
+        with assert_max_queries(2) :
+            client.get('/counts')
+
+def test_repeated_statements() :
+    shapes = {'SELECT a' : 5, 'SELECT b' : 2, 'SELECT c' : 9}
+    assert repeated_statements(Counter(shapes), 3) == [('SELECT c', 9), ('SELECT a', 5)]
+
+def test_query_timing_listeners(logged_app) :
+    """측정한 시간은 등록한 함수 모두에 전달, 실패한 쿼리는 시작 시각만 정리"""
+    first, second = [], []
+    record_first = lambda conn, statement, parameters, seconds : first.append((statement, seconds))
+    record_second = lambda conn, statement, parameters, seconds : second.append((statement, seconds))
+    query_timing.add_listener(record_first)
+    query_timing.add_listener(record_second)
+    try :
+        with logged_app.app_context() :
+            with db.engine.connect() as connection :
+                with pytest.raises(OperationalError) :
+                    connection.execute(text('SELECT * FROM missing_table'))
+                connection.execute(text('SELECT 1'))
+                assert connection.info['query_started'] == []
+    finally :
+        query_timing.remove_listener(record_first)
+        query_timing.remove_listener(record_second)
+
+    assert [statement for statement, _ in first] == ['SELECT 1']
+    assert first == second   # 한 번 잰 값을 같이 사용
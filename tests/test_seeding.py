@@ -0,0 +1,140 @@
+# 대량 데이터 추가(flask seed) 테스트
+import re
+import random
+import pytest
+from sqlalchemy import text
+from app import app
+from models import db, Todo, User, TodoStats
+from search import FTS_TABLE, USER_SHIFT
+from seeding import seed_database, todo_counts
+
+@pytest.fixture
+def seed_app(isolated_app) :
+    """빈 DB 파일을 쓰는 테스트용 앱 + 트리거로 만든 기존 사용자 / 할 일"""
+    seeded = isolated_app()
+
+    with seeded.app_context() :
+        with db.engine.begin() as connection :
+            connection.exec_driver_sql('PRAGMA foreign_keys = ON')
+        user = User(username = 'existing', email = 'existing@test.com', password = 'x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([Todo(title = f'existing {n}', user_id = user.id, completed = n % 2 == 0) for n in range(3)])
+        db.session.commit()
+
+    return seeded
+
+def schema(connection) :
+    return connection.exec_driver_sql(
+        "SELECT type, name FROM sqlite_master WHERE tbl_name = 'todos' ORDER BY type, name").all()
+
+def test_todo_counts() :
+    """분포별 사용자별 할 일 개수 (합계는 항상 요청한 개수)"""
+    for distribution in ('fixed', 'uniform', 'zipf') :
+        counts = todo_counts(random.Random(1), 50, 1003, distribution)
+        assert len(counts) == 50 and sum(counts) == 1003
+
+    assert set(todo_counts(random.Random(1), 10, 100, 'fixed')) == {10}
+    zipf = todo_counts(random.Random(1), 100, 10000, 'zipf')
+    assert max(zipf) > 10 * 100   # 평균(100)보다 훨씬 많이 가진 사용자가 있음
+
+    with pytest.raises(ValueError) :
+        todo_counts(random.Random(1), 10, 100, 'normal')
+
+def test_seed_matches_triggers(seed_app) :
+    """트리거 대신 한꺼번에 채운 파생 테이블이 트리거로 만든 것과 같은 결과"""
+    with seed_app.app_context() :
+        with db.engine.connect() as connection :
+            before = schema(connection)
+
+        result = seed_database(db.engine, 'hash', 20, 2000, distribution = 'zipf', completed_ratio = 0.4,
+                               description_length = (0, 60), days = 30, seed = 7, batch_size = 300)
+        assert result['users'] == 20 and result['todos'] == 2000
+
+        with db.engine.connect() as connection :
+            assert schema(connection) == before   # 인덱스 / 트리거 복구
+            assert connection.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+
+            # 통계 : 할 일을 직접 센 값과 같음 (기존 사용자 포함)
+            stats = connection.exec_driver_sql('SELECT user_id, total, completed FROM todo_stats ORDER BY user_id').all()
+            counted = connection.exec_driver_sql(
+                'SELECT user_id, COUNT(*), SUM(completed) FROM todos GROUP BY user_id ORDER BY user_id').all()
+            assert [tuple(row) for row in stats] == [tuple(row) for row in counted]
+            assert len(stats) == 21
+
+            # 날짜별 통계 : 만든 개수 / 완료한 개수 합계
+            daily = connection.exec_driver_sql(
+                'SELECT user_id, SUM(created), SUM(completed) FROM todo_daily_stats GROUP BY user_id ORDER BY user_id').all()
+            assert [tuple(row) for row in daily] == [tuple(row) for row in counted]
+
+            # 변경 내역 : 할 일마다 하나, 사용자별 seq는 1부터 빈틈없이
+            changes = connection.exec_driver_sql(
+                'SELECT user_id, COUNT(*), MIN(seq), MAX(seq) FROM todo_changes GROUP BY user_id').all()
+            assert all(low == 1 and high == count for _, count, low, high in changes)
+            assert sum(count for _, count, _, _ in changes) == 2003
+
+            # 목록 버전 : 모든 사용자에게 있음
+            versions = connection.exec_driver_sql('SELECT COUNT(*) FROM todo_list_versions').scalar()
+            assert versions == 21
+
+            # 검색 색인 : 단어가 들어 있는 할 일을 모두 찾음
+            user_id, todo_title = connection.exec_driver_sql(
+                "SELECT user_id, title FROM todos WHERE user_id > 1 ORDER BY id LIMIT 1").one()
+            word = todo_title.split()[0]
+            found = connection.exec_driver_sql(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? AND rowid BETWEEN ? AND ?',
+                (f'"{word}"', user_id << USER_SHIFT, (user_id + 1) << USER_SHIFT)).all()
+            rows = connection.exec_driver_sql(
+                'SELECT id, title, description FROM todos WHERE user_id = ?', (user_id,)).all()
+            pattern = re.compile(rf'\b{word}\b')
+            expected = {todo_id for todo_id, title, description in rows if pattern.search(f'{title} {description}')}
+            assert {rowid - (user_id << USER_SHIFT) for rowid, in found} == expected
+
+        # 추가한 뒤에도 트리거가 그대로 동작
+        user = db.session.scalars(db.select(User).where(User.username != 'existing')).first()
+        total = db.session.get(TodoStats, user.id).total
+        db.session.add(Todo(title = 'after seed', user_id = user.id))
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(TodoStats, user.id).total == total + 1
+
+def test_seed_deterministic(seed_app) :
+    """같은 시드면 같은 사용자 / 할 일 (시각 제외)"""
+    def contents() :
+        return db.session.execute(text(
+            "SELECT users.username, title, description, completed FROM todos JOIN users ON users.id = todos.user_id "
+            "WHERE users.username LIKE 'seed%' ORDER BY todos.id")).all()
+
+    with seed_app.app_context() :
+        seed_database(db.engine, 'hash', 5, 300, seed = 3)
+        first = contents()
+        db.session.execute(text("DELETE FROM users WHERE username LIKE 'seed%'"))
+        db.session.commit()
+        seed_database(db.engine, 'hash', 5, 300, seed = 3, prefix = 'seed')
+        second = contents()
+        seed_database(db.engine, 'hash', 5, 300, seed = 4, prefix = 'other')
+
+    assert len(first) == 300
+    # 사용자 이름의 번호는 기존 id 다음부터라서 이름 대신 순서 / 내용 비교
+    assert [row[1:] for row in first] == [row[1:] for row in second]
+
+def test_seed_command(client) :
+    """flask seed : 추가한 사용자로 로그인해서 API 사용 가능"""
+    runner = app.test_cli_runner()
+    result = runner.invoke(args = ['seed', '--users', '3', '--todos', '90', '--distribution', 'fixed',
+                                   '--password', 'seedpass', '--prefix', 'cli'])
+    assert result.exit_code == 0, result.output
+    assert '사용자 3명, 할 일 90개 추가' in result.output
+
+    with app.app_context() :
+        username = db.session.scalars(db.select(User.username).where(User.username.like('cli%')).order_by(User.id)).first()
+    login = client.post('/login', json = {'username' : username, 'password' : 'seedpass'})
+    assert login.status_code == 200
+    headers = {'Authorization' : f"Bearer {login.json['access_token']}"}
+    assert client.get('/todos/stats', headers = headers).json['total'] == 30
+    assert client.get('/todos?limit=50', headers = headers).json['count'] == 30
+
+    result = runner.invoke(args = ['seed', '--description-length', '10-5'])
+    assert result.exit_code != 0
+    result = runner.invoke(args = ['seed', '--users', '0', '--todos', '10'])
+    assert result.exit_code != 0
@@ -0,0 +1,121 @@
+# 사용자별 샤딩 테스트
+import pytest
+from flask import Flask, g
+from models import db, Todo, User, UserShard, TodoListVersion, TodoChange, TodoStats
+from sharding import ShardRouter, shard_bind_key
+
+@pytest.fixture
+def sharded(tmp_path) :
+    """DB 파일 2개로 나눈 테스트용 앱 (디렉터리 DB + 샤드 2개)"""
+    sharded_app = Flask(__name__)
+    sharded_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "directory.db"}'
+    sharded_app.config['SQLALCHEMY_BINDS'] = {
+        shard_bind_key(shard) : f'sqlite:///{tmp_path / f"shard{shard}.db"}' for shard in range(2)
+    }
+    sharded_app.config['DATABASE_SHARDS'] = 2
+    db.init_app(sharded_app)
+    router = ShardRouter(sharded_app, db)
+
+    with sharded_app.app_context() :
+        router.create_all()
+        db.session.add_all([
+            User(username = f'user{n}', email = f'user{n}@test.com', password = 'x') for n in (1, 2)
+        ])
+        db.session.commit()
+
+    yield sharded_app, router
+
+    with sharded_app.app_context() :
+        for engine in db.engines.values() :
+            engine.dispose()
+    # init_app이 bind마다 만든 빈 metadata 제거 (다른 테스트 앱의 db.create_all이 shard bind를 찾지 않도록)
+    for shard in range(2) :
+        db.metadatas.pop(shard_bind_key(shard), None)
+
+def add_todos(sharded_app, user_id, count) :
+    """user_id 사용자로 할 일 count개 추가 후 id 목록 반환"""
+    with sharded_app.test_request_context() :
+        g.user_id = user_id
+        todos = [Todo(title = f'todo {n}', user_id = user_id) for n in range(count)]
+        db.session.add_all(todos)
+        db.session.commit()
+        return [todo.id for todo in todos]
+
+def count_rows(router, shard, user_id) :
+    todos = db.metadata.tables['todos']
+    with router.engine(shard).connect() as connection :
+        return connection.scalar(db.select(db.func.count()).where(todos.c.user_id == user_id))
+
+def test_todos_are_routed_to_user_shard(sharded) :
+    """할 일은 사용자의 샤드 파일에만 저장되고, id는 샤드끼리 겹치지 않음"""
+    sharded_app, router = sharded
+    sharded_app.config['SHARD_ID_BLOCK_SIZE'] = 2   # id 묶음을 여러 번 받아오도록
+    ids_1 = add_todos(sharded_app, 1, 3)
+    ids_2 = add_todos(sharded_app, 2, 2)
+
+    with sharded_app.app_context() :
+        assert router.shard_of(1) == 1 and router.shard_of(2) == 0   # user_id % 2
+        assert db.session.get(UserShard, 1).shard == 1                # 디렉터리에 기록
+        assert count_rows(router, 1, 1) == 3 and count_rows(router, 0, 1) == 0
+        assert count_rows(router, 0, 2) == 2
+
+    assert len(set(ids_1 + ids_2)) == 5
+
+    # 세션 쿼리는 현재 사용자의 샤드에서만 실행
+    with sharded_app.test_request_context() :
+        g.user_id = 2
+        titles = db.session.scalars(db.select(Todo.title).where(Todo.user_id == 2)).all()
+        assert len(titles) == 2
+        assert db.session.get(Todo, ids_1[0]) is None
+
+def test_move_user_keeps_ids_and_versions(sharded) :
+    """사용자 이동 후 id는 그대로, 새 할 일도 겹치지 않는 id, 목록 버전은 계속 증가"""
+    sharded_app, router = sharded
+    ids = add_todos(sharded_app, 1, 3)
+
+    with sharded_app.test_request_context() :
+        g.user_id = 1
+        old_version = db.session.get(TodoListVersion, 1).version
+        old_changes = db.session.execute(db.select(TodoChange.todo_id, TodoChange.seq).order_by(TodoChange.seq)).all()
+
+    with sharded_app.app_context() :
+        assert router.move_user(1, 0) == 3
+        assert count_rows(router, 0, 1) == 3 and count_rows(router, 1, 1) == 0
+        assert db.session.get(UserShard, 1).shard == 0
+
+    new_id = add_todos(sharded_app, 1, 1)[0]
+    assert new_id not in ids
+
+    with sharded_app.test_request_context() :
+        g.user_id = 1
+        moved = db.session.scalars(db.select(Todo.id).where(Todo.user_id == 1).order_by(Todo.id)).all()
+        assert moved == sorted(ids + [new_id])
+        # 변경 번호는 원래 샤드의 것을 그대로 이어감
+        changes = db.session.execute(db.select(TodoChange.todo_id, TodoChange.seq).order_by(TodoChange.seq)).all()
+        assert changes[:-1] == old_changes and changes[-1] == (new_id, old_changes[-1].seq + 1)
+        assert db.session.get(TodoListVersion, 1).version > old_version
+        # 통계도 옮겨지고 (트리거로 두 번 세지 않음) 이후 추가도 반영
+        assert db.session.get(TodoStats, 1).total == 4
+
+def test_plan_rebalance() :
+    """할 일이 많은 샤드의 사용자를 적은 샤드로 옮기는 계획"""
+    router = ShardRouter()
+    loads = {0 : {1 : 10, 3 : 40, 5 : 50}, 1 : {2 : 5}}
+    moves = router.plan_rebalance(loads)
+
+    assert moves == [(5, 0, 1, 50)]   # 100 : 5 -> 50 : 55
+    assert router.plan_rebalance({0 : {1 : 5}, 1 : {2 : 5}}) == []
+
+def test_delete_user_clears_shard(sharded) :
+    """샤드의 할 일 / 변경 내역 / 통계 삭제 (샤드 DB에는 users가 없어서 CASCADE 대신 직접 삭제)"""
+    sharded_app, router = sharded
+    add_todos(sharded_app, 1, 3)
+    add_todos(sharded_app, 2, 1)
+
+    with sharded_app.app_context() :
+        router.delete_user(1)
+        assert count_rows(router, 1, 1) == 0 and count_rows(router, 0, 2) == 1
+        with router.engine(1).connect() as connection :
+            for name in ('todo_changes', 'todo_stats', 'todo_daily_stats', 'todo_list_versions') :
+                table = db.metadata.tables[name]
+                assert connection.scalar(db.select(db.func.count()).select_from(table)) == 0
@@ -1,4 +1,19 @@
 # todo CRUD 테스트
+import json
+import threading
+from datetime import date, datetime, timedelta
+import pytest
+from flask import Flask
+from app import app, db, cache, group_writer, broker, metrics
+from broker import EventBroker
+from cache import LRUCache
+from group_commit import GroupCommitWriter
+from json_provider import FastJSONProvider
+from pagination import encode_cursor
+from query_log import assert_max_queries
+import sqlite_profile
+from models import Todo, ensure_indexes
+from sqlalchemy import event
 
 def test_create_todo_success(auth_client) :
     """Todo 생성 성공 테스트"""
@@ -103,4 +118,697 @@ def test_forbidden_access_other_user_todo(client) :
                           json = {'title' : 'Hacked'},
                           headers = {'Authorization' : f'Bearer {token2}'})
 
-    assert response.status_code == 403
\ No newline at end of file
+    assert response.status_code == 403
+
+def test_get_todos_pagination(auth_client) :
+    """커서 페이지네이션 테스트"""
+    for i in range(5) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    # 첫 페이지
+    first = auth_client.get('/todos?limit=2')
+    assert first.status_code == 200
+    assert [todo['title'] for todo in first.json['data']] == ['Todo 0', 'Todo 1']
+    assert first.json['next_cursor'] is not None
+
+    # 커서로 이어서 조회
+    second = auth_client.get(f"/todos?limit=2&cursor={first.json['next_cursor']}")
+    assert [todo['title'] for todo in second.json['data']] == ['Todo 2', 'Todo 3']
+
+    # 마지막 페이지는 next_cursor 없음
+    last = auth_client.get(f"/todos?limit=2&cursor={second.json['next_cursor']}")
+    assert [todo['title'] for todo in last.json['data']] == ['Todo 4']
+    assert last.json['next_cursor'] is None
+
+def test_get_todos_invalid_pagination(auth_client) :
+    """잘못된 limit / cursor 테스트"""
+    assert auth_client.get('/todos?limit=0').status_code == 400
+    assert auth_client.get('/todos?limit=abc').status_code == 400
+    assert auth_client.get('/todos?cursor=not-a-cursor').status_code == 400
+
+def test_get_todos_filter_completed(auth_client) :
+    """completed 필터 테스트"""
+    auth_client.post('/todos', json = {'title' : 'Todo 1'})
+    done = auth_client.post('/todos', json = {'title' : 'Todo 2'})
+    with app.app_context() :
+        db.session.get(Todo, done.json['data']['id']).completed = True
+        db.session.commit()
+
+    response = auth_client.get('/todos?completed=false')
+
+    assert response.status_code == 200
+    assert [todo['title'] for todo in response.json['data']] == ['Todo 1']
+    assert auth_client.get('/todos?completed=maybe').status_code == 400
+
+def test_get_todos_sort_desc_pagination(auth_client) :
+    """정렬 + 커서 페이지네이션 테스트"""
+    for i in range(3) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    first = auth_client.get('/todos?sort=created_at&order=desc&limit=2')
+    assert [todo['title'] for todo in first.json['data']] == ['Todo 2', 'Todo 1']
+
+    second = auth_client.get(f"/todos?sort=created_at&order=desc&limit=2&cursor={first.json['next_cursor']}")
+    assert [todo['title'] for todo in second.json['data']] == ['Todo 0']
+
+    # 다른 정렬로 만든 커서는 거부
+    response = auth_client.get(f"/todos?sort=updated_at&limit=2&cursor={first.json['next_cursor']}")
+    assert response.status_code == 400
+
+    # 정렬 값이 문자열이 아닌 위조 커서도 400
+    for key in (5, None, ['2025-01-01']) :
+        forged = encode_cursor({'id' : 1, 'sort' : 'created_at:asc', 'key' : key})
+        response = auth_client.get(f'/todos?sort=created_at&cursor={forged}')
+        assert response.status_code == 400
+        assert response.json['error'] == 'Invalid cursor'
+
+def test_get_todos_id_desc_pagination(auth_client) :
+    """id 내림차순 커서로 다음 페이지 조회"""
+    for i in range(5) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    first = auth_client.get('/todos?order=desc&limit=2')
+    assert [todo['title'] for todo in first.json['data']] == ['Todo 4', 'Todo 3']
+
+    second = auth_client.get(f"/todos?order=desc&limit=2&cursor={first.json['next_cursor']}")
+    assert second.status_code == 200
+    assert [todo['title'] for todo in second.json['data']] == ['Todo 2', 'Todo 1']
+
+    last = auth_client.get(f"/todos?order=desc&limit=2&cursor={second.json['next_cursor']}")
+    assert [todo['title'] for todo in last.json['data']] == ['Todo 0']
+
+    # 오름차순 요청에 내림차순 커서는 거부
+    assert auth_client.get(f"/todos?limit=2&cursor={first.json['next_cursor']}").status_code == 400
+
+def test_ensure_indexes_on_existing_db(tmp_path) :
+    """인덱스 없이 만든 예전 todos 테이블에도 목록 조회용 복합 인덱스 생성"""
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection :
+        connection.exec_driver_sql('CREATE TABLE todos (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, '
+                                   'description TEXT, completed BOOLEAN, created_at DATETIME, updated_at DATETIME, '
+                                   'user_id INTEGER NOT NULL)')
+
+    ensure_indexes(engine)
+    ensure_indexes(engine)   # 두 번 실행해도 오류 없음
+
+    names = {index['name'] for index in db.inspect(engine).get_indexes('todos')}
+    engine.dispose()
+    assert names == {index.name for index in Todo.__table__.indexes}
+
+def test_get_todos_fields(auth_client) :
+    """목록 필드 선택 + 전체 필드 응답은 to_dict와 같은 형식"""
+    todo_id = auth_client.post('/todos', json = {'title' : '할 일', 'description' : 'x' * 1000}).json['data']['id']
+    auth_client.post('/todos', json = {'title' : 'Todo 2'})
+
+    full = auth_client.get('/todos').json['data'][0]
+    assert full == auth_client.get(f'/todos/{todo_id}').json['data']   # created_at 등 isoformat 문자열
+
+    # 정렬 컬럼(created_at)을 고르지 않아도 커서는 만들어짐
+    response = auth_client.get('/todos?fields=title,completed&sort=created_at&limit=1')
+    assert response.json['data'] == [{'title' : '할 일', 'completed' : False}]
+    response = auth_client.get(f"/todos?fields=title&sort=created_at&limit=1&cursor={response.json['next_cursor']}")
+    assert response.json['data'] == [{'title' : 'Todo 2'}]
+
+    response = auth_client.get('/todos?fields=title,password')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid fields'
+
+def test_json_provider_fallback() :
+    """orjson을 쓰지 않아도 같은 JSON (datetime은 isoformat)"""
+
+    value = {'b' : datetime(2025, 11, 20, 10, 0, 0, 5), 'a' : '한글'}
+    fast = FastJSONProvider(app)
+    fallback = FastJSONProvider(app)
+    fallback.use_orjson = False
+
+    assert json.loads(fast.dumps(value)) == json.loads(fallback.dumps(value)) == {
+        'a' : '한글', 'b' : '2025-11-20T10:00:00.000005'
+    }
+    assert list(json.loads(fallback.dumps(value))) == ['a', 'b']   # 키 정렬
+
+def test_export_todos(auth_client, monkeypatch) :
+    """NDJSON 내보내기 테스트"""
+    monkeypatch.setitem(app.config, 'TODOS_EXPORT_CHUNK_SIZE', 2)   # 여러 번 나눠 읽도록 작게 설정
+    for i in range(5) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    response = auth_client.get('/todos/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text = True).splitlines()
+    assert [json.loads(line)['title'] for line in lines] == [f'Todo {i}' for i in range(5)]
+
+def test_import_todos_ndjson(auth_client, monkeypatch) :
+    """NDJSON 가져오기 테스트 (잘못된 줄은 건너뜀)"""
+    monkeypatch.setitem(app.config, 'TODOS_IMPORT_BATCH_SIZE', 2)
+    body = '\n'.join([
+        '{"title": "Todo 1"}',
+        '{"title": ""}',
+        'not json',
+        '{"title": "Todo 2", "completed": true}',
+        '{"title": "Todo 3", "description": "desc"}'
+    ])
+
+    response = auth_client.post('/todos/import', data = body,
+                                headers = {'Content-Type' : 'application/x-ndjson'})
+
+    assert response.status_code == 200
+    assert response.json['imported'] == 3
+    assert response.json['rejected'] == 2
+    assert [error['line'] for error in response.json['errors']] == [2, 3]
+
+    todos = auth_client.get('/todos').json['data']
+    assert [todo['title'] for todo in todos] == ['Todo 1', 'Todo 2', 'Todo 3']
+    assert todos[1]['completed'] == True
+
+def test_import_todos_json_array(auth_client) :
+    """JSON 배열 가져오기 테스트"""
+    response = auth_client.post('/todos/import', json = [
+        {'title' : 'Todo 1'},
+        {'title' : 'x' * 101},
+        {'title' : 'Todo 2'}
+    ])
+
+    assert response.status_code == 200
+    assert response.json['imported'] == 2
+    assert response.json['errors'][0]['error'] == 'Title too long'
+
+def test_batch_todos(auth_client) :
+    """일괄 처리 테스트"""
+    ids = [auth_client.post('/todos', json = {'title' : f'Todo {i}'}).json['data']['id'] for i in range(3)]
+
+    response = auth_client.post('/todos/batch', json = {'operations' : [
+        {'op' : 'create', 'title' : 'New Todo'},
+        {'op' : 'update', 'id' : ids[0], 'completed' : True},
+        {'op' : 'update', 'id' : ids[1], 'completed' : True},
+        {'op' : 'delete', 'id' : ids[2]},
+        {'op' : 'delete', 'id' : 999}
+    ]})
+
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [result['status'] for result in results] == [201, 200, 200, 200, 404]
+    assert results[0]['data']['title'] == 'New Todo'
+    assert results[1]['data']['completed'] == True
+
+    todos = auth_client.get('/todos').json['data']
+    assert [(todo['title'], todo['completed']) for todo in todos] == [
+        ('Todo 0', True), ('Todo 1', True), ('New Todo', False)
+    ]
+
+def test_batch_todos_invalid_operation(auth_client) :
+    """잘못된 작업이 있으면 아무것도 적용하지 않음"""
+    response = auth_client.post('/todos/batch', json = {'operations' : [
+        {'op' : 'create', 'title' : 'New Todo'},
+        {'op' : 'update', 'id' : 1, 'title' : ''}
+    ]})
+
+    assert response.status_code == 400
+    assert response.json['errors'][0]['index'] == 1
+    assert auth_client.get('/todos').json['count'] == 0
+
+def test_update_delete_single_statement(auth_client, monkeypatch) :
+    """수정 / 삭제는 SQL 한 번으로 처리"""
+    monkeypatch.setitem(app.config, 'REVOCATION_SYNC_SECONDS', 3600)   # 폐기 목록 동기화 쿼리 제외
+    todo_id = auth_client.post('/todos', json = {'title' : 'Original'}).json['data']['id']
+
+    with assert_max_queries(1) :
+        response = auth_client.put(f'/todos/{todo_id}', json = {'title' : 'Updated'})
+    assert response.status_code == 200
+    assert response.json['data']['title'] == 'Updated'
+
+    with assert_max_queries(1) :
+        response = auth_client.delete(f'/todos/{todo_id}')
+    assert response.status_code == 200
+    assert response.json['data']['title'] == 'Updated'
+
+def test_get_todos_etag(auth_client) :
+    """목록 ETag : 바뀌지 않았으면 304, 바뀌면 200"""
+    auth_client.post('/todos', json = {'title' : 'Todo 1'})
+
+    first = auth_client.get('/todos')
+    etag = first.headers['ETag']
+
+    response = auth_client.get('/todos', headers = {'If-None-Match' : etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # 할 일이 추가되면 버전이 바뀜
+    auth_client.post('/todos', json = {'title' : 'Todo 2'})
+    response = auth_client.get('/todos', headers = {'If-None-Match' : etag})
+    assert response.status_code == 200
+    assert response.json['count'] == 2
+
+def test_get_todos_etag_per_query(auth_client) :
+    """목록 ETag / 캐시 키는 쿼리 파라미터 전체로 구분 (순서만 다르면 같은 값)"""
+    for i in range(3) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    first = auth_client.get('/todos?limit=1&order=desc')
+    assert auth_client.get('/todos?order=desc&limit=1').headers['ETag'] == first.headers['ETag']
+
+    other = auth_client.get('/todos?limit=2&order=desc', headers = {'If-None-Match' : first.headers['ETag']})
+    assert other.status_code == 200
+    assert other.json['count'] == 2
+    assert other.headers['ETag'] != first.headers['ETag']
+
+def test_list_version_on_existing_db(tmp_path) :
+    """todos가 이미 있는 기존 DB에도 db.create_all로 목록 버전 트리거 생성 + 기존 할 일로 버전 채움"""
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection :
+        # 이 기능 전의 스키마 (users, todos만 있음)
+        connection.exec_driver_sql('CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(50) NOT NULL UNIQUE, '
+                                   'email VARCHAR(100) NOT NULL UNIQUE, password VARCHAR(200) NOT NULL, created_at DATETIME)')
+        connection.exec_driver_sql('CREATE TABLE todos (id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, '
+                                   'description TEXT, completed BOOLEAN, created_at DATETIME, updated_at DATETIME, '
+                                   'user_id INTEGER NOT NULL REFERENCES users (id))')
+        connection.exec_driver_sql("INSERT INTO users (id, username, email, password) VALUES (1, 'old', 'old@test.com', 'x')")
+        connection.exec_driver_sql("INSERT INTO todos (title, created_at, updated_at, user_id) "
+                                   "VALUES ('old todo', datetime('now'), datetime('now'), 1)")
+
+    db.metadata.create_all(bind = engine)
+
+    version = 'SELECT version FROM todo_list_versions WHERE user_id = 1'
+    with engine.begin() as connection :
+        assert connection.exec_driver_sql(version).scalar() == 1
+        connection.exec_driver_sql("INSERT INTO todos (title, created_at, updated_at, user_id) "
+                                   "VALUES ('new todo', datetime('now'), datetime('now'), 1)")
+        assert connection.exec_driver_sql(version).scalar() == 2
+    engine.dispose()
+
+def test_get_todo_etag(auth_client) :
+    """할 일 하나의 ETag : 수정되면 200"""
+    todo_id = auth_client.post('/todos', json = {'title' : 'Todo 1'}).json['data']['id']
+
+    etag = auth_client.get(f'/todos/{todo_id}').headers['ETag']
+    assert auth_client.get(f'/todos/{todo_id}', headers = {'If-None-Match' : etag}).status_code == 304
+
+    auth_client.put(f'/todos/{todo_id}', json = {'completed' : True})
+    response = auth_client.get(f'/todos/{todo_id}', headers = {'If-None-Match' : etag})
+    assert response.status_code == 200
+    assert response.json['data']['completed'] == True
+
+def test_get_todo_cache(auth_client) :
+    """조회 캐시 : 두 번째 조회는 hit, 수정하면 캐시 삭제"""
+    todo_id = auth_client.post('/todos', json = {'title' : 'Original'}).json['data']['id']
+
+    auth_client.get(f'/todos/{todo_id}')
+    before = cache.stats()
+    response = auth_client.get(f'/todos/{todo_id}')
+    assert response.json['data']['title'] == 'Original'
+    assert cache.stats()['hits'] == before['hits'] + 1
+
+    # 수정 후에는 새 값 조회
+    auth_client.put(f'/todos/{todo_id}', json = {'title' : 'Updated'})
+    response = auth_client.get(f'/todos/{todo_id}')
+    assert response.json['data']['title'] == 'Updated'
+
+    # 목록도 수정이 반영됨
+    auth_client.get('/todos')
+    auth_client.delete(f'/todos/{todo_id}')
+    assert auth_client.get('/todos').json['count'] == 0
+
+def test_get_todo_cache_ignores_entry_saved_after_write(auth_client) :
+    """조회와 수정이 겹쳐서 무효화 뒤에 예전 값이 저장되어도, 버전이 올라간 뒤의 조회는 새 값"""
+    todo_id = auth_client.post('/todos', json = {'title' : 'Original'}).json['data']['id']
+    old = auth_client.get(f'/todos/{todo_id}')   # 예전 값이 캐시에 있는 상태
+
+    # 무효화 없이 수정 (다른 요청의 cache.set이 무효화보다 늦게 끝난 것과 같은 상태)
+    with app.app_context() :
+        db.session.execute(db.update(Todo).where(Todo.id == todo_id).values(title = 'Updated'))
+        db.session.commit()
+
+    response = auth_client.get(f'/todos/{todo_id}', headers = {'If-None-Match' : old.headers['ETag']})
+    assert response.status_code == 200
+    assert response.json['data']['title'] == 'Updated'
+
+def test_lru_cache_eviction() :
+    """LRU : 개수를 넘으면 가장 오래 안 쓴 것부터 삭제, 태그로 묶어서 삭제"""
+    lru = LRUCache(max_entries = 2)
+    lru.set('a', 1, ttl = 60, tags = ('user:1',))
+    lru.set('b', 2, ttl = 60, tags = ('user:1',))
+    lru.get('a')            # a를 최근 사용으로
+    lru.set('c', 3, ttl = 60)
+
+    assert lru.get('b') is None   # 가장 오래 안 쓴 b 삭제
+    assert lru.get('a') == 1
+
+    lru.delete_tag('user:1')
+    assert lru.get('a') is None
+    assert lru.get('c') == 3
+
+    lru.set('d', 4, ttl = -1)     # 이미 만료
+    assert lru.get('d') is None
+
+def test_get_uses_readonly_engine(auth_client) :
+    """GET 요청의 SELECT는 읽기 전용 연결 풀 사용"""
+    auth_client.post('/todos', json = {'title' : 'Todo 1'})
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany) :
+        statements.append(statement)
+
+    with app.app_context() :
+        readonly = db.engines['readonly']
+        with readonly.connect() as connection :
+            assert connection.exec_driver_sql('PRAGMA query_only').scalar() == 1
+    event.listen(readonly, 'before_cursor_execute', on_execute)
+    try :
+        response = auth_client.get('/todos')
+    finally :
+        event.remove(readonly, 'before_cursor_execute', on_execute)
+
+    assert response.status_code == 200
+    assert any('FROM todos' in statement for statement in statements)
+
+def test_readonly_bind_follows_database_uri(isolated_app, tmp_path) :
+    """읽기 전용 bind는 앱에서 바꾼 SQLALCHEMY_DATABASE_URI를 따라감 (메모리 DB면 사용 안 함)"""
+    binds = {'readonly' : {'pool_size' : 1}}
+    other = isolated_app(database = False, SQLALCHEMY_BINDS = binds)
+    sqlite_profile.configure(other)
+    db.init_app(other)
+    sqlite_profile.init_app(other, db)
+    with other.app_context() :
+        assert db.engines['readonly'].url.database == db.engine.url.database == str(tmp_path / 'isolated0.db')
+
+    memory = isolated_app(database = False, SQLALCHEMY_DATABASE_URI = 'sqlite://', SQLALCHEMY_BINDS = binds)
+    sqlite_profile.configure(memory)
+    assert 'readonly' not in memory.config['SQLALCHEMY_BINDS']
+
+    # configure 없이 다른 DB를 지정하면 시작할 때 실패
+    mismatched = isolated_app(database = False, SQLALCHEMY_BINDS = {
+        'readonly' : {'url' : f"sqlite:///{tmp_path / 'other.db'}", 'pool_size' : 1}})
+    db.init_app(mismatched)
+    with pytest.raises(RuntimeError) :
+        sqlite_profile.init_app(mismatched, db)
+    assert binds == {'readonly' : {'pool_size' : 1}}   # 넘긴 설정은 그대로
+
+def test_group_commit(auth_client, monkeypatch) :
+    """그룹 커밋 : 동시에 들어온 추가 요청을 모아서 한 번에 커밋"""
+    monkeypatch.setitem(app.config, 'GROUP_COMMIT_ENABLED', True)
+    monkeypatch.setitem(app.config, 'GROUP_COMMIT_MAX_DELAY_MS', 200)   # 모두 같은 그룹에 들어가도록 넉넉하게
+    headers = {'Authorization' : f'Bearer {auth_client.token}'}
+    batches = group_writer.batches
+    responses = []
+
+    def create(i) :
+        with app.test_client() as client :
+            responses.append(client.post('/todos', json = {'title' : f'Todo {i}'}, headers = headers))
+
+    threads = [threading.Thread(target = create, args = (i,)) for i in range(5)]
+    for thread in threads :
+        thread.start()
+    for thread in threads :
+        thread.join()
+
+    assert [response.status_code for response in responses] == [201] * 5
+    assert group_writer.batches - batches < 5
+    assert auth_client.get('/todos').json['count'] == 5
+
+    # 수정도 그룹 커밋으로 처리
+    todo_id = responses[0].json['data']['id']
+    response = auth_client.put(f'/todos/{todo_id}', json = {'completed' : True})
+    assert response.status_code == 200
+    assert response.json['data']['completed'] == True
+    assert auth_client.put('/todos/999', json = {'completed' : True}).status_code == 404
+
+def test_group_commit_coalesces_concurrent_writes(tmp_path) :
+    """동시에 쓰는 스레드가 많으면 실제 COMMIT 횟수가 쓰기 횟수보다 적음"""
+    writer = GroupCommitWriter(Flask(__name__))
+    writer.app.config['GROUP_COMMIT_MAX_DELAY_MS'] = 20
+    engine = db.create_engine(f"sqlite:///{tmp_path / 'group.db'}")
+    with engine.begin() as connection :
+        connection.exec_driver_sql('CREATE TABLE items (value INTEGER)')
+
+    commits = []
+    event.listen(engine, 'commit', lambda connection : commits.append(threading.get_ident()))
+    writers = 32
+    barrier = threading.Barrier(writers)
+    errors = []
+
+    def write(value) :
+        barrier.wait()   # 모두 동시에 시작
+        try :
+            writer.submit(lambda connection : connection.exec_driver_sql('INSERT INTO items VALUES (?)', (value,)), engine)
+        except Exception as e :
+            errors.append(e)
+
+    threads = [threading.Thread(target = write, args = (i,)) for i in range(writers)]
+    for thread in threads :
+        thread.start()
+    for thread in threads :
+        thread.join()
+
+    with engine.connect() as connection :
+        assert connection.exec_driver_sql('SELECT COUNT(*) FROM items').scalar() == writers
+    engine.dispose()
+    assert errors == []
+    assert writer.operations == writers
+    assert len(commits) == writer.batches < writers / 4   # 쓰기 32번을 커밋 몇 번으로
+    assert len(set(commits)) == 1                           # 커밋은 모두 쓰기 스레드 하나에서
+
+def test_search_todos(auth_client) :
+    """전문 검색 : 접두어, 제목 우선 순위, 수정 / 삭제 반영, 빈 검색어"""
+    milk = auth_client.post('/todos', json = {'title' : '우유 사기', 'description' : '마트'}).json['data']['id']
+    auth_client.post('/todos', json = {'title' : '장보기', 'description' : '우유랑 빵'})
+    auth_client.post('/todos', json = {'title' : '운동하기'})
+
+    response = auth_client.get('/todos/search?q=우유')
+    assert response.status_code == 200
+    assert [todo['title'] for todo in response.json['data']] == ['우유 사기', '장보기']   # 제목에 있는 것이 먼저
+
+    # 마지막 단어는 접두어로 검색
+    assert auth_client.get('/todos/search?q=운').json['count'] == 1
+
+    auth_client.put(f'/todos/{milk}', json = {'title' : '두유 사기'})
+    assert [todo['title'] for todo in auth_client.get('/todos/search?q=우유').json['data']] == ['장보기']
+    assert auth_client.get('/todos/search?q=두유').json['data'][0]['id'] == milk
+
+    auth_client.delete(f'/todos/{milk}')
+    assert auth_client.get('/todos/search?q=두유').json['count'] == 0
+
+    assert auth_client.get('/todos/search?q=').status_code == 400
+    assert auth_client.get('/todos/search?q="()').status_code == 400
+
+def test_search_todos_pagination_and_owner(client, auth_client) :
+    """검색 결과 커서 페이지네이션 + 다른 사용자의 할 일은 검색되지 않음"""
+    for n in range(5) :
+        auth_client.post('/todos', json = {'title' : f'report {n}'})
+
+    client.post('/register', json = {'username' : 'other', 'email' : 'other@test.com', 'password' : '1234'})
+    token = client.post('/login', json = {'username' : 'other', 'password' : '1234'}).json['access_token']
+    client.post('/todos', json = {'title' : 'report secret'}, headers = {'Authorization' : f'Bearer {token}'})
+
+    seen = []
+    cursor = None
+    while True :
+        url = '/todos/search?q=report&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        page = auth_client.get(url).json
+        seen += [todo['title'] for todo in page['data']]
+        cursor = page['next_cursor']
+        if not cursor :
+            break
+
+    assert sorted(seen) == [f'report {n}' for n in range(5)]
+
+def test_todo_changes(auth_client) :
+    """변경 내역 : since 이후 추가 / 수정된 할 일과 삭제된 id만 반환"""
+    first = auth_client.post('/todos', json = {'title' : 'first'}).json['data']['id']
+    second = auth_client.post('/todos', json = {'title' : 'second'}).json['data']['id']
+
+    response = auth_client.get('/todos/changes')
+    assert response.status_code == 200
+    assert [todo['id'] for todo in response.json['changed']] == [first, second]
+    since = response.json['next_since']
+
+    # 변경이 없으면 빈 결과 + since 그대로
+    response = auth_client.get(f'/todos/changes?since={since}')
+    assert response.json['changed'] == [] and response.json['deleted'] == []
+    assert response.json['next_since'] == since
+
+    auth_client.put(f'/todos/{first}', json = {'completed' : True})
+    third = auth_client.post('/todos', json = {'title' : 'third'}).json['data']['id']
+    auth_client.delete(f'/todos/{second}')
+
+    response = auth_client.get(f'/todos/changes?since={since}&limit=1')
+    assert response.json['has_more'] is True
+    assert [todo['id'] for todo in response.json['changed']] == [first]
+    assert response.json['changed'][0]['completed'] is True
+
+    response = auth_client.get(f"/todos/changes?since={response.json['next_since']}")
+    assert [todo['id'] for todo in response.json['changed']] == [third]
+    assert response.json['deleted'] == [second]
+    assert response.json['has_more'] is False
+
+    assert auth_client.get('/todos/changes?since=abc').status_code == 400
+
+def test_todo_changes_keeps_tombstone_after_id_reuse(client, auth_client) :
+    """가장 큰 id의 할 일을 지운 뒤 다른 사용자가 할 일을 추가해도 삭제 기록이 남음"""
+    todo_id = auth_client.post('/todos', json = {'title' : 'deleted'}).json['data']['id']
+    since = auth_client.get('/todos/changes').json['next_since']
+    auth_client.delete(f'/todos/{todo_id}')
+
+    client.post('/register', json = {'username' : 'user2', 'email' : 'user2@test.com', 'password' : '1234'})
+    token2 = client.post('/login', json = {'username' : 'user2', 'password' : '1234'}).json['access_token']
+    created = client.post('/todos', json = {'title' : 'other user'}, headers = {'Authorization' : f'Bearer {token2}'})
+    assert created.json['data']['id'] != todo_id   # id를 다시 쓰지 않음
+
+    response = auth_client.get(f'/todos/changes?since={since}')
+    assert response.json['deleted'] == [todo_id]
+    assert response.json['changed'] == []
+
+def test_todo_stats(auth_client) :
+    """통계 : 트리거로 유지되는 개수 + 날짜별 생성 / 완료 개수"""
+    ids = [auth_client.post('/todos', json = {'title' : f'Todo {i}'}).json['data']['id'] for i in range(3)]
+    auth_client.put(f'/todos/{ids[0]}', json = {'completed' : True})
+    auth_client.put(f'/todos/{ids[0]}', json = {'title' : 'renamed'})   # 완료 여부가 그대로면 통계도 그대로
+    auth_client.post('/todos/batch', json = {'operations' : [
+        {'op' : 'update', 'id' : ids[1], 'completed' : True},
+        {'op' : 'delete', 'id' : ids[2]}
+    ]})
+    auth_client.post('/todos/import', data = '{"title" : "done", "completed" : true}\n')
+    # 어제 만든 할 일
+    with app.app_context() :
+        db.session.add(Todo(title = 'old', user_id = 1, created_at = datetime.now() - timedelta(days = 1)))
+        db.session.commit()
+
+    response = auth_client.get('/todos/stats?days=2')
+    assert response.status_code == 200
+    assert (response.json['total'], response.json['completed'], response.json['pending']) == (4, 3, 1)
+    assert response.json['days'] == [
+        {'date' : (date.today() - timedelta(days = 1)).isoformat(), 'created' : 1, 'completed' : 0},
+        {'date' : date.today().isoformat(), 'created' : 4, 'completed' : 3}
+    ]
+
+    # 완료 취소 / 삭제도 반영
+    auth_client.put(f'/todos/{ids[1]}', json = {'completed' : False})
+    auth_client.delete(f'/todos/{ids[0]}')
+    response = auth_client.get('/todos/stats', headers = {'If-None-Match' : response.headers['ETag']})
+    assert response.status_code == 200
+    assert (response.json['total'], response.json['completed']) == (3, 1)
+    assert len(response.json['days']) == 30 and response.json['days'][-1]['completed'] == 2
+
+    assert auth_client.get('/todos/stats?days=0').status_code == 400
+
+def test_todo_stream(auth_client) :
+    """변경 알림 : 연결을 열어둔 동안 추가 / 수정 / 삭제 이벤트를 받음"""
+    app.config['SSE_HEARTBEAT_SECONDS'] = 0.01   # 테스트는 기다리지 않도록
+    try :
+        response = auth_client.get('/todos/stream', buffered = False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        chunks = response.response   # 응답 본문을 한 덩어리씩 읽음
+        assert next(chunks).startswith(b'retry:')
+
+        # 이벤트가 없으면 keep-alive 주석
+        assert next(chunks) == b': keep-alive\n\n'
+
+        todo_id = auth_client.post('/todos', json = {'title' : 'stream'}).json['data']['id']
+        auth_client.put(f'/todos/{todo_id}', json = {'completed' : True})
+        auth_client.delete(f'/todos/{todo_id}')
+
+        created, updated, deleted = (next(chunks).decode().split('\n') for _ in range(3))
+        assert created[0] == 'event: created' and json.loads(created[2][6:])['title'] == 'stream'
+        assert updated[0] == 'event: updated' and json.loads(updated[2][6:])['completed'] is True
+        assert deleted[0] == 'event: deleted' and json.loads(deleted[2][6:]) == {'id' : todo_id}
+
+        assert broker.subscriber_count() == 1
+        response.close()   # 클라이언트가 연결을 끊으면 구독 해제
+        assert broker.subscriber_count() == 0
+    finally :
+        app.config['SSE_HEARTBEAT_SECONDS'] = 15
+
+def test_todo_stream_closes_on_revoke_and_limits_streams(auth_client, monkeypatch) :
+    """로그아웃하면 열린 스트림도 revoked 이벤트 후 종료 + 동시 스트림 수 제한"""
+    monkeypatch.setitem(app.config, 'SSE_HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setitem(app.config, 'SSE_MAX_STREAMS', 1)
+
+    response = auth_client.get('/todos/stream', buffered = False)
+    chunks = response.response
+    assert next(chunks).startswith(b'retry:')
+    assert next(chunks) == b': keep-alive\n\n'
+
+    # 스트림 하나가 열려 있으면 더 열 수 없음
+    second = auth_client.get('/todos/stream')
+    assert second.status_code == 503
+    assert 'Retry-After' in second.headers
+
+    assert auth_client.post('/logout').status_code == 200
+    remaining = list(chunks)   # 폐기를 확인하면 스트림 종료
+    assert remaining[-1] == b'event: revoked\ndata: {}\n\n'
+    assert broker.subscriber_count() == 0
+    response.close()
+
+def test_event_broker_drops_slow_subscriber() :
+    """큐가 가득 찬 구독자만 끊고, 다른 사용자 / 구독자에게는 계속 전달"""
+    slow_app = Flask(__name__)
+    slow_app.config['SSE_QUEUE_SIZE'] = 2
+    event_broker = EventBroker(slow_app)
+    slow = event_broker.subscribe(1)
+    fast = event_broker.subscribe(1)
+    other = event_broker.subscribe(2)
+
+    for n in range(2) :
+        event_broker.publish(1, 'created', {'id' : n})
+        assert fast.get(0) is not None   # fast는 바로바로 읽음
+    assert not slow.dropped
+
+    assert event_broker.publish(1, 'created', {'id' : 2}) == 1   # slow는 넘쳐서 끊김
+    assert slow.dropped and not fast.dropped
+    assert event_broker.subscriber_count() == 2
+    assert other.get(0) is None   # 다른 사용자의 이벤트는 받지 않음
+
+def test_metrics(auth_client) :
+    """요청 지표 : 라우트별 요청 수 / 응답 시간 / 단계별 시간 / 쿼리 수 (Prometheus 형식)"""
+    metrics.reset()
+    auth_client.post('/todos', json = {'title' : 'Todo 1'})
+    auth_client.get('/todos')
+    auth_client.get('/todos/999')
+    auth_client.get('/no-such-page')
+
+    response = auth_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    samples = {}
+    for line in response.get_data(as_text = True).splitlines() :
+        if not line.startswith('#') :
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+
+    assert samples['todo_http_requests_total{method="GET",route="/todos",status="200"}'] == 1
+    assert samples['todo_http_requests_total{method="GET",route="/todos/<int:todo_id>",status="404"}'] == 1
+    assert samples['todo_http_requests_total{method="GET",route="unmatched",status="404"}'] == 1
+    assert samples['todo_http_request_duration_seconds_count{method="POST",route="/todos"}'] == 1
+    assert samples['todo_http_request_duration_seconds_bucket{method="POST",route="/todos",le="+Inf"}'] == 1
+    for phase in ('auth', 'sql', 'serialize') :
+        assert samples[f'todo_http_request_phase_seconds_count{{route="/todos",phase="{phase}"}}'] == 2
+    # 쿼리 수 (POST, GET 합계) : 추가(INSERT) + 목록 조회(목록 버전, 목록)
+    assert samples['todo_http_request_queries_sum{route="/todos"}'] >= 3
+    assert samples['todo_http_request_queries_bucket{route="/todos",le="0"}'] == 0
+
+def test_endpoint_query_counts(auth_client, monkeypatch) :
+    """엔드포인트별 쿼리 수 상한 (N+1이나 불필요한 조회가 생기면 실패)"""
+    monkeypatch.setitem(app.config, 'REVOCATION_SYNC_SECONDS', 3600)   # 폐기 목록 동기화 쿼리 제외
+    auth_client.get('/todos')   # 폐기 목록 첫 동기화
+
+    with assert_max_queries(1) :
+        todo_id = auth_client.post('/todos', json = {'title' : 'Todo 1'}).json['data']['id']
+    for i in range(2, 6) :
+        auth_client.post('/todos', json = {'title' : f'Todo {i}'})
+
+    # 할 일 개수와 상관없이 목록 버전 + 목록
+    with assert_max_queries(2) :
+        assert auth_client.get('/todos').json['count'] == 5
+    with assert_max_queries(2) :   # 목록 버전(캐시 키) + 할 일
+        auth_client.get(f'/todos/{todo_id}')
+    with assert_max_queries(1) :   # 캐시 hit : 목록 버전만
+        auth_client.get(f'/todos/{todo_id}')
+    with assert_max_queries(1) :
+        auth_client.put(f'/todos/{todo_id}', json = {'completed' : True})
+    with assert_max_queries(3) :
+        auth_client.get('/todos/stats')
+    with assert_max_queries(1) :
+        auth_client.get('/todos/changes')
+    with assert_max_queries(1) :
+        auth_client.delete(f'/todos/{todo_id}')